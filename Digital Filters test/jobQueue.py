@@ -0,0 +1,244 @@
+import multiprocessing
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class QueueFull(Exception):
+    """A client, or the whole queue, has too many jobs waiting"""
+
+
+class Job:
+    def __init__(self, key, args, slot):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.args = args
+        self.slot = slot
+        self.clients = set()
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+
+    def to_dict(self):
+        info = {'id': self.id, 'status': self.status, 'created': self.created}
+        if self.started is not None:
+            info['queued_seconds'] = self.started - self.created
+        if self.finished is not None and self.started is not None:
+            info['run_seconds'] = self.finished - self.started
+        if self.error is not None:
+            info['error'] = self.error
+        return info
+
+
+class JobQueue:
+    """Run heavy requests on a process pool and let clients poll for them.
+
+    submit() returns at once with a Job. Jobs with the same key (e.g. the
+    same image, feature and parameter) are coalesced into one, whichever
+    clients asked for it. A client's newer job in the same slot (e.g. the
+    same slider on the same image) supersedes its older one: the older job
+    is cancelled unless another client is still waiting for it. Each client
+    may have at most max_per_client jobs waiting and the queue as a whole at
+    most max_queued. Only max_workers jobs are handed to the pool at a time,
+    so anything still waiting can be cancelled cleanly. If a worker dies,
+    every job running on the pool fails and the next waiting job starts a
+    fresh pool. Finished jobs are kept, newest first, up to max_finished so
+    late polls still find them.
+    """
+
+    def __init__(self, function, max_workers=None, max_per_client=4, max_queued=64, max_finished=256,
+                 initializer=None, initargs=(), on_finish=None):
+        self.function = function
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.max_per_client = max_per_client
+        self.max_queued = max_queued
+        self.max_finished = max_finished
+        self.initializer = initializer
+        self.initargs = initargs
+        # Called with each job as it finishes, e.g. to store results or count them
+        self.on_finish = on_finish
+
+        self.coalesced = 0
+        self._executor = None
+        self._jobs = {}
+        self._by_key = {}
+        self._by_slot = {}
+        self._queue = deque()
+        # Jobs handed to the current pool, by id
+        self._running = {}
+        self._finished = OrderedDict()
+        self._condition = threading.Condition()
+
+    def submit(self, client, key, args, slot=None):
+        """Queue function(*args) for client, or join an existing job with the same key"""
+        with self._condition:
+            job = self._by_key.get(key)
+            if job is not None and job.status not in (FAILED, CANCELLED):
+                self.coalesced += 1
+                self._claim(client, job, slot)
+                return job
+
+            waiting = sum(1 for queued in self._queue if client in queued.clients)
+            if waiting >= self.max_per_client:
+                raise QueueFull(f"Client already has {waiting} jobs waiting")
+            if len(self._queue) >= self.max_queued:
+                raise QueueFull("The job queue is full")
+
+            job = Job(key, args, slot)
+            self._jobs[job.id] = job
+            self._by_key[key] = job
+            self._claim(client, job, slot)
+            self._queue.append(job)
+            self._dispatch()
+            return job
+
+    def complete(self, client, key, result, slot=None):
+        """Record a result computed elsewhere (e.g. a cache hit) as a finished job"""
+        with self._condition:
+            job = self._by_key.get(key)
+            if job is None or job.status in (FAILED, CANCELLED):
+                job = Job(key, None, slot)
+                job.result = result
+                self._jobs[job.id] = job
+                self._by_key[key] = job
+                self._finish(job, DONE)
+            self._claim(client, job, slot)
+            return job
+
+    def get(self, job_id):
+        with self._condition:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id, timeout):
+        """Block until the job finishes or timeout passes; returns the job or None"""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            job = self._jobs.get(job_id)
+            while job is not None and job.status not in FINISHED:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+                job = self._jobs.get(job_id)
+            return job
+
+    def cancel(self, job_id, client):
+        """Withdraw client's interest; the job is cancelled once nobody wants it"""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            self._release(client, job)
+            return job
+
+    def stats(self):
+        with self._condition:
+            counts = {status: 0 for status in (QUEUED, RUNNING) + FINISHED}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return dict(counts, coalesced=self.coalesced, workers=self.max_workers)
+
+    def shutdown(self):
+        with self._condition:
+            for job in list(self._queue):
+                self._finish(job, CANCELLED)
+            self._queue.clear()
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _claim(self, client, job, slot):
+        if slot is not None:
+            previous = self._by_slot.get((client, slot))
+            if previous is not None and previous is not job:
+                self._release(client, previous)
+            self._by_slot[(client, slot)] = job
+        job.clients.add(client)
+
+    def _release(self, client, job):
+        job.clients.discard(client)
+        if self._by_slot.get((client, job.slot)) is job:
+            del self._by_slot[(client, job.slot)]
+        if not job.clients and job.status == QUEUED:
+            self._queue.remove(job)
+            self._finish(job, CANCELLED)
+
+    def _dispatch(self):
+        # Runs with the condition held
+        while self._queue and len(self._running) < self.max_workers:
+            if self._executor is None:
+                # spawn rather than fork: the web server already runs threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn'),
+                    initializer=self.initializer, initargs=self.initargs)
+            job = self._queue.popleft()
+            job.status = RUNNING
+            job.started = time.time()
+            try:
+                future = self._executor.submit(self.function, *job.args)
+            except BrokenProcessPool as e:
+                self._break_pool(e)
+                self._fail(job, e)
+                continue
+            self._running[job.id] = job
+            future.add_done_callback(lambda future, job=job: self._done(job, future))
+
+    def _done(self, job, future):
+        with self._condition:
+            # Absent if the job already failed with the rest of a broken pool
+            if self._running.pop(job.id, None) is not None:
+                try:
+                    job.result = future.result()
+                    self._finish(job, DONE)
+                except BrokenProcessPool as e:
+                    self._break_pool(e)
+                    self._fail(job, e)
+                except Exception as e:
+                    self._fail(job, e)
+            self._dispatch()
+
+    def _break_pool(self, error):
+        """A worker died (e.g. killed for memory): fail every job on the pool and drop it.
+
+        Each running job's future raises BrokenProcessPool on its own
+        callback; failing them all here, once, means later callbacks find
+        nothing left to do, and the next _dispatch() starts a fresh pool.
+        """
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+        running = list(self._running.values())
+        self._running.clear()
+        for job in running:
+            self._fail(job, error)
+
+    def _fail(self, job, error):
+        job.error = str(error) or type(error).__name__
+        self._finish(job, FAILED)
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished = time.time()
+        job.args = None
+        self._finished[job.id] = job
+        while len(self._finished) > self.max_finished:
+            old_id, old = self._finished.popitem(last=False)
+            self._jobs.pop(old_id, None)
+            if self._by_key.get(old.key) is old:
+                del self._by_key[old.key]
+        self._condition.notify_all()
+        if self.on_finish is not None:
+            self.on_finish(job)
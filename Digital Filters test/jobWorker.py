@@ -0,0 +1,45 @@
+import cv2
+
+from uploadStore import UploadStore
+from xraydsp.parallelBands import configure
+from xraydsp.spectrumCache import SpectrumCache, reconstruct
+
+# Per-process state, set up once by init_worker in each pool process
+_worker = {}
+
+
+def init_worker(upload_folder, shared_folder, upload_cache_bytes, fft_workers, encoding, cores=1):
+    """Give a job process its own upload store, spectrum cache and output encoding.
+
+    With a shared folder the decoded uploads are memory-mapped from the .npy
+    files written by the web process rather than decoded again here. cores
+    is this process's share of the machine for its FFTs, band pools and
+    OpenCV calls.
+    """
+    configure(cores, opencv_threads=cores)
+    _worker['uploads'] = UploadStore(upload_folder, max_bytes=upload_cache_bytes, shared_folder=shared_folder)
+    _worker['spectra'] = SpectrumCache(max_entries=4, workers=fft_workers)
+    _worker['fft_workers'] = fft_workers
+    _worker['encoding'] = encoding
+
+
+def render(image_key, feature, cutoff_ratio):
+    """Compress and encode one upload; runs in a job process"""
+    if feature != 'compression':
+        raise ValueError(f"Unknown feature: {feature}")
+
+    spectra = _worker['spectra']
+    entry = spectra.get(image_key)
+    if entry is None:
+        image = _worker['uploads'].get(image_key)
+        if image is None:
+            raise LookupError("Uploaded file not found or invalid.")
+        entry = spectra.put(image_key, image)
+
+    spectrum, shape = entry
+    result = reconstruct(spectrum, shape, cutoff_ratio, _worker['fft_workers'])
+    extension, flags, mimetype = _worker['encoding']
+    ok, buffer = cv2.imencode(extension, result, flags)
+    if not ok:
+        raise ValueError(f"Could not encode image as {extension}")
+    return buffer.tobytes(), mimetype
@@ -1,11 +1,91 @@
-from flask import Flask, request, render_template, jsonify, send_from_directory
-import numpy as np
+from flask import Flask, Response, g, request, render_template, jsonify, send_from_directory, make_response, url_for, \
+    stream_with_context
 import cv2
+import base64
+import glob
+import hashlib
+import json
 import os
+import sys
+import threading
+import time
+import uuid
+
+# The xraydsp package sits at the repository root, one level above this service
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from xraydsp import parallelBands
+from xraydsp.metrics import CONTENT_TYPE, REGISTRY, stage
+from xraydsp.spectrumCache import SpectrumCache, reconstruct, reconstruct_preview, preview_image
+from uploadStore import UploadStore, is_valid_key
+from precompute import Precomputer
+from jobQueue import JobQueue, QueueFull, CANCELLED, DONE, FAILED
+import jobWorker
+from samplingProfiler import SamplingProfiler, profile_path
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['OUTPUT_FOLDER'] = 'outputs'
+# Cores this process may use at once for band pools and FFTs, shared by all
+# concurrent requests (0: XRAY_WORKERS or every core)
+app.config['CPU_WORKERS'] = int(os.environ.get('CPU_WORKERS', 0))
+# scipy.fft worker threads per transform, capped by the cores other requests
+# leave free (-1 asks for all of them)
+app.config['FFT_WORKERS'] = int(os.environ.get('FFT_WORKERS', -1))
+
+# Encoding of images returned directly by /adjust: png, webp or jpeg
+app.config['OUTPUT_FORMAT'] = os.environ.get('OUTPUT_FORMAT', 'png')
+app.config['PNG_COMPRESSION'] = int(os.environ.get('PNG_COMPRESSION', 3))
+app.config['JPEG_QUALITY'] = int(os.environ.get('JPEG_QUALITY', 90))
+app.config['WEBP_QUALITY'] = int(os.environ.get('WEBP_QUALITY', 90))
+app.config['ADJUST_MAX_AGE'] = int(os.environ.get('ADJUST_MAX_AGE', 3600))
+
+# Decoded uploads: in-process byte budget, lifetime, and an optional folder
+# (ideally on /dev/shm) of .npy files memory-mapped by every worker process
+app.config['UPLOAD_CACHE_BYTES'] = int(os.environ.get('UPLOAD_CACHE_BYTES', 256 * 2**20))
+app.config['UPLOAD_MAX_AGE'] = int(os.environ.get('UPLOAD_MAX_AGE', 3600))
+app.config['SHARED_CACHE_FOLDER'] = os.environ.get('SHARED_CACHE_FOLDER')
+
+# Background workers that render every compression slider stop after an upload
+app.config['PRECOMPUTE_WORKERS'] = int(os.environ.get('PRECOMPUTE_WORKERS', 2))
+app.config['PRECOMPUTE_CACHE_BYTES'] = int(os.environ.get('PRECOMPUTE_CACHE_BYTES', 64 * 2**20))
+
+# Process pool behind /jobs: worker processes, jobs each client may have
+# waiting, jobs waiting overall, and the longest a status poll may block
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', os.cpu_count() or 1))
+app.config['JOB_CLIENT_LIMIT'] = int(os.environ.get('JOB_CLIENT_LIMIT', 4))
+app.config['JOB_QUEUE_LIMIT'] = int(os.environ.get('JOB_QUEUE_LIMIT', 64))
+app.config['JOB_MAX_WAIT'] = float(os.environ.get('JOB_MAX_WAIT', 30))
+
+# Longest side of the quick preview streamed by /adjust/stream before the full result
+app.config['PREVIEW_MAX_SIDE'] = int(os.environ.get('PREVIEW_MAX_SIDE', 256))
+
+# Set PROFILE_FOLDER to write a sampled collapsed-stack profile of every request there
+app.config['PROFILE_FOLDER'] = os.environ.get('PROFILE_FOLDER')
+app.config['PROFILE_INTERVAL_MS'] = float(os.environ.get('PROFILE_INTERVAL_MS', 2))
+
+# Stops of the compression slider in results.html (0.05 to 0.5, step 0.05)
+COMPRESSION_STOPS = [round(0.05 * step, 2) for step in range(1, 11)]
+DEFAULT_CUTOFF_RATIO = 0.1
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    'xray_request_seconds', "Request latency by endpoint and status", ['endpoint', 'status'])
+CACHE_LOOKUPS = REGISTRY.counter(
+    'xray_cache_lookups', "Spectrum and precomputed-result cache lookups", ['cache', 'result'])
+IMAGE_PIXELS = REGISTRY.histogram(
+    'xray_image_pixels', "Pixels in each image transformed", buckets=[4**n for n in range(8, 14)])
+UPLOAD_BYTES = REGISTRY.counter('xray_upload_bytes', "Bytes of images uploaded")
+ENCODED_BYTES = REGISTRY.counter('xray_encoded_bytes', "Bytes of images encoded for responses", ['format'])
+JOB_EVENTS = REGISTRY.counter(
+    'xray_jobs', "Jobs submitted, rejected and finished by outcome", ['event'])
+
+parallelBands.configure(app.config['CPU_WORKERS'])
+spectrum_cache = SpectrumCache(workers=app.config['FFT_WORKERS'])
+upload_store = UploadStore(
+    app.config['UPLOAD_FOLDER'],
+    max_bytes=app.config['UPLOAD_CACHE_BYTES'],
+    max_age=app.config['UPLOAD_MAX_AGE'],
+    shared_folder=app.config['SHARED_CACHE_FOLDER'],
+)
 
 # Ensure directories exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -17,80 +97,377 @@ def save_image(image, filename):
     cv2.imwrite(filepath, image)
     return filename
 
-def compress_image(image, cutoff_ratio):
-    """Compress the image by retaining a percentage of frequencies."""
-    rows, cols = image.shape
-    center_row, center_col = rows // 2, cols // 2
+def adjusted_filename(image_key, feature):
+    """Name of the file a legacy /adjust POST writes for one upload and feature."""
+    return f"{image_key}_{feature}_adjusted.png"
+
+def remove_evicted_outputs():
+    """Delete legacy /adjust files whose upload has been evicted by any process."""
+    for path in glob.glob(os.path.join(app.config['OUTPUT_FOLDER'], '*_adjusted.png')):
+        image_key = os.path.basename(path).split('_', 1)[0]
+        if is_valid_key(image_key) and upload_store.filename(image_key) is None:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+def encoding_settings():
+    """Return the file extension, imencode flags and mimetype for OUTPUT_FORMAT."""
+    fmt = app.config['OUTPUT_FORMAT'].lower()
+    if fmt == 'png':
+        return '.png', [cv2.IMWRITE_PNG_COMPRESSION, app.config['PNG_COMPRESSION']], 'image/png'
+    if fmt == 'webp':
+        return '.webp', [cv2.IMWRITE_WEBP_QUALITY, app.config['WEBP_QUALITY']], 'image/webp'
+    if fmt in ('jpg', 'jpeg'):
+        return '.jpg', [cv2.IMWRITE_JPEG_QUALITY, app.config['JPEG_QUALITY']], 'image/jpeg'
+    raise ValueError(f"Unsupported output format: {fmt}")
+
+def encode_image(image):
+    """Encode an image in memory with the configured output format."""
+    extension, flags, mimetype = encoding_settings()
+    with stage('encode'):
+        ok, buffer = cv2.imencode(extension, image, flags)
+    if not ok:
+        raise ValueError(f"Could not encode image as {extension}")
+    ENCODED_BYTES.inc(buffer.nbytes, format=extension.lstrip('.'))
+    return buffer.tobytes(), mimetype
+
+def adjustment_etag(image_key, feature, param):
+    """Strong ETag for one adjustment of one image in the current output encoding."""
+    _, flags, mimetype = encoding_settings()
+    identity = f"{image_key}:{feature}:{param!r}:{mimetype}:{flags}"
+    return hashlib.sha256(identity.encode()).hexdigest()[:32]
+
+def load_upload(image_key):
+    image = upload_store.get(image_key)
+    if image is not None:
+        IMAGE_PIXELS.observe(image.size)
+    return image
+
+def cached_spectrum(image_key):
+    """Return the cached (spectrum, shape) of an upload, transforming it only once on a miss."""
+    entry = spectrum_cache.get(image_key)
+    CACHE_LOOKUPS.inc(cache='spectrum', result='miss' if entry is None else 'hit')
+    if entry is None:
+        # Concurrent misses (e.g. every precompute worker after an upload) share one transform
+        entry = spectrum_cache.fetch(image_key, lambda: load_upload(image_key))
+    return entry
+
+def render_compression(image_key, cutoff_ratio):
+    """Compress and encode an upload, or return None if it is unknown."""
+    entry = cached_spectrum(image_key)
+    if entry is None:
+        return None
+    spectrum, shape = entry
+    return encode_image(reconstruct(spectrum, shape, cutoff_ratio, app.config['FFT_WORKERS']))
+
+precomputer = Precomputer(render_compression, max_workers=app.config['PRECOMPUTE_WORKERS'],
+                          max_bytes=app.config['PRECOMPUTE_CACHE_BYTES'])
+
+def schedule_precompute(client, image_key):
+    """Queue every compression stop for an upload, starting next to the default."""
+    jobs = [(adjustment_etag(image_key, 'compression', stop), stop) for stop in COMPRESSION_STOPS]
+    precomputer.schedule(client, image_key, jobs, DEFAULT_CUTOFF_RATIO)
+
+def record_job(job):
+    """Keep finished renders with the precomputed ones so /adjust can serve them too."""
+    JOB_EVENTS.inc(event=job.status)
+    if job.status == DONE:
+        precomputer.store(job.key, job.result)
+
+job_queue = JobQueue(
+    jobWorker.render,
+    max_workers=app.config['JOB_WORKERS'],
+    max_per_client=app.config['JOB_CLIENT_LIMIT'],
+    max_queued=app.config['JOB_QUEUE_LIMIT'],
+    initializer=jobWorker.init_worker,
+    initargs=(app.config['UPLOAD_FOLDER'], app.config['SHARED_CACHE_FOLDER'],
+              app.config['UPLOAD_CACHE_BYTES'], app.config['FFT_WORKERS'], encoding_settings(),
+              # Job processes split the cores between them
+              max(1, parallelBands.worker_count() // app.config['JOB_WORKERS'])),
+    on_finish=record_job,
+)
+
+def submit_job(client, image_key, feature, param):
+    """Queue a render for client, or finish it at once from the precomputed results."""
+    etag = adjustment_etag(image_key, feature, param)
+    # A newer position of the same slider on the same image replaces this one
+    slot = (image_key, feature)
+    encoded = precomputer.lookup(etag)
+    CACHE_LOOKUPS.inc(cache='precompute', result='miss' if encoded is None else 'hit')
+    if encoded is not None:
+        return job_queue.complete(client, etag, encoded, slot)
+    job = job_queue.submit(client, etag, (image_key, feature, param), slot)
+    JOB_EVENTS.inc(event='submitted')
+    return job
+
+def render_preview(image_key, cutoff_ratio):
+    """Low-resolution compression of an upload as a data: URI, or None if it is unknown."""
+    max_side = app.config['PREVIEW_MAX_SIDE']
+    workers = app.config['FFT_WORKERS']
+    entry = spectrum_cache.get(image_key)
+    if entry is not None:
+        spectrum, shape = entry
+        preview = reconstruct_preview(spectrum, shape, cutoff_ratio, max_side, workers)
+    else:
+        # Only a downsampled copy is transformed; the full transform happens in the job
+        image = upload_store.get(image_key)
+        if image is None:
+            return None
+        preview = preview_image(image, cutoff_ratio, max_side, workers)
+    with stage('encode'):
+        ok, buffer = cv2.imencode('.png', preview, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+    ENCODED_BYTES.inc(buffer.nbytes, format='png')
+    return 'data:image/png;base64,' + base64.b64encode(buffer).decode('ascii')
+
+def server_sent_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-    # Compute the 2D Fourier Transform
-    f_transform = np.fft.fft2(image)
-    f_shift = np.fft.fftshift(f_transform)
+def job_client():
+    """Who a job belongs to for queue limits: the page's cookie, else the address."""
+    return request.cookies.get('client_id') or request.remote_addr or 'anonymous'
 
-    # Create a circular mask based on cutoff_ratio
-    mask = np.zeros((rows, cols), dtype=np.uint8)
-    cutoff = int(cutoff_ratio * min(rows, cols))  # Determine cutoff frequency
-    cv2.circle(mask, (center_col, center_row), cutoff, 1, -1)
+def job_status(job):
+    info = job.to_dict()
+    if job.status == DONE:
+        info['result'] = url_for('job_result', job_id=job.id)
+    return info
 
-    # Apply the mask
-    f_shift_filtered = f_shift * mask
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    if app.config['PROFILE_FOLDER']:
+        g.profiler = SamplingProfiler(threading.get_ident(), app.config['PROFILE_INTERVAL_MS'] / 1000).start()
 
-    # Perform the inverse Fourier Transform
-    f_ishift = np.fft.ifftshift(f_shift_filtered)
-    compressed_image = np.fft.ifft2(f_ishift)
-    compressed_image = np.abs(compressed_image)
+@app.after_request
+def record_request(response):
+    REQUEST_SECONDS.observe(time.perf_counter() - g.request_start,
+                            endpoint=request.endpoint or 'unknown', status=response.status_code)
+    return response
 
-    # Normalize for visualization
-    compressed_image = cv2.normalize(compressed_image, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
-    return compressed_image
+@app.teardown_request
+def stop_request_profiler(exc):
+    # after_request is skipped when a view raises; teardown always runs, so the sampler never leaks
+    profiler = g.pop('profiler', None)
+    if profiler is not None and profiler.stop().samples:
+        profiler.write(profile_path(app.config['PROFILE_FOLDER'], f"{request.method}-{request.endpoint}"))
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
     if request.method == 'POST':
         file = request.files['image']
         if file:
-            # Save uploaded image
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], 'image_upload.png')
-            file.save(filepath)
-
-            # Load the image
-            image = cv2.imread(filepath, cv2.IMREAD_GRAYSCALE)
-            if image is None:
+            # Store the upload under the hash of its content
+            extension = os.path.splitext(file.filename or '')[1]
+            data = file.read()
+            UPLOAD_BYTES.inc(len(data))
+            image_key = upload_store.put(data, extension)
+            if image_key is None:
                 return "Error: Uploaded file is not a valid image.", 400
+            upload_store.evict()
+            remove_evicted_outputs()
 
-            # Save the original image for display
-            save_image(image, 'original_image.png')
-
-            # Process the image with default compression
-            compressed_image = compress_image(image, cutoff_ratio=0.1)
-            save_image(compressed_image, 'compressed_image.png')
+            # Render the other slider stops in the background, replacing any
+            # work still queued for this client's previous upload. The page
+            # asks /jobs for the default compression, so nothing is
+            # transformed while the upload request is open.
+            client = request.cookies.get('client_id') or uuid.uuid4().hex
+            schedule_precompute(client, image_key)
 
-            return render_template('results.html', filename='image_upload.png')
+            response = make_response(render_template('results.html', filename=upload_store.filename(image_key),
+                                                     image_key=image_key, cutoff_ratio=DEFAULT_CUTOFF_RATIO))
+            response.set_cookie('client_id', client, httponly=True, samesite='Lax')
+            return response
     return render_template('index.html')
 
-@app.route('/adjust', methods=['POST'])
+@app.route('/adjust', methods=['GET', 'POST'])
 def adjust():
-    """Handle dynamic adjustments for compression."""
-    data = request.json
-    filename = 'image_upload.png'
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    image = cv2.imread(filepath, cv2.IMREAD_GRAYSCALE)
+    """Handle dynamic adjustments for compression.
 
-    if image is None:
-        return jsonify({'error': 'Uploaded file not found or invalid.'}), 400
+    GET requests (and POSTs with "inline": true) get the encoded image back
+    directly, with a strong ETag so repeated slider positions are served
+    from the browser or proxy cache. Plain POSTs keep the old contract of
+    writing the result to outputs/ and returning its filename.
+    """
+    data = request.args if request.method == 'GET' else request.json
+    inline = request.method == 'GET' or bool(data.get('inline'))
+    image_key = data.get('image')
 
     feature = data['feature']
     param = float(data['param'])  # Treat param as the cutoff ratio
-    result = None
+    if feature != 'compression':
+        return jsonify({'error': f'Unknown feature: {feature}'}), 400
+
+    etag = None
+    if inline:
+        # Content-addressed keys never change meaning, so answer
+        # revalidations before doing any work
+        etag = adjustment_etag(image_key, feature, param)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+
+        # Most slider stops have already been rendered in the background
+        encoded = precomputer.lookup(etag)
+        CACHE_LOOKUPS.inc(cache='precompute', result='miss' if encoded is None else 'hit')
+        if encoded is None:
+            encoded = render_compression(image_key, param)
+            if encoded is None:
+                return jsonify({'error': 'Uploaded file not found or invalid.'}), 400
+            precomputer.store(etag, encoded)
+
+        body, mimetype = encoded
+        response = Response(body, mimetype=mimetype)
+        response.set_etag(etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = app.config['ADJUST_MAX_AGE']
+        return response
 
-    if feature == 'compression':
-        # Perform compression based on cutoff_ratio
-        result = compress_image(image, cutoff_ratio=param)
+    entry = cached_spectrum(image_key)
+    if entry is None:
+        return jsonify({'error': 'Uploaded file not found or invalid.'}), 400
+
+    # Perform compression based on cutoff_ratio, reusing the forward transform
+    spectrum, shape = entry
+    result = reconstruct(spectrum, shape, param, app.config['FFT_WORKERS'])
 
-    # Save the result and return its filename
-    output_filename = f"{feature}_adjusted.png"
+    # Save the result and return its filename; it is removed with the upload
+    output_filename = adjusted_filename(image_key, feature)
     save_image(result, output_filename)
     return jsonify({'output': output_filename})
 
+@app.route('/jobs', methods=['POST'])
+def submit():
+    """Queue an adjustment and return its job id straight away.
+
+    Poll GET /jobs/<id> (with ?wait=seconds to long-poll) until the status
+    is done, then fetch the image from the returned result URL. Identical
+    requests share one job; a newer request for the same slider cancels the
+    client's older one if it has not started.
+    """
+    data = request.get_json(silent=True) or request.form
+    image_key = data.get('image')
+    feature = data.get('feature')
+    try:
+        param = float(data['param'])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'param must be a number'}), 400
+    if feature != 'compression':
+        return jsonify({'error': f'Unknown feature: {feature}'}), 400
+    if upload_store.filename(image_key) is None:
+        return jsonify({'error': 'Uploaded file not found or invalid.'}), 400
+
+    try:
+        job = submit_job(job_client(), image_key, feature, param)
+    except QueueFull as e:
+        JOB_EVENTS.inc(event='rejected')
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '1'
+        return response, 429
+    response = jsonify(job_status(job))
+    response.headers['Location'] = url_for('job', job_id=job.id)
+    return response, 202
+
+@app.route('/jobs/<job_id>', methods=['GET', 'DELETE'])
+def job(job_id):
+    """Status of a job; ?wait=seconds holds the request until it finishes. DELETE cancels."""
+    if request.method == 'DELETE':
+        found = job_queue.cancel(job_id, job_client())
+    else:
+        wait = min(request.args.get('wait', 0, type=float), app.config['JOB_MAX_WAIT'])
+        found = job_queue.wait(job_id, wait) if wait > 0 else job_queue.get(job_id)
+    if found is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    return jsonify(job_status(found))
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """The encoded image of a finished job, cacheable like /adjust."""
+    found = job_queue.get(job_id)
+    if found is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    if found.status != DONE:
+        # Still queued or running: conflict; cancelled: gone; failed: error
+        status = {FAILED: 500, CANCELLED: 410}.get(found.status, 409)
+        return jsonify(job_status(found)), status
+    if request.if_none_match.contains(found.key):
+        response = Response(status=304)
+        response.set_etag(found.key)
+        return response
+    body, mimetype = found.result
+    response = Response(body, mimetype=mimetype)
+    response.set_etag(found.key)
+    response.cache_control.public = True
+    response.cache_control.max_age = app.config['ADJUST_MAX_AGE']
+    return response
+
+@app.route('/adjust/stream')
+def adjust_stream():
+    """Stream an adjustment as server-sent events: a quick preview, then the full result.
+
+    The full render is queued as a job first, then a reconstruction of at
+    most PREVIEW_MAX_SIDE pixels is made from a cropped spectrum and sent
+    as a "preview" event with an inline image. A "final" event with the
+    URL of the full image follows once the job is done; comment lines keep
+    the connection open meanwhile. Results that are already available skip
+    the preview.
+    """
+    image_key = request.args.get('image')
+    feature = request.args.get('feature')
+    param = request.args.get('param', type=float)
+    if feature != 'compression':
+        return jsonify({'error': f'Unknown feature: {feature}'}), 400
+    if param is None or upload_store.filename(image_key) is None:
+        return jsonify({'error': 'Uploaded file not found or invalid.'}), 400
+
+    try:
+        job = submit_job(job_client(), image_key, feature, param)
+    except QueueFull as e:
+        JOB_EVENTS.inc(event='rejected')
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '1'
+        return response, 429
+
+    def events():
+        if job.status != DONE:
+            preview = render_preview(image_key, param)
+            if preview is not None:
+                yield server_sent_event('preview', {'job': job.id, 'image': preview})
+        while True:
+            finished = job_queue.wait(job.id, 15)
+            if finished is None:
+                yield server_sent_event('error', {'job': job.id, 'error': 'Unknown or expired job'})
+                return
+            if finished.status == DONE:
+                yield server_sent_event('final', job_status(finished))
+                return
+            if finished.status in (FAILED, CANCELLED):
+                yield server_sent_event('error', job_status(finished))
+                return
+            yield ': waiting\n\n'
+
+    response = Response(stream_with_context(events()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop reverse proxies such as nginx from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/jobs/stats')
+def job_stats():
+    """Jobs by status in the process pool behind /jobs."""
+    return jsonify(job_queue.stats())
+
+@app.route('/metrics')
+def metrics():
+    """Stage latencies, request latencies and cache counters in Prometheus text format."""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+@app.route('/precompute/stats')
+def precompute_stats():
+    """Hit/miss counters of the speculative slider precomputation."""
+    return jsonify(precomputer.stats())
+
 @app.route('/outputs/<filename>')
 def output_file(filename):
     return send_from_directory(app.config['OUTPUT_FOLDER'], filename)
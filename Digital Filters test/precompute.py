@@ -0,0 +1,116 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+def result_size(result):
+    """Bytes held by a result: encoded bytes, an array, or a tuple of them"""
+    if isinstance(result, (tuple, list)):
+        return sum(result_size(part) for part in result)
+    if isinstance(result, (bytes, bytearray, memoryview)):
+        return len(result)
+    return getattr(result, 'nbytes', 0)
+
+
+class Precomputer:
+    """Speculatively compute encoded results for every slider stop.
+
+    After an upload, each stop is queued on a worker pool nearest-first from
+    the slider's current value, so the moves a user is most likely to make
+    next are ready first. Work is tracked per client: a newer upload from the
+    same client cancels whatever is still queued for the previous one.
+    Results are kept in an LRU under a byte budget, keyed by the caller's
+    result key. The stops of one image all need the same forward transform,
+    so compute should share it between concurrent calls (see
+    SpectrumCache.fetch) rather than run it once per worker.
+    """
+
+    def __init__(self, compute, max_workers=2, max_bytes=64 * 2**20):
+        self.compute = compute
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.completed = 0
+        self.cancelled = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='precompute')
+        self._results = OrderedDict()
+        self._bytes = 0
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def schedule(self, client, image_key, jobs, current):
+        """Queue (result_key, param) jobs on image_key for client, nearest to current first"""
+        self.cancel(client)
+        cancel_event = threading.Event()
+        ordered = sorted(jobs, key=lambda job: abs(job[1] - current))
+        futures = [
+            self._executor.submit(self._run, image_key, result_key, param, cancel_event)
+            for result_key, param in ordered
+        ]
+        with self._lock:
+            self._jobs[client] = (cancel_event, futures)
+
+    def cancel(self, client):
+        """Drop queued work for client; a stop already running finishes but is discarded"""
+        with self._lock:
+            job = self._jobs.pop(client, None)
+        if job is None:
+            return
+        cancel_event, futures = job
+        cancel_event.set()
+        for future in futures:
+            if future.cancel():
+                self.cancelled += 1
+
+    def lookup(self, result_key):
+        """Return a ready result, counting the hit or miss"""
+        with self._lock:
+            result = self._results.get(result_key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._results.move_to_end(result_key)
+            self.hits += 1
+            return result
+
+    def store(self, result_key, result):
+        """Keep a result computed elsewhere so later requests can reuse it"""
+        size = result_size(result)
+        with self._lock:
+            if result_key in self._results:
+                self._bytes -= result_size(self._results.pop(result_key))
+            if size > self.max_bytes:
+                return
+            self._results[result_key] = result
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._results.popitem(last=False)
+                self._bytes -= result_size(evicted)
+
+    def stats(self):
+        with self._lock:
+            pending = sum(
+                1 for _, futures in self._jobs.values() for future in futures if not future.done()
+            )
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'completed': self.completed,
+                'cancelled': self.cancelled,
+                'pending': pending,
+                'entries': len(self._results),
+                'bytes': self._bytes,
+            }
+
+    def _run(self, image_key, result_key, param, cancel_event):
+        if cancel_event.is_set():
+            return
+        with self._lock:
+            if result_key in self._results:
+                return
+        result = self.compute(image_key, param)
+        if result is None or cancel_event.is_set():
+            return
+        self.store(result_key, result)
+        with self._lock:
+            self.completed += 1
@@ -0,0 +1,69 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class SamplingProfiler:
+    """Statistical profiler for one thread, cheap enough to leave on per request.
+
+    A background thread wakes every interval seconds and records the target
+    thread's current Python stack. Native code (OpenCV, NumPy, the FFT) is
+    attributed to the Python line that called it, which is what is wanted
+    to tell stages apart. Results are written in the collapsed-stack format
+    read by flamegraph.pl, speedscope and similar viewers.
+    """
+
+    def __init__(self, thread_id=None, interval=0.002):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self
+
+    def collapsed(self):
+        """'outer;inner;leaf count' lines, most frequent first"""
+        return [f"{stack} {count}" for stack, count in self.samples.most_common()]
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            f.write('\n'.join(self.collapsed()) + '\n')
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def profile_path(folder, label):
+    """A unique .folded file name in folder for one profiled call"""
+    os.makedirs(folder, exist_ok=True)
+    safe = ''.join(char if char.isalnum() or char in '-_' else '_' for char in label)
+    return os.path.join(folder, f"{time.strftime('%Y%m%d-%H%M%S')}-{time.perf_counter_ns() % 10**9:09d}-{safe}.folded")
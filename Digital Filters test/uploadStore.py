@@ -0,0 +1,198 @@
+import glob
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+from xraydsp.imageDepth import decode_grayscale, load_grayscale
+from xraydsp.metrics import stage
+
+KEY_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+def content_key(data):
+    """Key an upload by the hash of its bytes"""
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def is_valid_key(key):
+    return isinstance(key, str) and KEY_PATTERN.match(key) is not None
+
+
+def write_atomically(path, write):
+    """Write through a temporary file so readers never see a partial file"""
+    folder = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+class UploadStore:
+    """Content-addressed store of uploaded images.
+
+    Uploads are saved as <hash><ext>, so identical uploads share one file and
+    concurrent users never overwrite each other. Decoded grayscale arrays,
+    kept at their native 8- or 16-bit depth, are held in an in-process LRU
+    under a byte budget. When shared_folder is set (e.g. a directory on
+    /dev/shm), decoded arrays are also written there as .npy files that every
+    worker process memory-maps instead of decoding its own copy. Entries
+    unused for max_age seconds are evicted from both tiers; get() refreshes
+    the files' mtimes, so on disk an image's age counts from its last use.
+    """
+
+    def __init__(self, folder, max_bytes=256 * 2**20, max_age=3600, shared_folder=None):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.shared_folder = shared_folder
+        self._entries = OrderedDict()
+        self._bytes = 0
+        # key -> wall time its files' mtimes were last refreshed by this process
+        self._touched = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(folder, exist_ok=True)
+        if shared_folder:
+            os.makedirs(shared_folder, exist_ok=True)
+
+    def put(self, data, extension='.png'):
+        """Store the uploaded bytes and return their key, or None if they are not an image"""
+        with stage('decode'):
+            image = decode_grayscale(data)
+        if image is None:
+            return None
+
+        key = content_key(data)
+        extension = extension.lower() if re.match(r'^\.[A-Za-z0-9]{1,5}$', extension or '') else '.png'
+        existing = self.filename(key)
+        if existing is None:
+            write_atomically(os.path.join(self.folder, key + extension), lambda f: f.write(data))
+
+        self._remember(key, image)
+        if self.shared_folder and not os.path.exists(self._shared_path(key)):
+            write_atomically(self._shared_path(key), lambda f: np.save(f, image))
+        # Re-uploading refreshes the age used for eviction
+        self._touch(key, force=True)
+        return key
+
+    def filename(self, key):
+        """Return the stored upload's filename for key, or None"""
+        if not is_valid_key(key):
+            return None
+        matches = glob.glob(os.path.join(self.folder, key + '.*'))
+        matches = [path for path in matches if not path.endswith('.tmp')]
+        return os.path.basename(matches[0]) if matches else None
+
+    def get(self, key):
+        """Return the decoded grayscale image for key, or None if it is unknown"""
+        if not is_valid_key(key):
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._entries[key] = (entry[0], time.monotonic())
+                image = entry[0]
+        if entry is not None:
+            self._touch(key)
+            return image
+
+        image = None
+        if self.shared_folder:
+            try:
+                image = np.load(self._shared_path(key), mmap_mode='r')
+            except (FileNotFoundError, ValueError):
+                image = None
+        if image is None:
+            filename = self.filename(key)
+            if filename is None:
+                return None
+            with stage('decode'):
+                image = load_grayscale(os.path.join(self.folder, filename))
+            if image is None:
+                return None
+
+        self._remember(key, image)
+        self._touch(key)
+        return image
+
+    def evict(self):
+        """Drop cached and stored entries older than max_age, then trim to the byte budget"""
+        now = time.monotonic()
+        with self._lock:
+            for key in [k for k, (_, used) in self._entries.items() if now - used > self.max_age]:
+                self._forget(key)
+            self._trim()
+
+        # On disk, age is measured from the last put() or get() in any process
+        cutoff = time.time() - self.max_age
+        removed = set()
+        folders = [self.folder] + ([self.shared_folder] if self.shared_folder else [])
+        for folder in folders:
+            for path in glob.glob(os.path.join(folder, '*')):
+                name, _ = os.path.splitext(os.path.basename(path))
+                if not is_valid_key(name):
+                    continue
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.unlink(path)
+                        removed.add(name)
+                except FileNotFoundError:
+                    pass
+        with self._lock:
+            # A decoded copy must not outlive its file, or get() would serve an evicted upload
+            for key in removed & set(self._entries):
+                self._forget(key)
+            self._touched = {key: touched for key, touched in self._touched.items() if touched >= cutoff}
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def _remember(self, key, image):
+        with self._lock:
+            if key in self._entries:
+                self._forget(key)
+            if image.nbytes > self.max_bytes:
+                return
+            self._entries[key] = (image, time.monotonic())
+            self._bytes += image.nbytes
+            self._trim()
+
+    def _touch(self, key, force=False):
+        """Refresh the mtimes of key's files, at most a few times per max_age unless forced"""
+        now = time.time()
+        with self._lock:
+            if not force and now - self._touched.get(key, 0) < self.max_age / 8:
+                return
+            self._touched[key] = now
+        filename = self.filename(key)
+        paths = [os.path.join(self.folder, filename)] if filename else []
+        if self.shared_folder:
+            paths.append(self._shared_path(key))
+        for path in paths:
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+
+    def _forget(self, key):
+        image, _ = self._entries.pop(key)
+        self._bytes -= image.nbytes
+
+    def _trim(self):
+        while self._bytes > self.max_bytes:
+            self._forget(next(iter(self._entries)))
+
+    def _shared_path(self, key):
+        return os.path.join(self.shared_folder, key + '.npy')
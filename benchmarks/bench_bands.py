@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from xraydsp import parallelBands
+from xraydsp.iirFilter import iir_filter_pair
+from xraydsp.medianFilter import median_filter
+
+B_LOW, A_LOW = [0.2, 0.2], [1.0, -0.8]
+B_HIGH, A_HIGH = [1.0, -1.0], [1.0, -0.5]
+
+
+def best_time(fn, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def cases(image):
+    normalized = image.astype(np.float32) / 4095
+    return {
+        'median 15 (threads)': lambda workers: median_filter(image, 15, workers=workers),
+        'median 15 (processes)': lambda workers: parallelBands.filter_bands(
+            'median', image, workers=workers, processes=True, filter_strength=15),
+        'iir pair (threads)': lambda workers: iir_filter_pair(normalized, B_LOW, A_LOW, B_HIGH, A_HIGH,
+                                                              workers=workers),
+        'sobel (threads)': lambda workers: parallelBands.filter_bands('sobel', image, workers=workers),
+    }
+
+
+def main(size=4096, repeats=3):
+    cores = parallelBands.configure()
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 4096, (size, size)).astype(np.uint16)
+    counts = sorted({1, 2, 4, cores} & set(range(1, cores + 1)))
+    print(f"{size}x{size} uint16 on {cores} cores; OpenCV single-threaded inside bands")
+    print(f"{'kernel':<24}" + "".join(f"{f'{n} workers':>12}" for n in counts) + f"{'speedup':>9}")
+    for name, run in cases(image).items():
+        # The first call starts the pools
+        run(counts[-1])
+        seconds = [best_time(lambda: run(n), repeats) for n in counts]
+        print(f"{name:<24}" + "".join(f"{s * 1e3:>10.0f}ms" for s in seconds) + f"{seconds[0] / seconds[-1]:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from xraydsp.bilateralFIlter import bilateral_filter, bilateral_grid, colour_sigma, uses_grid
+
+
+def detector_image(size, bits, rng):
+    """Soft-tissue-like gradients with a sharp bone edge and detector noise"""
+    y, x = np.mgrid[:size, :size] / size
+    full = 2 ** bits - 1
+    image = full * (0.35 + 0.2 * np.sin(5 * x) * np.cos(3 * y) + 0.3 * ((x - 0.5) ** 2 + (y - 0.5) ** 2 < 0.1))
+    image += rng.normal(0, full * 0.03, (size, size))
+    return np.clip(image, 0, full).astype(np.uint8 if bits == 8 else np.uint16)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main(size=1024, windows=(9, 15, 31, 61), qualities=(1, 2, 4)):
+    rng = np.random.default_rng(0)
+    print("Error of the bilateral grid in 8-bit grey levels against cv2.bilateralFilter")
+    print(f"{'depth':>5} {'d':>4} {'exact':>9} {'quality':>8} {'approx':>9} {'speedup':>8} "
+          f"{'mean err':>9} {'p99 err':>8} {'max err':>8} {'used':>6}")
+    for bits in (8, 12, 16):
+        image = detector_image(size, bits, rng)
+        to_8bit = 255.0 / (2 ** bits - 1)
+        for window in windows:
+            exact, exact_seconds = timed(lambda: bilateral_filter(image, window))
+            for quality in qualities:
+                # The grid itself, whether or not bilateral_filter would pick it for this window
+                approximate, seconds = timed(lambda: bilateral_grid(image, window, colour_sigma(image), quality))
+                approximate = np.clip(np.rint(approximate), 0, 2 ** bits - 1)
+                error = np.abs(approximate - exact) * to_8bit
+                used = 'grid' if uses_grid(image, window) else 'exact'
+                print(f"{bits:>5} {window:>4} {exact_seconds * 1e3:>7.0f}ms {quality:>8} {seconds * 1e3:>7.0f}ms "
+                      f"{exact_seconds / seconds:>7.1f}x {error.mean():>9.2f} {np.percentile(error, 99):>8.2f} "
+                      f"{error.max():>8.1f} {used:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from xraydsp.edgePyramid import EdgePyramid
+from xraydsp.laplacianFilter import laplacian_filter
+from xraydsp.sobelFilter import sobel_filter
+
+# Full-resolution Sobel apertures that see edges at roughly the scale of each pyramid level
+KSIZES = (3, 7, 11, 15)
+
+
+def best_time(fn, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def separate_calls(image):
+    """Magnitude and Laplacian at every scale by raising the ksize, one call each"""
+    # Large apertures overflow the sample type when cast back; only the cost matters here
+    with np.errstate(invalid='ignore', over='ignore'):
+        for ksize in KSIZES:
+            sobel_filter(image, ksize)
+            laplacian_filter(image, ksize)
+
+
+def pyramid_maps(pyramid, image):
+    """Every map at every level from one pyramid, plus full-resolution magnitudes"""
+    pyramid.update(image)
+    for level in range(pyramid.levels):
+        pyramid.full_resolution('magnitude', level)
+
+
+def main(sizes=(512, 1024, 2048, 4096), repeats=3):
+    rng = np.random.default_rng(0)
+    print(f"{'size':>6} {'dtype':>7} {'separate':>10} {'pyramid':>10} {'reused':>10} {'speedup':>8}")
+    for size in sizes:
+        for dtype, full in ((np.uint8, 255), (np.uint16, 4095)):
+            image = cv2.GaussianBlur(rng.integers(0, full + 1, (size, size)).astype(dtype), (0, 0), 2)
+            separate = best_time(lambda: separate_calls(image), repeats)
+            # A new pyramid allocates its buffers; a reused one only refills them
+            fresh = best_time(lambda: pyramid_maps(EdgePyramid(levels=len(KSIZES)), image), repeats)
+            pyramid = EdgePyramid(levels=len(KSIZES))
+            reused = best_time(lambda: pyramid_maps(pyramid, image), repeats)
+            print(f"{size:>6} {np.dtype(dtype).name:>7} {separate * 1e3:>8.1f}ms {fresh * 1e3:>8.1f}ms "
+                  f"{reused * 1e3:>8.1f}ms {separate / reused:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
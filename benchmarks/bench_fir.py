@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from xraydsp.firFilter import METHODS, plan_fir, run_plan
+
+
+def gaussian(rows, cols, sigma):
+    return cv2.getGaussianKernel(rows, sigma) @ cv2.getGaussianKernel(cols, sigma).T
+
+
+def kernels(rng):
+    """Kernels of every kind the planner distinguishes"""
+    disk = (np.hypot(*np.mgrid[-20:21, -20:21]) <= 20).astype(np.float64)
+    return {
+        'gaussian 3x3': np.array([[1, 2, 1], [2, 4, 2], [1, 2, 1]], dtype=np.float64),
+        'box 5x5': np.ones((5, 5)),
+        'gaussian 15x15': gaussian(15, 15, 3),
+        'gaussian 31x21': gaussian(31, 21, 5),
+        'rank 2 9x9': gaussian(9, 9, 2) + 0.5 * cv2.getGaussianKernel(9, 1) @ cv2.getGaussianKernel(9, 4).T,
+        'random 25x25': rng.random((25, 25)),
+        'disk 41x41': disk,
+        'disk 81x81': (np.hypot(*np.mgrid[-40:41, -40:41]) <= 40).astype(np.float64),
+    }
+
+
+def best_time(fn, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(size=2048, repeats=3):
+    rng = np.random.default_rng(0)
+    images = {
+        'uint8': rng.integers(0, 256, (size, size)).astype(np.uint8),
+        'uint16': rng.integers(0, 4096, (size, size)).astype(np.uint16),
+        'float32': rng.random((size, size), dtype=np.float32),
+    }
+    print(f"{'kernel':<16} {'dtype':<8} {'filter2D':>9} " + ' '.join(f"{m:>10}" for m in METHODS)
+          + f" {'chosen':>10} {'speedup':>8} {'max err':>9}")
+    for name, kernel in kernels(rng).items():
+        kernel = (kernel / kernel.sum()).astype(np.float32)
+        for dtype, image in images.items():
+            reference = cv2.filter2D(image, -1, kernel)
+            baseline = best_time(lambda: cv2.filter2D(image, -1, kernel), repeats)
+            plan = plan_fir(kernel, image.dtype)
+
+            timings = []
+            for method in METHODS:
+                forced = plan_fir(kernel, image.dtype, method) if method != 'separable' or plan.terms else None
+                if forced is None:
+                    timings.append(float('nan'))
+                    continue
+                timings.append(best_time(lambda: run_plan(image, kernel, forced), repeats))
+
+            error = np.abs(run_plan(image, kernel, plan).astype(np.float64) - reference).max()
+            chosen = timings[METHODS.index(plan.method)]
+            print(f"{name:<16} {dtype:<8} {baseline * 1e3:>7.1f}ms "
+                  + ' '.join(f"{seconds * 1e3:>8.1f}ms" for seconds in timings)
+                  + f" {plan.method:>10} {baseline / chosen:>7.1f}x {error:>9.2e}")
+            print(f"    {plan.reason}")
+
+
+if __name__ == "__main__":
+    main()
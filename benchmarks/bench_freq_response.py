@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from scipy.signal import freqz
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from responsePlot import FrequencyResponsePlot
+
+
+def slider_ticks(count):
+    """Coefficients for a drag of the Low A1 slider from 0.80 down to 0.30"""
+    for low_a1 in np.linspace(0.8, 0.3, count):
+        yield [0.2, 0.2], [1.0, -low_a1], [1.0, -1.0], [1.0, -0.5]
+
+
+def legacy_redraw(fig, ax1, ax2, b_low, a_low, b_high, a_high):
+    """The original clear-and-redraw plot_frequency_response"""
+    ax1.clear()
+    ax2.clear()
+    w_low, h_low = freqz(b_low, a_low)
+    w_high, h_high = freqz(b_high, a_high)
+    with np.errstate(divide='ignore'):
+        ax1.set_title('Low-pass Filter Frequency Response')
+        ax1.plot(w_low, 20 * np.log10(np.abs(h_low)), 'b')
+        ax1.set_ylabel('Magnitude [dB]')
+        ax1.set_xlabel('Frequency [rad/sample]')
+        ax1.grid(True)
+        ax2.set_title('High-pass Filter Frequency Response')
+        ax2.plot(w_high, 20 * np.log10(np.abs(h_high)), 'r')
+        ax2.set_ylabel('Magnitude [dB]')
+        ax2.set_xlabel('Frequency [rad/sample]')
+        ax2.grid(True)
+    fig.tight_layout()
+    fig.canvas.draw()
+
+
+def time_ticks(update, count):
+    latencies = []
+    for coefficients in slider_ticks(count):
+        start = time.perf_counter()
+        update(*coefficients)
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1000
+
+
+def main(count=100):
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 6))
+    legacy = time_ticks(lambda *c: legacy_redraw(fig, ax1, ax2, *c), count)
+    plt.close(fig)
+
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 6))
+    plot = FrequencyResponsePlot(fig, ax1, ax2, fig.canvas)
+    fig.canvas.draw()
+    incremental = time_ticks(plot.update, count)
+
+    # The closed-form response must agree with freqz
+    b_low, a_low, b_high, a_high = next(slider_ticks(1))
+    plot.update(b_low, a_low, b_high, a_high)
+    _, h_low = freqz(b_low, a_low)
+    error = np.abs(plot.lines[0].get_ydata() - 20 * np.log10(np.abs(h_low))).max()
+    plt.close(fig)
+
+    print(f"{'mode':>12} {'median ms':>10} {'p95 ms':>8}")
+    for name, latencies in (('legacy', legacy), ('incremental', incremental)):
+        print(f"{name:>12} {np.median(latencies):>10.2f} {np.percentile(latencies, 95):>8.2f}")
+    print(f"speedup {np.median(legacy) / np.median(incremental):.1f}x, max |dB error| vs freqz {error:.2e}")
+
+
+if __name__ == "__main__":
+    main()
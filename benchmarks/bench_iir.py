@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+import numpy as np
+from scipy.signal import lfilter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from xraydsp.iirFilter import StripIIRPair, filter_strips, iir_filter_pair
+
+B_LOW, A_LOW = [0.2, 0.2], [1.0, -0.8]
+B_HIGH, A_HIGH = [1.0, -1.0], [1.0, -0.5]
+# Rows per strip delivered by a line-scan detector
+STRIP_ROWS = 64
+
+
+def legacy_iir_filter(image, b, a):
+    """The original per-row/per-column apply_along_axis implementation"""
+    filtered_rows = np.apply_along_axis(lambda row: lfilter(b, a, row), axis=1, arr=image)
+    return np.apply_along_axis(lambda col: lfilter(b, a, col), axis=0, arr=filtered_rows)
+
+
+def legacy_enhance(image):
+    return legacy_iir_filter(image, B_LOW, A_LOW) + legacy_iir_filter(image, B_HIGH, A_HIGH)
+
+
+def strip_enhance(image):
+    strips = (image[start:start + STRIP_ROWS] for start in range(0, image.shape[0], STRIP_ROWS))
+    return np.concatenate(list(filter_strips(strips, StripIIRPair(B_LOW, A_LOW, B_HIGH, A_HIGH))))
+
+
+def best_time(fn, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(sizes=(256, 512, 1024, 2048, 4096), repeats=3):
+    rng = np.random.default_rng(0)
+    print(f"{'size':>6} {'legacy':>10} {'separate':>10} {'fused':>10} {'strips':>10} {'speedup':>8} {'max err':>10} {'strips exact':>13}")
+    for size in sizes:
+        image = rng.integers(0, 256, (size, size)).astype(np.uint8) / 255.0
+
+        reference = legacy_enhance(image)
+        fused = iir_filter_pair(image, B_LOW, A_LOW, B_HIGH, A_HIGH)
+        error = np.abs(fused - reference).max()
+        exact = np.array_equal(strip_enhance(image), fused)
+
+        legacy = best_time(lambda: legacy_enhance(image), 1)
+        separate = best_time(lambda: iir_filter_pair(image, B_LOW, A_LOW, B_HIGH, A_HIGH, fuse=False), repeats)
+        combined = best_time(lambda: iir_filter_pair(image, B_LOW, A_LOW, B_HIGH, A_HIGH), repeats)
+        strips = best_time(lambda: strip_enhance(image), repeats)
+
+        print(f"{size:>6} {legacy:>9.3f}s {separate:>9.3f}s {combined:>9.3f}s {strips:>9.3f}s "
+              f"{legacy / min(separate, combined):>7.1f}x {error:>10.2e} {str(exact):>13}")
+
+
+if __name__ == "__main__":
+    main()
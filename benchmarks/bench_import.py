@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+SERVICE_DIR = os.path.join(ROOT, 'Digital Filters test')
+
+# Cold-start targets in seconds, measured inside a fresh interpreter. The
+# package must cost next to nothing, and a job worker no more than numpy
+# and OpenCV, which every filter needs anyway.
+TARGETS = {
+    'import xraydsp': 0.02,
+    'import jobWorker': 0.25,
+}
+
+# (label, statements timed in a fresh interpreter). Nothing is cached between
+# runs other than the OS page cache, which warms on the first of the repeats.
+CASES = [
+    ('import xraydsp', "import xraydsp"),
+    ('xraydsp.compute_spectrum', "import xraydsp; xraydsp.compute_spectrum"),
+    ('import jobWorker', "import jobWorker"),
+    ('first enhance() call', "import numpy, xraydsp; xraydsp.enhance(numpy.zeros((64, 64), numpy.uint8))"),
+    ('import scipy.signal', "import scipy.signal"),
+    ('import Tk app', "import xrayImageIIRFilter"),
+]
+
+
+def cold_seconds(statements, repeats):
+    """Best time of statements over repeats fresh interpreters, or None if they fail"""
+    code = f"import time; start = time.perf_counter(); {statements}; print(time.perf_counter() - start)"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, SERVICE_DIR]))
+    best = None
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=ROOT, env=env)
+        if result.returncode:
+            return None
+        seconds = float(result.stdout.split()[-1])
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def main(repeats=5):
+    print(f"{'cold start':<28} {'time':>9} {'target':>9}")
+    failed = False
+    for label, statements in CASES:
+        seconds = cold_seconds(statements, repeats)
+        target = TARGETS.get(label)
+        if seconds is None:
+            print(f"{label:<28} {'n/a':>9}")
+            continue
+        verdict = ''
+        if target is not None:
+            verdict = 'ok' if seconds <= target else 'over'
+            failed |= seconds > target
+        print(f"{label:<28} {seconds * 1e3:>7.1f}ms "
+              f"{'' if target is None else f'{target * 1e3:.0f}ms':>9} {verdict}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
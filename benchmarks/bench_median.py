@@ -0,0 +1,48 @@
+import os
+import sys
+import time
+import numpy as np
+from scipy.ndimage import median_filter as ndimage_median
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from xraydsp.medianFilter import median_filter
+
+
+def detector_image(size, bits, rng):
+    """Smooth anatomy-like gradients plus salt-and-pepper noise at the given depth"""
+    y, x = np.mgrid[:size, :size] / size
+    full = 2 ** bits - 1
+    image = full * (0.5 + 0.3 * np.sin(6 * x) * np.cos(4 * y)) + rng.normal(0, full * 0.02, (size, size))
+    noise = rng.random((size, size))
+    image[noise < 0.01] = 0
+    image[noise > 0.99] = full
+    return np.clip(image, 0, full).astype(np.uint8 if bits == 8 else np.uint16)
+
+
+def best_time(fn, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(size=2048, windows=(3, 5, 7, 11, 15, 21, 31, 51, 75, 101), repeats=3, reference_limit=15):
+    rng = np.random.default_rng(0)
+    print(f"{'depth':>6} {'window':>7} {'ns/px':>8} {'scipy ns/px':>12} {'exact':>6}")
+    for bits in (8, 12, 16):
+        image = detector_image(size, bits, rng)
+        for window in windows:
+            seconds = best_time(lambda: median_filter(image, window), repeats)
+            reference, exact = '', ''
+            # ndimage's cost grows with the window; only time it where it finishes
+            if window <= reference_limit:
+                expected = ndimage_median(image, size=window, mode='nearest')
+                reference = f"{best_time(lambda: ndimage_median(image, size=window, mode='nearest'), 1) / image.size * 1e9:.1f}"
+                exact = str(np.array_equal(median_filter(image, window), expected))
+            print(f"{bits:>6} {window:>7} {seconds / image.size * 1e9:>8.1f} {reference:>12} {exact:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""Headless benchmark suite for every filter, the IIR enhancement and /adjust.
+
+    python benchmarks/bench_suite.py run -o results.json
+    python benchmarks/bench_suite.py run --sizes 256 1024 --only median sobel adjust
+    python benchmarks/bench_suite.py compare baseline.json results.json --threshold 0.15
+
+Every case runs on synthetic 8-bit and 12-bit-in-uint16 radiographs. Each
+result records the best and median wall time, the peak memory NumPy and
+Python allocated (tracemalloc), the peak resident set growth (Linux, which
+also covers OpenCV's internal buffers) and the minor page faults, i.e. the
+fresh pages the call had to allocate and touch.
+"""
+import argparse
+import atexit
+import gc
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+import cv2
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+# The Flask service, driven by the /adjust cases, lives apart from the package
+SERVICE_DIR = os.path.join(ROOT, 'Digital Filters test')
+sys.path[:0] = [ROOT, SERVICE_DIR]
+from xraydsp.filterRegistry import apply_filter
+from xraydsp.iirFilter import iir_filter_2d, iir_filter_pair
+from xraydsp.imageDepth import to_float32
+from xraydsp.spectrumCache import compress as compress_image
+
+SIZES = (256, 512, 1024, 2048, 4096, 8192)
+DTYPES = ('uint8', 'uint16')
+B_LOW, A_LOW = [0.2, 0.2], [1.0, -0.8]
+B_HIGH, A_HIGH = [1.0, -1.0], [1.0, -0.5]
+
+FILTER_PARAMS = {
+    'median': [{'filter_strength': k} for k in (3, 5, 7, 11)],
+    'bilateral': [{'filter_strength': d} for d in (5, 9)],
+    'sobel': [{'filter_strength': k} for k in (1, 3, 5, 7)],
+    'laplacian': [{'filter_strength': k} for k in (1, 3, 7)],
+    'fir': [{'kernel': np.ones((k, k)).tolist()} for k in (3, 5, 7, 15)],
+    'noise_reduction': [{'kernel_size': k} for k in (3, 7, 15, 31)],
+    'high_pass': [{'filter_strength': s} for s in (3, 11, 25)],
+    'features': [{'kernel_size': k} for k in (1, 3, 5)],
+    'compression': [{'cutoff_ratio': r} for r in (0.05, 0.1, 0.5)],
+}
+
+# group is what --only selects; make(image) returns the callable that is timed
+Case = namedtuple('Case', ['group', 'label', 'make'])
+
+
+def describe(params):
+    parts = []
+    for key, value in params.items():
+        if key == 'kernel':
+            value = 'x'.join(str(n) for n in np.shape(value))
+        parts.append(f"{key}={value}")
+    return ','.join(parts)
+
+
+def synthetic_image(size, dtype, seed=0):
+    """A smooth body-like phantom with bright 'bones' and detector noise"""
+    rng = np.random.default_rng(seed)
+    y, x = np.ogrid[0:size, 0:size]
+    y = y.astype(np.float32) / size
+    x = x.astype(np.float32) / size
+    image = 0.25 + 0.45 * np.exp(-((x - 0.5) ** 2 / 0.05 + (y - 0.5) ** 2 / 0.2))
+    image = np.broadcast_to(image, (size, size)).copy()
+    for center in (0.35, 0.65):
+        bone = (np.abs(x - center) < 0.04) & (np.abs(y - 0.5) < 0.4)
+        image[bone] += 0.25
+    image += rng.normal(0, 0.02, (size, size)).astype(np.float32)
+    np.clip(image, 0, 1, out=image)
+    # uint16 images carry 12-bit detector data, as most flat panels deliver
+    scale = 255 if dtype == 'uint8' else 4095
+    image *= scale
+    return image.astype(dtype)
+
+
+def filter_cases():
+    for name, param_sets in FILTER_PARAMS.items():
+        for params in param_sets:
+            yield Case(name, f"filter/{name}/{describe(params)}",
+                       lambda image, name=name, params=params: lambda: apply_filter(name, image, **params))
+
+
+def iir_cases():
+    def single(image):
+        normalized = to_float32(image)
+        return lambda: iir_filter_2d(normalized, B_LOW, A_LOW)
+
+    def pair(image):
+        normalized = to_float32(image)
+        return lambda: iir_filter_pair(normalized, B_LOW, A_LOW, B_HIGH, A_HIGH)
+
+    yield Case('iir', 'iir/single', single)
+    yield Case('iir', 'iir/pair', pair)
+
+
+class AdjustClient:
+    """The Flask app's /adjust path driven through its test client"""
+
+    def __init__(self):
+        # main.py creates uploads/ and outputs/ in the working directory
+        self.workdir = tempfile.mkdtemp(prefix='bench_adjust_')
+        atexit.register(shutil.rmtree, self.workdir, ignore_errors=True)
+        previous = os.getcwd()
+        os.chdir(self.workdir)
+        try:
+            import main
+        finally:
+            os.chdir(previous)
+        main.app.config['UPLOAD_FOLDER'] = os.path.join(self.workdir, 'uploads')
+        main.app.config['OUTPUT_FOLDER'] = os.path.join(self.workdir, 'outputs')
+        main.upload_store.folder = main.app.config['UPLOAD_FOLDER']
+        self.main = main
+        self.client = main.app.test_client()
+        self.requests = 0
+
+    def upload(self, image):
+        ok, buffer = cv2.imencode('.png', image)
+        key = self.main.upload_store.put(buffer.tobytes(), '.png')
+        self.main.cached_spectrum(key)
+        return key
+
+    def get(self, key, param, headers=None):
+        response = self.client.get('/adjust', query_string={'feature': 'compression', 'param': param, 'image': key},
+                                   headers=headers)
+        if response.status_code not in (200, 304):
+            raise RuntimeError(f"/adjust returned {response.status_code}")
+        return response
+
+
+_adjust_client = None
+
+
+def adjust_cases():
+    def client():
+        global _adjust_client
+        if _adjust_client is None:
+            _adjust_client = AdjustClient()
+        return _adjust_client
+
+    def slider(image):
+        # A new slider position: the spectrum is cached, the rendering is not
+        adjust, key = client(), client().upload(image)
+
+        def run():
+            adjust.requests += 1
+            adjust.get(key, 0.1 + adjust.requests * 1e-9)
+        return run
+
+    def cached(image):
+        adjust, key = client(), client().upload(image)
+        adjust.get(key, 0.1)
+        return lambda: adjust.get(key, 0.1)
+
+    def revalidate(image):
+        adjust, key = client(), client().upload(image)
+        etag = adjust.get(key, 0.1).headers['ETag']
+        return lambda: adjust.get(key, 0.1, headers={'If-None-Match': etag})
+
+    def compress(image):
+        # The uncached path: forward transform plus reconstruction
+        workers = client().main.app.config['FFT_WORKERS']
+        return lambda: compress_image(image, 0.1, workers)
+
+    yield Case('adjust', 'adjust/slider', slider)
+    yield Case('adjust', 'adjust/cached', cached)
+    yield Case('adjust', 'adjust/revalidate', revalidate)
+    yield Case('adjust', 'adjust/compress_image', compress)
+
+
+def all_cases():
+    yield from filter_cases()
+    yield from iir_cases()
+    yield from adjust_cases()
+
+
+def reset_peak_rss():
+    """Reset the kernel's high-water mark; returns False where that is unsupported"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def rss_status():
+    """(current, peak) resident set size in bytes from /proc/self/status"""
+    values = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('VmRSS', 'VmHWM'):
+                values[key] = int(value.split()[0]) * 1024
+    return values['VmRSS'], values['VmHWM']
+
+
+def measure(run, min_time=0.5, max_repeats=5):
+    """Time run() until min_time has elapsed (at most max_repeats), then profile one call"""
+    run()  # warm-up: imports, caches, lazily built kernels
+    times = []
+    while len(times) < max_repeats and (not times or sum(times) < min_time):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracks_rss = reset_peak_rss()
+    before = rss_status()[0] if tracks_rss else None
+    faults = resource.getrusage(resource.RUSAGE_SELF).ru_minflt
+    run()
+    faults = resource.getrusage(resource.RUSAGE_SELF).ru_minflt - faults
+    peak_rss = rss_status()[1] - before if tracks_rss else None
+
+    gc.collect()
+    tracemalloc.start()
+    run()
+    _, peak_traced = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'seconds': min(times),
+        'median_seconds': statistics.median(times),
+        'repeats': len(times),
+        'peak_traced_bytes': peak_traced,
+        'peak_rss_bytes': peak_rss,
+        'page_faults': faults,
+    }
+
+
+def run_suite(sizes=SIZES, dtypes=DTYPES, only=None, budget=30.0, min_time=0.5, log=sys.stderr):
+    """Run every selected case at every size and dtype, returning the results document"""
+    cases = [case for case in all_cases() if not only or case.group in only]
+    results = {}
+    # Cases slower than budget at one size are not run at larger sizes
+    over_budget = set()
+    for dtype in dtypes:
+        for size in sorted(sizes):
+            image = synthetic_image(size, dtype)
+            for case in cases:
+                key = f"{case.label}/{dtype}/{size}"
+                if (case.label, dtype) in over_budget:
+                    continue
+                try:
+                    result = measure(case.make(image), min_time=min_time)
+                except Exception as e:
+                    print(f"{key:<60} error: {e}", file=log)
+                    continue
+                results[key] = result
+                print(f"{key:<60} {result['seconds'] * 1e3:>10.2f} ms "
+                      f"{result['peak_traced_bytes'] / 2**20:>9.1f} MiB", file=log)
+                if result['seconds'] > budget:
+                    over_budget.add((case.label, dtype))
+            del image
+            gc.collect()
+
+    return {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'opencv': cv2.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+            'opencv_threads': cv2.getNumThreads(),
+        },
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold=0.1, min_seconds=0.001, out=sys.stdout):
+    """Print per-case ratios and return the keys that slowed down by more than threshold"""
+    regressions = []
+    shared = sorted(set(baseline['results']) & set(current['results']))
+    print(f"{'case':<60} {'baseline':>11} {'current':>11} {'ratio':>7}", file=out)
+    for key in shared:
+        before = baseline['results'][key]['seconds']
+        after = current['results'][key]['seconds']
+        ratio = after / before if before else float('inf')
+        # Sub-millisecond cases are dominated by timer and scheduler noise
+        slower = ratio > 1 + threshold and after >= min_seconds
+        flag = '  SLOWER' if slower else ''
+        print(f"{key:<60} {before * 1e3:>9.2f}ms {after * 1e3:>9.2f}ms {ratio:>6.2f}x{flag}", file=out)
+        if slower:
+            regressions.append(key)
+
+    missing = sorted(set(baseline['results']) - set(current['results']))
+    if missing:
+        print(f"{len(missing)} baseline cases were not run", file=out)
+    print(f"{len(regressions)} of {len(shared)} cases slower by more than {threshold:.0%}", file=out)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the filters, the IIR enhancement and /adjust.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="run the suite and write a results file")
+    run_parser.add_argument('-o', '--output', default='bench_results.json', help="results JSON file")
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES), help="square image sizes")
+    run_parser.add_argument('--dtypes', nargs='+', default=list(DTYPES), choices=DTYPES)
+    run_parser.add_argument('--only', nargs='+', help="case groups: filter names, iir or adjust")
+    run_parser.add_argument('--budget', type=float, default=30.0,
+                            help="skip larger sizes of a case once one call takes longer (seconds)")
+    run_parser.add_argument('--min-time', type=float, default=0.5, help="timed seconds per case")
+    run_parser.add_argument('--compare', metavar='BASELINE', help="compare against a baseline when done")
+    run_parser.add_argument('--threshold', type=float, default=0.1, help="allowed slowdown, e.g. 0.1 for 10%%")
+
+    compare_parser = commands.add_parser('compare', help="compare two results files")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.1, help="allowed slowdown, e.g. 0.1 for 10%%")
+    compare_parser.add_argument('--min-seconds', type=float, default=0.001,
+                                help="ignore slowdowns of cases faster than this")
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        document = run_suite(args.sizes, args.dtypes, args.only, args.budget, args.min_time)
+        with open(args.output, 'w') as f:
+            json.dump(document, f, indent=1, sort_keys=True)
+        print(f"Wrote {len(document['results'])} results to {args.output}", file=sys.stderr)
+        if not args.compare:
+            return 0
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        return 1 if compare(baseline, document, args.threshold) else 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    return 1 if compare(baseline, current, args.threshold, args.min_seconds) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import threading
+
+
+class Superseded(Exception):
+    """Raised by a render that gave up part-way because a newer request arrived"""
+
+
+class RenderScheduler:
+    """Run renders on a worker thread, keeping only the newest request.
+
+    submit() never blocks the Tk main thread: it replaces whatever request is
+    still waiting, so a burst of slider events collapses into a single render
+    of the latest state. Finished frames are handed back to Tk from an after()
+    poll loop, and frames older than the one already on screen are dropped.
+
+    render is called as render(params, generation). A long render may check
+    is_stale(generation) between its stages and raise Superseded to abandon
+    work whose result would never be shown.
+    """
+
+    def __init__(self, master, render, display, poll_ms=16):
+        self.master = master
+        self.render = render
+        self.display = display
+        self.poll_ms = poll_ms
+
+        self._condition = threading.Condition()
+        self._pending = None
+        self._finished = None
+        self._generation = 0
+        self._displayed = 0
+        self._closed = False
+
+        self._worker = threading.Thread(target=self._run, name="render-worker", daemon=True)
+        self._worker.start()
+        self._poll_id = self.master.after(self.poll_ms, self._poll)
+
+    def submit(self, params):
+        """Queue a render of params, replacing any request not yet started"""
+        with self._condition:
+            self._generation += 1
+            self._pending = (self._generation, params)
+            self._condition.notify()
+        return self._generation
+
+    def is_stale(self, generation):
+        """Return True once a newer request has been submitted or the scheduler closed"""
+        return self._closed or generation != self._generation
+
+    def close(self):
+        """Stop the worker and the poll loop"""
+        with self._condition:
+            self._closed = True
+            self._pending = None
+            self._condition.notify()
+        if self._poll_id is not None:
+            self.master.after_cancel(self._poll_id)
+            self._poll_id = None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                generation, params = self._pending
+                self._pending = None
+
+            try:
+                frame = self.render(params, generation)
+            except Superseded:
+                continue
+            except Exception as e:
+                frame = e
+
+            with self._condition:
+                # A newer frame may already be waiting if renders overlap a poll
+                if self._finished is None or self._finished[0] < generation:
+                    self._finished = (generation, params, frame)
+
+    def _poll(self):
+        with self._condition:
+            finished = self._finished
+            self._finished = None
+
+        if finished is not None and finished[0] > self._displayed:
+            generation, params, frame = finished
+            self._displayed = generation
+            self.display(params, frame)
+
+        if not self._closed:
+            self._poll_id = self.master.after(self.poll_ms, self._poll)
@@ -0,0 +1,85 @@
+import numpy as np
+
+from xraydsp.iirFilter import first_order_magnitude_db
+
+# Same grid as scipy.signal.freqz's default of 512 points
+FREQUENCY_POINTS = 512
+# Magnitudes below this are drawn at the floor (a zero on the grid is -inf dB)
+DB_FLOOR = -100.0
+DB_STEP = 10.0
+
+
+class FrequencyResponsePlot:
+    """Low-pass/high-pass magnitude plot updated in place with blitting.
+
+    Axes decorations and layout are drawn once; each update only replaces
+    the line data and blits it over the cached background. A full redraw
+    happens only when the y-limits have to change or the figure is resized.
+    """
+
+    def __init__(self, fig, ax_low, ax_high, canvas):
+        self.fig = fig
+        self.canvas = canvas
+        self.axes = (ax_low, ax_high)
+        self.background = None
+
+        # The frequency grid and its cosine never change
+        self.w = np.linspace(0, np.pi, FREQUENCY_POINTS, endpoint=False)
+        self.cos_w = np.cos(self.w)
+
+        zeros = np.zeros_like(self.w)
+        self.lines = []
+        for ax, color, title in (
+            (ax_low, 'b', 'Low-pass Filter Frequency Response'),
+            (ax_high, 'r', 'High-pass Filter Frequency Response'),
+        ):
+            ax.set_title(title)
+            ax.set_ylabel('Magnitude [dB]')
+            ax.set_xlabel('Frequency [rad/sample]')
+            ax.set_xlim(self.w[0], np.pi)
+            ax.grid(True)
+            line, = ax.plot(self.w, zeros, color, animated=True)
+            self.lines.append(line)
+
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+        self.canvas.mpl_connect('resize_event', self.on_resize)
+        self.fig.tight_layout()
+
+    def on_resize(self, event):
+        """Recompute the layout only when the figure size changes"""
+        self.fig.tight_layout()
+
+    def on_draw(self, event):
+        """Cache the static background after every full draw"""
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_lines()
+
+    def draw_lines(self):
+        for ax, line in zip(self.axes, self.lines):
+            ax.draw_artist(line)
+
+    def update(self, b_low, a_low, b_high, a_high):
+        """Show the responses of two first-order sections"""
+        full_redraw = self.background is None
+        for ax, line, (b, a) in zip(self.axes, self.lines, ((b_low, a_low), (b_high, a_high))):
+            magnitude = np.maximum(first_order_magnitude_db(b, a, self.cos_w), DB_FLOOR)
+            line.set_ydata(magnitude)
+
+            # Snap limits to whole steps so small changes keep the cached background
+            finite = magnitude[np.isfinite(magnitude)]
+            if finite.size == 0:
+                continue
+            limits = (np.floor(finite.min() / DB_STEP) * DB_STEP, np.ceil(finite.max() / DB_STEP) * DB_STEP)
+            if limits[0] == limits[1]:
+                limits = (limits[0] - DB_STEP, limits[1] + DB_STEP)
+            if ax.get_ylim() != limits:
+                ax.set_ylim(limits)
+                full_redraw = True
+
+        if full_redraw:
+            # on_draw recaptures the background and draws the lines
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        self.draw_lines()
+        self.canvas.blit(self.fig.bbox)
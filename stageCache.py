@@ -0,0 +1,73 @@
+import threading
+from collections import OrderedDict
+
+
+def estimate_nbytes(value):
+    """Rough memory footprint of a cached stage output"""
+    if hasattr(value, 'nbytes'):
+        return value.nbytes
+    if hasattr(value, 'getbands'):
+        # PIL image
+        return value.width * value.height * len(value.getbands())
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_nbytes(item) for item in value)
+    return 0
+
+
+class StageCache:
+    """LRU cache of pipeline stage outputs under a memory budget.
+
+    Each stage is keyed by everything it depends on, so changing one slider
+    only misses the stages downstream of that slider. Values larger than the
+    whole budget are computed but never stored.
+    """
+
+    def __init__(self, max_bytes=512 * 2**20):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        """Return the cached value for key, computing and storing it on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+
+        # Compute outside the lock so the Tk thread never waits on a render
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        """Store value under key, evicting least recently used stages"""
+        size = estimate_nbytes(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def clear(self):
+        """Drop every cached stage"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,51 @@
+import os
+import sys
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from xraydsp.batchFilter import main
+from xraydsp.filterRegistry import apply_chain, parse_chain
+
+STEPS = ['median:filter_strength=5', 'sobel']
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    rng = np.random.default_rng(0)
+    folder = tmp_path / 'in'
+    (folder / 'series').mkdir(parents=True)
+    images = {
+        'a.png': rng.integers(0, 256, (40, 50), dtype=np.uint8),
+        os.path.join('series', 'b.png'): rng.integers(0, 4096, (30, 20), dtype=np.uint16),
+    }
+    for name, image in images.items():
+        cv2.imwrite(str(folder / name), image)
+    (folder / 'series' / 'broken.png').write_bytes(b'not an image')
+    (folder / 'notes.txt').write_text('not an input')
+    return folder, images
+
+
+def test_batch_mirrors_the_inputs_and_reports_failures(tmp_path, inputs, capsys):
+    folder, images = inputs
+    output = tmp_path / 'out'
+    assert main([str(folder), '-o', str(output), '-f', *STEPS, '-j', '2']) == 1
+    for name, image in images.items():
+        written = cv2.imread(str(output / name), cv2.IMREAD_UNCHANGED)
+        assert np.array_equal(written, apply_chain(image, parse_chain(STEPS)))
+    assert not (output / 'series' / 'broken.png').exists()
+    captured = capsys.readouterr()
+    assert 'broken.png' in captured.err
+    assert 'Processed 2 images (0 skipped, 1 failed)' in captured.out
+
+    # A resumed run only retries what did not finish
+    assert main([str(folder), '-o', str(output), '-f', *STEPS, '-j', '1', '--resume']) == 1
+    assert 'Processed 0 images (2 skipped, 1 failed)' in capsys.readouterr().out
+
+
+def test_unknown_steps_are_usage_errors(tmp_path, inputs, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(inputs[0]), '-o', str(tmp_path / 'out'), '-f', 'median:size=3'])
+    assert exit_info.value.code == 2
+    assert "Filter 'median' has no parameter 'size'" in capsys.readouterr().err
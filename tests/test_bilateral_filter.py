@@ -0,0 +1,52 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from xraydsp.bilateralFIlter import GRID_MIN_WINDOW, GRID_MIN_WINDOW_8BIT, bilateral_filter, uses_grid
+
+# 99th percentile and largest error per quality, in 8-bit grey levels: the bounds
+# bilateral_grid documents, plus one level at the 99th percentile for integer rounding
+# on images much smaller than the documented 1024x1024
+BOUNDS = {1: (9.5, 14), 2: (3.3, 7.1), 4: (2, 2.4)}
+
+
+def detector_image(bits, shape=(256, 240)):
+    """A ramp with a bright disc and Gaussian noise, like a flat-field corrected exposure"""
+    rows, cols = np.mgrid[0:shape[0], 0:shape[1]]
+    top = 2 ** bits - 1
+    disc = (rows - shape[0] // 2) ** 2 + (cols - shape[1] // 2) ** 2 < 60 ** 2
+    image = 0.3 * top + 0.4 * top * cols / shape[1] + 0.2 * top * disc
+    image += np.random.default_rng(0).normal(0, 0.02 * top, shape)
+    return np.clip(image, 0, top).astype(np.uint8 if bits == 8 else np.uint16)
+
+
+@pytest.mark.parametrize('bits', [8, 12, 16])
+@pytest.mark.parametrize('window', [15, 31])
+def test_grid_stays_within_its_documented_error(bits, window):
+    image = detector_image(bits)
+    exact = bilateral_filter(image, window, bits=bits).astype(np.float64)
+    previous = np.inf
+    for quality, (percentile, largest) in sorted(BOUNDS.items()):
+        approximate = bilateral_filter(image, window, bits=bits, quality=quality)
+        assert approximate.dtype == image.dtype
+        error = np.abs(approximate - exact) * 255 / (2 ** bits - 1)
+        assert np.percentile(error, 99) <= percentile and error.max() <= largest
+        # Higher quality is never worse
+        assert error.mean() <= previous
+        previous = error.mean()
+
+
+@pytest.mark.parametrize('dtype, window', [(np.uint8, GRID_MIN_WINDOW_8BIT - 2), (np.uint16, GRID_MIN_WINDOW - 2)])
+def test_small_windows_are_filtered_exactly(dtype, window):
+    image = detector_image(8 if dtype == np.uint8 else 12)
+    assert not uses_grid(image, window)
+    assert np.array_equal(bilateral_filter(image, window, bits=12, quality=2),
+                          bilateral_filter(image, window, bits=12))
+
+
+def test_derived_windows_use_the_grid():
+    # d <= 0 lets OpenCV size the window from sigmaSpace, far above either threshold
+    assert uses_grid(np.zeros((4, 4), np.uint8), 0)
+    assert uses_grid(np.zeros((4, 4), np.uint16), -1)
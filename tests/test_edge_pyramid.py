@@ -0,0 +1,59 @@
+import os
+import sys
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from xraydsp.edgePyramid import EdgePyramid, multiscale_edges
+from xraydsp.laplacianFilter import laplacian_filter
+from xraydsp.sobelFilter import sobel_filter
+
+
+@pytest.fixture
+def image():
+    return np.random.default_rng(0).random((157, 211)).astype(np.float32) * 4095
+
+
+def test_each_level_filters_the_gaussian_pyramid(image):
+    pyramid = EdgePyramid(levels=3, ksize=3).update(image)
+    level_image = image
+    for level in range(3):
+        maps = pyramid.level(level)
+        assert np.array_equal(maps.image, level_image)
+        assert np.allclose(maps.magnitude, sobel_filter(level_image, 3), rtol=1e-6, atol=1e-3)
+        assert np.array_equal(np.abs(maps.laplacian), laplacian_filter(level_image, 3))
+        assert np.allclose(maps.orientation, cv2.phase(maps.grad_x, maps.grad_y), atol=1e-6)
+        level_image = cv2.pyrDown(level_image)
+
+
+def test_upsampling_keeps_level_samples_on_their_pixels(image):
+    pyramid = EdgePyramid(levels=3, outputs=('magnitude',)).update(image)
+    for level in (1, 2):
+        step = 2 ** level
+        full = pyramid.full_resolution('magnitude', level)
+        assert full.shape == image.shape
+        coarse = pyramid.level(level).magnitude
+        rows, cols = (image.shape[0] - 1) // step + 1, (image.shape[1] - 1) // step + 1
+        assert np.allclose(full[::step, ::step], coarse[:rows, :cols], rtol=1e-5, atol=1e-3)
+
+
+def test_combined_is_the_strongest_level(image):
+    pyramid = EdgePyramid(levels=3).update(image)
+    for name in ('magnitude', 'laplacian'):
+        levels = [np.abs(pyramid.full_resolution(name, level).copy()) for level in range(3)]
+        assert np.array_equal(pyramid.combined(name), np.maximum.reduce(levels))
+    assert np.array_equal(multiscale_edges(image, 3, 3), pyramid.combined('magnitude'))
+
+
+def test_buffers_are_reused_for_frames_of_one_shape(image):
+    pyramid = EdgePyramid(levels=2, outputs=('laplacian',))
+    buffer = pyramid.update(image).level(1).laplacian
+    assert pyramid.level(1).magnitude is None
+    assert pyramid.update(image[::-1].copy()).level(1).laplacian is buffer
+    assert np.array_equal(buffer, cv2.Laplacian(cv2.pyrDown(image[::-1].copy()), cv2.CV_32F, ksize=3))
+
+
+def test_unknown_outputs_are_refused():
+    with pytest.raises(ValueError, match='Unknown edge outputs'):
+        EdgePyramid(outputs=('magnitude', 'canny'))
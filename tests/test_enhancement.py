@@ -0,0 +1,49 @@
+import os
+import sys
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from xraydsp.enhancement import build_proxy, enhance, slider_coefficients
+from xraydsp.iirFilter import frequency_response
+
+
+@pytest.fixture
+def image():
+    # Smooth anatomy-like structure under detector noise, 12 bits in a 16-bit container
+    rows, cols = np.mgrid[0:800, 0:1200]
+    structure = 2000 + 1000 * np.sin(cols / 60) * np.cos(rows / 90)
+    noise = np.random.default_rng(0).normal(0, 50, rows.shape)
+    return (structure + noise).astype(np.uint16)
+
+
+def test_proxy_fits_the_longer_side(image):
+    proxy, factor = build_proxy(image)
+    assert proxy.shape == (267, 400) and factor == 3.0
+    small = image[:100, :300]
+    assert build_proxy(small) == (small, 1.0)
+
+
+def test_full_size_coefficients_are_the_slider_values():
+    b_low, a_low, b_high, a_high = slider_coefficients(0.2, 0.8, 1.0, 0.5)
+    assert (b_low, a_low, b_high, a_high) == ([0.2, 0.2], [1.0, -0.8], [1.0, -1.0], [1.0, -0.5])
+
+
+def test_resampled_sections_decay_over_the_same_distance():
+    factor = 3.0
+    b_low, a_low, b_high, a_high = slider_coefficients(0.2, 0.8, 1.0, 0.5, factor)
+    assert np.isclose(-a_low[1], 0.8 ** factor) and np.isclose(-a_high[1], 0.5 ** factor)
+    # The low-pass keeps its DC gain, so the proxy is as bright as the full image
+    assert np.isclose(abs(frequency_response(b_low, a_low, [0.0])[0]), 2.0)
+    # The high-pass keeps its zero at DC
+    assert np.isclose(abs(frequency_response(b_high, a_high, [0.0])[0]), 0.0)
+
+
+def test_proxy_preview_matches_the_downscaled_full_render(image):
+    full = enhance(image, bits=12)
+    proxy, factor = build_proxy(image)
+    expected = cv2.resize(full, proxy.shape[::-1], interpolation=cv2.INTER_AREA).astype(int)
+    resampled = np.abs(enhance(proxy, bits=12, factor=factor) - expected).mean()
+    unscaled = np.abs(enhance(proxy, bits=12) - expected).mean()
+    assert resampled < 0.5 and resampled < unscaled / 10
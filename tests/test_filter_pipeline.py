@@ -0,0 +1,74 @@
+import os
+import sys
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from xraydsp.filterPipeline import SOURCE, Pipeline, edge_pipeline, iir_enhance, subtract, to_uint8
+from xraydsp.filterRegistry import apply_filter
+from xraydsp.imageDepth import to_float32
+
+
+@pytest.fixture
+def image():
+    return np.random.default_rng(0).integers(0, 256, (120, 100), dtype=np.uint8)
+
+
+def test_edge_pipeline_matches_the_filters_run_one_by_one(image):
+    original = image.copy()
+    results, timings = edge_pipeline().run(image)
+    denoised = apply_filter('noise_reduction', image, kernel_size=5)
+    assert np.array_equal(results['sobel'], apply_filter('sobel', denoised, filter_strength=3))
+    assert np.array_equal(results['laplacian'], apply_filter('laplacian', denoised, filter_strength=3))
+    assert np.array_equal(results['high_pass'], cv2.subtract(image, denoised))
+    iir = iir_enhance(to_float32(denoised), (0.2, 0.2), (1.0, -0.8), (1.0, -1.0), (1.0, -0.5))
+    assert np.array_equal(results['enhanced'], to_uint8(iir))
+    assert np.array_equal(results['features'], results['sobel'])
+    assert set(timings) >= set(results)
+    # Steps never write into the caller's image
+    assert np.array_equal(image, original)
+
+
+def test_identical_steps_are_computed_once(image):
+    calls = []
+
+    def blur(source, size):
+        calls.append(size)
+        return cv2.blur(source, (size, size))
+
+    pipeline = Pipeline()
+    pipeline.add('first', blur, SOURCE, size=5)
+    pipeline.add('second', blur, SOURCE, size=5)
+    pipeline.add('other', blur, SOURCE, size=3)
+    pipeline.add('difference', subtract, 'first', 'second')
+    assert pipeline.resolve('second') == 'first'
+
+    results, _ = pipeline.run(image, outputs=['second', 'other', 'difference'])
+    assert sorted(calls) == [3, 5]
+    assert not results['difference'].any()
+
+
+def test_inplace_steps_do_not_overwrite_buffers_still_needed(image):
+    def invert(source):
+        np.subtract(255, source, out=source)
+        return source
+
+    pipeline = Pipeline()
+    pipeline.add('blurred', cv2.blur, SOURCE, ksize=(3, 3))
+    pipeline.add('inverted', invert, 'blurred', inplace=True)
+    pipeline.add('kept', lambda source: source.copy(), 'blurred')
+    results, _ = pipeline.run(image, outputs=['inverted', 'kept'])
+    assert np.array_equal(results['kept'], cv2.blur(image, (3, 3)))
+    assert np.array_equal(results['inverted'], 255 - results['kept'])
+
+
+def test_bad_declarations_are_refused():
+    pipeline = Pipeline()
+    pipeline.add_filter('denoise', 'noise_reduction')
+    with pytest.raises(ValueError, match='already defined'):
+        pipeline.add_filter('denoise', 'median')
+    with pytest.raises(ValueError, match="unknown step 'missing'"):
+        pipeline.add('sobel', subtract, 'denoise', 'missing')
+    with pytest.raises(KeyError, match="Unknown filter 'canny'. Available"):
+        pipeline.add_filter('edges', 'canny')
@@ -0,0 +1,37 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from xraydsp.filterRegistry import FILTERS, apply_chain, apply_filter, filter_halo, get_filter, parse_chain, \
+    parse_step
+
+
+@pytest.fixture
+def image():
+    return np.random.default_rng(0).integers(0, 256, (96, 80), dtype=np.uint8)
+
+
+@pytest.mark.parametrize('lookup', [get_filter, filter_halo, lambda name: apply_filter(name, np.zeros((8, 8)))])
+def test_unknown_filter_lists_the_available_ones(lookup):
+    with pytest.raises(KeyError, match="Unknown filter 'foo'. Available: bilateral"):
+        lookup('foo')
+
+
+def test_parse_step_reads_bracketed_kernels():
+    assert parse_step("fir:kernel=[[1, 2], [3, 4]],method='direct'") == \
+        ('fir', {'kernel': [[1, 2], [3, 4]], 'method': 'direct'})
+    with pytest.raises(ValueError, match="no parameter 'size'"):
+        parse_step('median:size=3')
+
+
+def test_chain_runs_steps_in_order(image):
+    chain = parse_chain(['median:filter_strength=3', 'sobel'])
+    expected = apply_filter('sobel', apply_filter('median', image, filter_strength=3))
+    assert np.array_equal(apply_chain(image, chain), expected)
+
+
+@pytest.mark.parametrize('name', sorted(FILTERS))
+def test_every_filter_keeps_the_image_shape(image, name):
+    assert apply_filter(name, image).shape == image.shape
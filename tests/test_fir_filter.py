@@ -0,0 +1,57 @@
+import os
+import sys
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from xraydsp.firFilter import METHODS, fir_filter, plan_fir, run_plan, separable_terms
+
+rng = np.random.default_rng(0)
+KERNELS = {
+    'gaussian 3x3': np.array([[1, 2, 1], [2, 4, 2], [1, 2, 1]], dtype=np.float32),
+    'box 9x9': np.ones((9, 9), dtype=np.float32),
+    'rank 2 7x11': (np.outer(np.hanning(9)[1:-1], np.hanning(13)[1:-1])
+                    + np.outer(np.ones(7), np.linspace(0.1, 1, 11))).astype(np.float32),
+    'random 11x11': rng.random((11, 11)).astype(np.float32),
+}
+
+
+@pytest.fixture(params=[np.uint8, np.uint16, np.float32])
+def image(request):
+    if request.param == np.float32:
+        return np.random.default_rng(1).random((200, 170)).astype(np.float32)
+    high = np.iinfo(request.param).max + 1
+    return np.random.default_rng(1).integers(0, high, (200, 170), dtype=request.param)
+
+
+@pytest.mark.parametrize('method', METHODS)
+@pytest.mark.parametrize('name', sorted(KERNELS))
+def test_every_plan_matches_filter2d(image, name, method):
+    kernel = KERNELS[name] / KERNELS[name].sum()
+    expected = cv2.filter2D(image, -1, kernel)
+    result = run_plan(image, kernel, plan_fir(kernel, image.dtype, method))
+    assert result.dtype == image.dtype and result.shape == image.shape
+    difference = np.abs(result.astype(np.float64) - expected)
+    # Within one grey level for integer images; float sums only differ in rounding order
+    assert difference.max() <= (1 if image.dtype != np.float32 else 1e-4)
+
+
+def test_auto_plan_matches_filter2d(image):
+    kernel = KERNELS['box 9x9']
+    expected = cv2.filter2D(image, -1, kernel / kernel.sum())
+    assert np.abs(fir_filter(image, kernel).astype(np.float64) - expected).max() <= 1
+
+
+def test_rank_is_found_by_svd():
+    assert len(separable_terms(KERNELS['box 9x9'])) == 1
+    assert len(separable_terms(KERNELS['rank 2 7x11'])) == 2
+    assert len(separable_terms(KERNELS['random 11x11'])) == 11
+    assert separable_terms(np.zeros((3, 3))) == []
+
+
+def test_invalid_requests_are_refused():
+    with pytest.raises(ValueError, match='Unknown FIR method'):
+        plan_fir(KERNELS['gaussian 3x3'], method='winograd')
+    with pytest.raises(ValueError, match='no separable form'):
+        plan_fir(np.zeros((3, 3)), method='separable')
@@ -0,0 +1,57 @@
+import os
+import sys
+import cv2
+import numpy as np
+import pytest
+from scipy.signal import butter, lfilter, lfilter_zi
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from xraydsp.fluoroStream import FluoroStream, FrameFilter, TemporalIIR, frame_paths, recursive_average
+
+
+@pytest.fixture
+def frames():
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 4096, (48, 64), dtype=np.uint16) for _ in range(8)]
+
+
+@pytest.mark.parametrize('b, a', [recursive_average(0.25), butter(2, 0.2)], ids=['average', 'butterworth'])
+def test_temporal_recursion_matches_lfilter(frames, b, a):
+    sequence = np.stack(frames).astype(np.float32)
+    temporal = TemporalIIR(b, a)
+    streamed = np.stack([temporal.step(frame) for frame in sequence])
+    zi = lfilter_zi(b, a)[:, None, None] * sequence[0]
+    expected = lfilter(b, a, sequence.astype(np.float64), axis=0, zi=zi)[0]
+    assert np.allclose(streamed, expected, rtol=1e-4, atol=1e-2)
+
+
+def test_reset_restarts_from_the_next_frame(frames):
+    temporal = TemporalIIR(*recursive_average(0.25))
+    first = frames[0].astype(np.float32)
+    temporal.step(first)
+    temporal.step(frames[1].astype(np.float32))
+    temporal.reset()
+    # A steady state at the new first frame: a constant input passes unchanged
+    assert np.allclose(temporal.step(first), first)
+
+
+def test_offline_stream_filters_and_writes_every_frame(tmp_path, frames):
+    source, destination = tmp_path / 'in', tmp_path / 'out'
+    source.mkdir()
+    for index, frame in enumerate(frames):
+        cv2.imwrite(str(source / f"{index:03d}.png"), frame)
+
+    summary = FluoroStream(str(source), str(destination), fps=30, realtime=False, bits=12).run()
+    assert summary['read'] == summary['filtered'] == summary['written'] == len(frames)
+    assert summary['dropped'] == summary['repeated'] == 0
+
+    frame_filter = FrameFilter(bits=12)
+    written = [cv2.imread(path, cv2.IMREAD_UNCHANGED) for path in frame_paths(str(destination))]
+    for frame, output in zip(frames, written):
+        assert output.dtype == np.uint16
+        assert np.array_equal(output, frame_filter(frame))
+
+
+def test_temporal_weight_must_be_a_fraction():
+    with pytest.raises(ValueError, match=r'\(0, 1\]'):
+        recursive_average(1.5)
@@ -0,0 +1,35 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from xraydsp.iirFilter import StripIIRPair, filter_strips, iir_filter_pair
+
+# (low_b1, low_a1, high_b1, high_a1) slider values, the last two with poles near the unit circle
+SLIDERS = [(0.2, 0.8, 1.0, 0.5), (0.2, 0.95, 1.0, 0.9), (0.01, 0.95, 1.0, 0.99), (0.01, 0.99, 1.0, 0.99)]
+
+
+def branches(low_b1, low_a1, high_b1, high_a1):
+    return [low_b1, low_b1], [1.0, -low_a1], [1.0, -high_b1], [1.0, -high_a1]
+
+
+@pytest.fixture
+def image():
+    return np.random.default_rng(0).random((256, 192))
+
+
+@pytest.mark.parametrize('sliders', SLIDERS)
+def test_fused_matches_unfused_near_unity_poles(image, sliders):
+    reference = iir_filter_pair(image, *branches(*sliders), fuse=False, dtype=np.float64)
+    fused = iir_filter_pair(image, *branches(*sliders), fuse=True, dtype=np.float32)
+    assert fused.dtype == np.float32
+    # Within 1e-4 of the output range, far below one 8-bit display level
+    assert np.abs(fused - reference).max() <= 1e-4 * np.abs(reference).max()
+
+
+@pytest.mark.parametrize('sliders', SLIDERS)
+def test_strips_match_whole_image(image, sliders):
+    strips = [image[start:start + 40] for start in range(0, image.shape[0], 40)]
+    streamed = np.concatenate(list(filter_strips(strips, StripIIRPair(*branches(*sliders)))))
+    assert np.array_equal(streamed, iir_filter_pair(image, *branches(*sliders)))
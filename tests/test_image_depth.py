@@ -0,0 +1,63 @@
+import os
+import struct
+import sys
+import zlib
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from xraydsp.imageDepth import (
+    bit_depth, decode_grayscale, encoded_bit_depth, file_bit_depth, from_float32, full_scale, to_float32, to_uint8,
+)
+
+
+def with_sbit(png, bits):
+    """Insert an sBIT chunk right after IHDR, as 12- and 14-bit detectors write it"""
+    ihdr_end = 8 + 8 + 13 + 4
+    body = bytes([bits])
+    chunk = struct.pack('>I', len(body)) + b'sBIT' + body + struct.pack('>I', zlib.crc32(b'sBIT' + body))
+    return png[:ihdr_end] + chunk + png[ihdr_end:]
+
+
+@pytest.fixture
+def dim_frame():
+    # A 12-bit frame that never gets near its full scale
+    return np.random.default_rng(0).integers(0, 300, (32, 40), dtype=np.uint16)
+
+
+def test_depth_comes_from_the_type_or_the_caller_never_the_pixels(dim_frame):
+    assert bit_depth(dim_frame) == 16
+    assert bit_depth(dim_frame, 12) == 12
+    assert full_scale(dim_frame, 12) == 4095.0
+    assert full_scale(dim_frame[:4, :4], 12) == full_scale(dim_frame, 12)
+    assert bit_depth(np.zeros((2, 2), np.uint8)) == 8
+    assert bit_depth(np.zeros((2, 2), np.float32)) is None
+    assert full_scale(np.zeros((2, 2), np.float32)) == 1.0
+
+
+def test_sbit_chunk_gives_the_file_depth(tmp_path, dim_frame):
+    png = cv2.imencode('.png', dim_frame)[1].tobytes()
+    assert encoded_bit_depth(png) is None
+
+    tagged = with_sbit(png, 12)
+    assert encoded_bit_depth(tagged) == 12
+    assert np.array_equal(decode_grayscale(tagged), dim_frame)
+    path = tmp_path / 'frame.png'
+    path.write_bytes(tagged)
+    assert file_bit_depth(str(path)) == 12
+    assert file_bit_depth(str(tmp_path / 'missing.png')) is None
+    assert encoded_bit_depth(b'not a png') is None
+
+
+def test_float_round_trip_keeps_the_samples(dim_frame):
+    scale = full_scale(dim_frame, 12)
+    normalized = to_float32(dim_frame, scale)
+    assert normalized.dtype == np.float32 and normalized.max() <= 1.0
+    assert np.array_equal(from_float32(normalized, np.uint16, scale), dim_frame)
+
+
+def test_display_copy_stretches_the_bit_depth():
+    frame = np.array([[0, 2048, 4095]], np.uint16)
+    assert to_uint8(frame, 12).tolist() == [[0, 128, 255]]
+    assert to_uint8(frame).tolist() == [[0, 8, 16]]
@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'Digital Filters test'))
+from jobQueue import DONE, FAILED, JobQueue
+
+
+def work(value, gate=None):
+    """Double value; 'die' kills the worker process as the OOM killer would, once gate exists"""
+    if value == 'die':
+        while not os.path.exists(gate):
+            time.sleep(0.01)
+        os._exit(1)
+    if value == 'slow':
+        time.sleep(30)
+    return value * 2
+
+
+def wait_all(queue, jobs, timeout=60):
+    deadline = time.monotonic() + timeout
+    return [queue.wait(job.id, max(0, deadline - time.monotonic())).status for job in jobs]
+
+
+def test_worker_death_fails_running_jobs_and_restarts_the_pool(tmp_path):
+    queue = JobQueue(work, max_workers=2)
+    gate = str(tmp_path / 'die')
+    try:
+        # 'die' waits for the gate so that 'slow' is on the same pool when it breaks
+        running = [queue.submit('a', 'k1', ('die', gate)), queue.submit('a', 'k2', ('slow',))]
+        open(gate, 'w').close()
+        queued = [queue.submit('b', key, (value,)) for key, value in (('k3', 3), ('k4', 4), ('k5', 5))]
+
+        assert wait_all(queue, running) == [FAILED, FAILED]
+        assert wait_all(queue, queued) == [DONE, DONE, DONE]
+        assert [job.result for job in queued] == [6, 8, 10]
+
+        # A failed key is not coalesced onto: resubmitting runs it again on the new pool
+        retry = queue.submit('a', 'k2', (21,))
+        assert retry is not running[1]
+        assert wait_all(queue, [retry]) == [DONE] and retry.result == 42
+        assert queue.stats()[FAILED] == 2
+    finally:
+        queue.shutdown()
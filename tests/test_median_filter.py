@@ -0,0 +1,44 @@
+import os
+import sys
+import cv2
+import numpy as np
+import pytest
+from scipy.ndimage import median_filter as ndimage_median
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from xraydsp.medianFilter import median_8bit_split, median_filter
+
+WINDOWS = [3, 5, 7, 15, 31, 61]
+
+
+@pytest.fixture
+def image8():
+    return np.random.default_rng(0).integers(0, 256, (190, 150), dtype=np.uint8)
+
+
+@pytest.mark.parametrize('window', WINDOWS)
+def test_uint16_matches_medianblur_of_the_same_levels(image8, window):
+    # x -> 257x is increasing and sets both bytes, so the 16-bit median is 257 times
+    # OpenCV's 8-bit median, which medianBlur computes at any window size
+    image16 = image8.astype(np.uint16) * 257
+    expected = cv2.medianBlur(image8, window).astype(np.uint16) * 257
+    result = median_filter(image16, window)
+    assert result.dtype == np.uint16
+    assert np.array_equal(result, expected)
+
+
+@pytest.mark.parametrize('window', WINDOWS)
+def test_uint16_matches_a_sorting_median(window):
+    # Full 16-bit range with smooth structure, so blocks span several high bytes
+    rows, cols = np.mgrid[0:120, 0:100]
+    noise = np.random.default_rng(1).integers(-3000, 3000, rows.shape)
+    image = np.clip(30000 + 200 * rows - 150 * cols + noise, 0, 65535).astype(np.uint16)
+    # Blocks smaller than the default exercise the low-byte passes' window overlap
+    result = median_8bit_split(image, window, split_block=32) if window > 5 else median_filter(image, window)
+    assert np.array_equal(result, ndimage_median(image, size=window, mode='nearest'))
+
+
+@pytest.mark.parametrize('dtype', [np.uint8, np.uint16])
+def test_row_bands_match_one_pass(image8, dtype):
+    image = image8.astype(dtype) * (257 if dtype == np.uint16 else 1)
+    assert np.array_equal(median_filter(image, 15, workers=3), median_filter(image, 15, workers=1))
@@ -0,0 +1,56 @@
+import os
+import sys
+import threading
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from xraydsp.metrics import Registry, recording, stage
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram('latency_seconds', "Latency", ['route'], buckets=[0.1, 1])
+    for value in (0.05, 0.5, 0.5, 5):
+        latency.observe(value, route='/a')
+    assert registry.render().splitlines() == [
+        '# HELP latency_seconds Latency',
+        '# TYPE latency_seconds histogram',
+        'latency_seconds_bucket{route="/a",le="0.1"} 1',
+        'latency_seconds_bucket{route="/a",le="1"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 6.05',
+        'latency_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_counters_escape_labels_and_check_their_names():
+    registry = Registry()
+    lookups = registry.counter('lookups', "Lookups", ['cache'])
+    lookups.inc(cache='a"b')
+    lookups.inc(2, cache='a"b')
+    assert lookups.value(cache='a"b') == 3
+    assert 'lookups_total{cache="a\\"b"} 3' in registry.render()
+    with pytest.raises(ValueError, match='expects labels'):
+        lookups.inc(kind='x')
+    # Registering a name twice returns the first metric
+    assert registry.counter('lookups', "Lookups", ['cache']) is lookups
+
+
+def test_recording_collects_only_this_threads_stages():
+    def other_thread():
+        with stage('elsewhere'):
+            pass
+
+    with recording() as timings:
+        with stage('first'):
+            thread = threading.Thread(target=other_thread)
+            thread.start()
+            thread.join()
+        with recording() as inner:
+            with stage('nested'):
+                pass
+        with stage('second'):
+            pass
+    assert [name for name, _ in timings] == ['first', 'second']
+    assert [name for name, _ in inner] == ['nested']
+    assert all(seconds >= 0 for _, seconds in timings)
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, ROOT)
+import xraydsp
+
+
+def loaded_after(statement):
+    """Heavy modules in sys.modules after running statement in a fresh interpreter"""
+    script = (
+        f"import sys\n{statement}\n"
+        "print(' '.join(sorted(m for m in ('numpy', 'cv2', 'scipy', 'scipy.signal') if m in sys.modules)))"
+    )
+    result = subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+def test_importing_the_package_loads_no_numerics():
+    assert loaded_after('import xraydsp') == []
+
+
+def test_compression_never_imports_scipy_signal():
+    assert 'scipy.signal' not in loaded_after('from xraydsp import compress')
+
+
+@pytest.mark.parametrize('name', xraydsp.__all__)
+def test_every_export_resolves(name):
+    assert getattr(xraydsp, name) is not None
+    assert name in dir(xraydsp)
+
+
+def test_unknown_names_raise_attribute_error():
+    with pytest.raises(AttributeError, match='no attribute'):
+        xraydsp.missing
@@ -0,0 +1,73 @@
+import os
+import sys
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from xraydsp import parallelBands
+from xraydsp.filterRegistry import FILTERS, apply_filter, filter_halo
+from xraydsp.parallelBands import CoreBudget, filter_bands, run_bands
+
+TILEABLE = sorted(name for name in FILTERS if filter_halo(name) is not None)
+
+
+@pytest.fixture(autouse=True)
+def four_cores():
+    # Bands only split when the budget grants more than one core, whatever this machine has
+    parallelBands.configure(4)
+    yield
+    parallelBands.configure()
+
+
+@pytest.fixture(params=[np.uint8, np.uint16])
+def image(request):
+    high = np.iinfo(request.param).max + 1
+    return np.random.default_rng(0).integers(0, high, (301, 257), dtype=request.param)
+
+
+@pytest.mark.parametrize('name', TILEABLE)
+def test_thread_bands_are_bit_identical(image, name):
+    assert np.array_equal(filter_bands(name, image), apply_filter(name, image))
+
+
+@pytest.mark.parametrize('name', ['median', 'sobel'])
+def test_process_bands_are_bit_identical(image, name):
+    assert np.array_equal(filter_bands(name, image, processes=True), apply_filter(name, image))
+
+
+def test_column_bands(image):
+    blur = cv2.blur(image, (1, 9))
+    assert np.array_equal(run_bands(cv2.blur, image, halo=4, axis=1, ksize=(9, 1)), cv2.blur(image, (9, 1)))
+    assert np.array_equal(run_bands(cv2.blur, image, halo=4, axis=0, ksize=(1, 9)), blur)
+
+
+def test_opencv_is_single_threaded_only_inside_bands(image):
+    before = cv2.getNumThreads()
+    seen = []
+
+    def record(band):
+        seen.append(cv2.getNumThreads())
+        return band
+
+    run_bands(record, image, workers=4)
+    assert len(seen) == 4 and set(seen) == {1}
+    assert cv2.getNumThreads() == before
+
+
+def test_bands_inside_bands_run_directly(image):
+    def outer(band):
+        # Waiting on the pool from one of its own threads would deadlock it
+        return run_bands(cv2.medianBlur, band, halo=2, ksize=5)
+
+    assert np.array_equal(run_bands(outer, image, halo=2), cv2.medianBlur(image, 5))
+
+
+def test_budget_splits_cores_between_callers():
+    budget = CoreBudget(4)
+    with budget.reserve(3) as first:
+        with budget.reserve() as second:
+            with budget.reserve() as third:
+                assert (first, second, third) == (3, 1, 1)
+                assert budget.in_use == 5
+    assert budget.in_use == 0
@@ -0,0 +1,87 @@
+import os
+import sys
+import threading
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'Digital Filters test'))
+from precompute import Precomputer
+from xraydsp.spectrumCache import SpectrumCache, compress, reconstruct
+
+STOPS = [round(0.05 * step, 2) for step in range(1, 11)]
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_every_stop_is_computed_nearest_first():
+    order = []
+    precomputer = Precomputer(lambda key, param: order.append(param) or b'x' * 10, max_workers=1)
+    precomputer.schedule('client', 'image', [(f"image:{stop}", stop) for stop in STOPS], 0.1)
+    wait_for(lambda: precomputer.stats()['completed'] == len(STOPS))
+    distances = [abs(param - 0.1) for param in order]
+    assert order[0] == 0.1 and distances == sorted(distances)
+    assert precomputer.lookup('image:0.3') == b'x' * 10
+    assert precomputer.lookup('image:0.55') is None
+    assert precomputer.stats()['hits'] == precomputer.stats()['misses'] == 1
+
+
+def test_results_are_evicted_least_recently_used_within_the_byte_budget():
+    precomputer = Precomputer(lambda key, param: None, max_bytes=100)
+    for key in 'abc':
+        precomputer.store(key, (b'x' * 30, 'image/png'))
+    precomputer.lookup('a')
+    precomputer.store('d', b'x' * 30)
+    assert precomputer.lookup('b') is None
+    assert [key for key in 'acd' if precomputer.lookup(key) is not None] == ['a', 'c', 'd']
+    assert precomputer.stats()['bytes'] == 90
+    # Larger than the whole budget: never kept
+    precomputer.store('e', np.zeros(101, np.uint8))
+    assert precomputer.lookup('e') is None and precomputer.stats()['bytes'] == 90
+
+
+def test_a_newer_upload_cancels_the_previous_ones_queued_stops():
+    running, release = threading.Event(), threading.Event()
+
+    def compute(key, param):
+        running.set()
+        release.wait(10)
+        return key.encode()
+
+    precomputer = Precomputer(compute, max_workers=1)
+    precomputer.schedule('client', 'old', [(f"old:{stop}", stop) for stop in STOPS], 0.1)
+    assert running.wait(10)
+    precomputer.schedule('client', 'new', [('new:0.1', 0.1)], 0.1)
+    release.set()
+    wait_for(lambda: precomputer.lookup('new:0.1') is not None)
+    # The stop already running when the new upload arrived finishes but is discarded
+    assert precomputer.stats()['cancelled'] == len(STOPS) - 1
+    assert all(precomputer.lookup(f"old:{stop}") is None for stop in STOPS)
+
+
+def test_concurrent_misses_share_one_transform():
+    image = np.random.default_rng(0).integers(0, 256, (64, 48), dtype=np.uint8)
+    loads = []
+
+    def load():
+        loads.append(1)
+        time.sleep(0.05)
+        return image
+
+    cache = SpectrumCache()
+    entries = []
+    threads = [threading.Thread(target=lambda: entries.append(cache.fetch('key', load))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(loads) == 1
+    assert all(entry is entries[0] for entry in entries)
+    spectrum, shape = entries[0]
+    assert np.array_equal(reconstruct(spectrum, shape, 0.2), compress(image, 0.2))
+    assert cache.fetch('missing', lambda: None) is None
@@ -0,0 +1,70 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from renderScheduler import RenderScheduler, Superseded
+
+
+class FakeMaster:
+    """The after()/after_cancel() part of a Tk root, driven by hand"""
+
+    def __init__(self):
+        self.callbacks = {}
+        self._next_id = 0
+
+    def after(self, ms, callback):
+        self._next_id += 1
+        self.callbacks[self._next_id] = callback
+        return self._next_id
+
+    def after_cancel(self, after_id):
+        self.callbacks.pop(after_id, None)
+
+    def run_pending(self):
+        callbacks, self.callbacks = self.callbacks, {}
+        for callback in callbacks.values():
+            callback()
+
+
+def test_superseded_render_stops_between_stages_and_only_the_newest_is_shown():
+    master = FakeMaster()
+    started, stages, shown = threading.Event(), [], []
+    scheduler = None
+
+    def render(params, generation):
+        stages.append((params, 'first'))
+        if params == 'old':
+            started.set()
+            while not scheduler.is_stale(generation):
+                time.sleep(0.001)
+        if scheduler.is_stale(generation):
+            raise Superseded()
+        stages.append((params, 'second'))
+        return params.upper()
+
+    scheduler = RenderScheduler(master, render, lambda params, frame: shown.append(frame))
+    try:
+        scheduler.submit('old')
+        assert started.wait(5)
+        scheduler.submit('new')
+        deadline = time.monotonic() + 5
+        while not shown and time.monotonic() < deadline:
+            master.run_pending()
+            time.sleep(0.001)
+        assert shown == ['NEW']
+        assert ('old', 'second') not in stages
+    finally:
+        scheduler.close()
+
+
+def test_close_stops_the_worker_and_the_poll_loop():
+    master = FakeMaster()
+    scheduler = RenderScheduler(master, lambda params, generation: params, lambda params, frame: None)
+    assert master.callbacks
+    scheduler.close()
+    assert not master.callbacks
+    scheduler._worker.join(5)
+    assert not scheduler._worker.is_alive()
+    assert scheduler.is_stale(scheduler.submit('late'))
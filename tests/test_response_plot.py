@@ -0,0 +1,56 @@
+import os
+import sys
+import numpy as np
+import pytest
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from scipy.signal import freqz
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from responsePlot import DB_FLOOR, FrequencyResponsePlot
+
+LOW = ([0.2, 0.2], [1.0, -0.8])
+HIGH = ([1.0, -1.0], [1.0, -0.5])
+
+
+@pytest.fixture
+def plot():
+    fig = Figure(figsize=(5, 6))
+    ax_low, ax_high = fig.subplots(2, 1)
+    canvas = FigureCanvasAgg(fig)
+    plot = FrequencyResponsePlot(fig, ax_low, ax_high, canvas)
+    plot.draws = 0
+    draw = canvas.draw
+
+    def counted_draw(*args, **kwargs):
+        plot.draws += 1
+        draw(*args, **kwargs)
+
+    canvas.draw = counted_draw
+    return plot
+
+
+def test_lines_match_freqz(plot):
+    plot.update(*LOW, *HIGH)
+    for line, (b, a) in zip(plot.lines, (LOW, HIGH)):
+        w, h = freqz(b, a)
+        with np.errstate(divide='ignore'):
+            expected = np.maximum(20 * np.log10(np.abs(h)), DB_FLOOR)
+        assert np.allclose(line.get_xdata(), w)
+        assert np.allclose(line.get_ydata(), expected, atol=1e-6)
+
+
+def test_only_a_change_of_limits_redraws_the_axes(plot):
+    plot.update(*LOW, *HIGH)
+    assert plot.draws == 1 and plot.background is not None
+    limits = [ax.get_ylim() for ax in plot.axes]
+
+    # A nudge that stays within the snapped limits is blitted
+    plot.update([0.21, 0.21], [1.0, -0.79], *HIGH)
+    assert plot.draws == 1
+    assert [ax.get_ylim() for ax in plot.axes] == limits
+
+    # A much stronger low-pass needs new limits and a full redraw
+    plot.update([0.5, 0.5], [1.0, -0.99], *HIGH)
+    assert plot.draws == 2
+    assert plot.axes[0].get_ylim() != limits[0]
@@ -0,0 +1,155 @@
+import base64
+import json
+import os
+import sys
+import threading
+import time
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'Digital Filters test'))
+
+
+@pytest.fixture(scope='module')
+def main(tmp_path_factory):
+    """The Flask service, with its uploads/ and outputs/ in a temporary directory"""
+    previous = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('service'))
+    os.environ['JOB_WORKERS'] = '1'
+    try:
+        import main
+        del os.environ['JOB_WORKERS']
+        yield main
+        main.job_queue.shutdown()
+    finally:
+        os.chdir(previous)
+
+
+@pytest.fixture
+def client(main):
+    return main.app.test_client()
+
+
+@pytest.fixture
+def image_key(main):
+    image = np.random.default_rng(0).integers(0, 256, (64, 48), dtype=np.uint8)
+    return main.upload_store.put(cv2.imencode('.png', image)[1].tobytes(), '.png')
+
+
+def test_adjust_revalidation_is_answered_without_a_body(client, image_key):
+    query = {'image': image_key, 'feature': 'compression', 'param': 0.2}
+    first = client.get('/adjust', query_string=query)
+    assert first.status_code == 200 and first.mimetype == 'image/png'
+    etag, _ = first.get_etag()
+    assert cv2.imdecode(np.frombuffer(first.data, np.uint8), cv2.IMREAD_UNCHANGED).shape == (64, 48)
+
+    again = client.get('/adjust', query_string=query, headers={'If-None-Match': f'"{etag}"'})
+    assert again.status_code == 304 and again.data == b''
+    assert again.get_etag()[0] == etag
+
+    other = client.get('/adjust', query_string=dict(query, param=0.3), headers={'If-None-Match': f'"{etag}"'})
+    assert other.status_code == 200 and other.get_etag()[0] != etag
+
+
+def test_legacy_adjust_output_is_removed_with_its_upload(main, client, image_key):
+    response = client.post('/adjust', json={'image': image_key, 'feature': 'compression', 'param': 0.2})
+    output = os.path.join(main.app.config['OUTPUT_FOLDER'], response.get_json()['output'])
+    assert os.path.exists(output)
+
+    main.remove_evicted_outputs()
+    assert os.path.exists(output)
+
+    # Age the upload past max_age so evict() removes it, as it would after an hour unused
+    upload = os.path.join(main.app.config['UPLOAD_FOLDER'], main.upload_store.filename(image_key))
+    old = time.time() - 2 * main.upload_store.max_age
+    os.utime(upload, (old, old))
+    main.upload_store.evict()
+    main.remove_evicted_outputs()
+    assert not os.path.exists(output)
+
+
+def test_jobs_run_in_the_pool_and_serve_a_cacheable_result(main, client, image_key):
+    body = {'image': image_key, 'feature': 'compression', 'param': 0.35}
+    submitted = client.post('/jobs', json=body)
+    assert submitted.status_code == 202
+    job_id = submitted.get_json()['id']
+    assert submitted.headers['Location'].endswith(f'/jobs/{job_id}')
+    # The same request joins the job already queued
+    assert client.post('/jobs', json=body).get_json()['id'] == job_id
+
+    status = client.get(f'/jobs/{job_id}', query_string={'wait': 30}).get_json()
+    assert status['status'] == 'done'
+    result = client.get(status['result'])
+    assert result.status_code == 200 and result.mimetype == 'image/png'
+    expected = main.render_compression(image_key, 0.35)[0]
+    assert result.data == expected
+    revalidated = client.get(status['result'], headers={'If-None-Match': f'"{result.get_etag()[0]}"'})
+    assert revalidated.status_code == 304
+
+    assert client.post('/jobs', json=dict(body, feature='sharpen')).status_code == 400
+    assert client.post('/jobs', json=dict(body, image='0' * 32)).status_code == 400
+    assert client.post('/jobs', json=dict(body, param='high')).status_code == 400
+    assert client.get('/jobs/unknown').status_code == 404
+
+
+def parse_events(text):
+    """(event, data) pairs of a server-sent event stream, skipping comments"""
+    events = []
+    for block in text.strip().split('\n\n'):
+        lines = [line for line in block.split('\n') if not line.startswith(':')]
+        if lines:
+            fields = dict(line.split(': ', 1) for line in lines)
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def test_stream_sends_a_preview_then_the_final_result(main, client, image_key, monkeypatch):
+    # Keep the job queued until the preview has been read, however fast the pool is
+    monkeypatch.setattr(main.job_queue, 'max_workers', 0)
+    response = client.get('/adjust/stream', query_string={'image': image_key, 'feature': 'compression', 'param': 0.45})
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    chunks = iter(response.response)
+    first = next(chunks)
+    with main.job_queue._condition:
+        main.job_queue.max_workers = 1
+        main.job_queue._dispatch()
+    events = parse_events((first + b''.join(chunks)).decode())
+    assert [event for event, _ in events] == ['preview', 'final']
+
+    preview = events[0][1]['image']
+    assert preview.startswith('data:image/png;base64,')
+    decoded = cv2.imdecode(np.frombuffer(base64.b64decode(preview.split(',', 1)[1]), np.uint8),
+                           cv2.IMREAD_UNCHANGED)
+    assert decoded.shape == (64, 48)
+    assert events[1][1]['status'] == 'done'
+    assert client.get(events[1][1]['result']).status_code == 200
+
+    # Once the result exists the preview is skipped
+    again = client.get('/adjust/stream', query_string={'image': image_key, 'feature': 'compression', 'param': 0.45})
+    assert [event for event, _ in parse_events(again.get_data(as_text=True))] == ['final']
+
+
+def test_stream_rejects_unknown_uploads(client):
+    response = client.get('/adjust/stream', query_string={'image': '0' * 32, 'feature': 'compression', 'param': 0.1})
+    assert response.status_code == 400
+
+
+def test_metrics_report_requests_and_stages(client, image_key):
+    client.get('/adjust', query_string={'image': image_key, 'feature': 'compression', 'param': 0.15})
+    response = client.get('/metrics')
+    assert response.content_type == 'text/plain; version=0.0.4; charset=utf-8'
+    text = response.get_data(as_text=True)
+    assert '# TYPE xray_request_seconds histogram' in text
+    assert 'xray_request_seconds_count{endpoint="adjust",status="200"}' in text
+    assert 'xray_stage_seconds_bucket{stage="encode",le="+Inf"}' in text
+    assert 'xray_cache_lookups_total{cache="precompute",result="miss"}' in text
+
+
+def test_request_profiler_stops_even_when_the_view_fails(main, client, tmp_path, monkeypatch):
+    monkeypatch.setitem(main.app.config, 'PROFILE_FOLDER', str(tmp_path))
+    monkeypatch.setitem(main.app.config, 'PROFILE_INTERVAL_MS', 0.1)
+    response = client.post('/adjust', json={'image': '0' * 32, 'feature': 'compression', 'param': 'high'})
+    assert response.status_code == 500
+    assert not [thread for thread in threading.enumerate() if thread.name == 'sampling-profiler']
@@ -0,0 +1,58 @@
+import os
+import sys
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from xraydsp.spectrumCache import (
+    SpectrumCache, compress, compute_spectrum, preview_image, reconstruct, reconstruct_preview,
+)
+
+
+def full_spectrum_compress(image, cutoff_ratio):
+    """Circular low-pass through a complex fft2 of the whole image, as the service used to run it"""
+    rows, cols = image.shape
+    cutoff = int(cutoff_ratio * min(rows, cols))
+    row, col = np.ogrid[:rows, :cols]
+    mask = (row - rows // 2) ** 2 + (col - cols // 2) ** 2 <= cutoff * cutoff
+    shifted = np.fft.fftshift(np.fft.fft2(image)) * mask
+    restored = np.abs(np.fft.ifft2(np.fft.ifftshift(shifted)))
+    return cv2.normalize(restored, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+
+
+@pytest.fixture(params=[(64, 48), (63, 49)], ids=str)
+def image(request):
+    return np.random.default_rng(0).integers(0, 256, request.param, dtype=np.uint8)
+
+
+@pytest.mark.parametrize('cutoff_ratio', [0.05, 0.2, 0.5])
+def test_half_spectrum_matches_the_full_transform(image, cutoff_ratio):
+    compressed = reconstruct(compute_spectrum(image), image.shape, cutoff_ratio)
+    difference = np.abs(compressed.astype(int) - full_spectrum_compress(image, cutoff_ratio))
+    # complex64 storage may move a sample across a rounding boundary, nothing more
+    assert difference.max() <= 1
+    assert np.array_equal(compressed, compress(image, cutoff_ratio))
+
+
+def test_compression_keeps_the_image_type():
+    image = np.random.default_rng(0).integers(0, 4096, (40, 30), dtype=np.uint16)
+    compressed = compress(image, 0.2)
+    assert compressed.dtype == np.uint16 and compressed.max() == 65535
+
+
+def test_previews_fit_the_longest_side():
+    image = np.random.default_rng(0).integers(0, 256, (600, 300), dtype=np.uint8)
+    spectrum = compute_spectrum(image)
+    assert reconstruct_preview(spectrum, image.shape, 0.1, max_side=200).shape == (200, 100)
+    assert preview_image(image, 0.1, max_side=200).shape == (200, 100)
+
+
+def test_least_recently_used_spectra_are_dropped(image):
+    cache = SpectrumCache(max_entries=2)
+    for key in 'abc':
+        cache.put(key, image)
+    assert cache.get('a') is None
+    cache.get('b')
+    cache.put('d', image)
+    assert cache.get('c') is None and cache.get('b') is not None
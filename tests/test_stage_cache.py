@@ -0,0 +1,40 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from stageCache import StageCache, estimate_nbytes
+
+
+def test_a_hit_skips_the_computation():
+    cache = StageCache()
+    calls = []
+    compute = lambda: calls.append(1) or np.ones(10, np.uint8)
+    first = cache.get(('denoise', 3), compute)
+    assert cache.get(('denoise', 3), compute) is first
+    assert len(calls) == 1 and (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_stages_leave_the_budget_first():
+    cache = StageCache(max_bytes=100)
+    for key in 'abc':
+        cache.put(key, np.zeros(30, np.uint8))
+    cache.get('a', lambda: None)
+    cache.put('d', np.zeros(30, np.uint8))
+    assert len(cache) == 3 and cache.nbytes == 90
+    assert cache.get('b', lambda: 'recomputed') == 'recomputed'
+    assert cache.hits == 1
+
+
+def test_outputs_larger_than_the_budget_are_not_stored():
+    cache = StageCache(max_bytes=100)
+    cache.put('small', np.zeros(10, np.uint8))
+    huge = np.zeros(101, np.uint8)
+    assert cache.get('huge', lambda: huge) is huge
+    assert len(cache) == 1 and cache.nbytes == 10
+    cache.clear()
+    assert len(cache) == 0 and cache.nbytes == 0
+
+
+def test_branch_pairs_count_both_arrays():
+    assert estimate_nbytes((np.zeros(4, np.float32), [np.zeros(2, np.uint8)])) == 18
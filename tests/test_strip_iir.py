@@ -0,0 +1,51 @@
+import os
+import sys
+import numpy as np
+import pytest
+from scipy.signal import butter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from xraydsp.iirFilter import StripIIR, filter_strips, iir_filter_2d
+
+FILTERS = {
+    'low-pass': ([0.2, 0.2], [1.0, -0.8]),
+    'high-pass': ([1.0, -1.0], [1.0, -0.5]),
+    'butterworth': butter(3, 0.3),
+}
+
+
+def split(image, heights):
+    strips, start = [], 0
+    for height in heights:
+        strips.append(image[start:start + height])
+        start += height
+    assert start == image.shape[0]
+    return strips
+
+
+@pytest.fixture
+def image():
+    return np.random.default_rng(0).random((120, 90)).astype(np.float32)
+
+
+@pytest.mark.parametrize('name', sorted(FILTERS))
+@pytest.mark.parametrize('heights', [[120], [40] * 3, [1, 2, 1, 50, 66], [1] * 120], ids=len)
+def test_strips_are_bit_identical_to_the_whole_image(image, name, heights):
+    b, a = FILTERS[name]
+    streamed = list(filter_strips(split(image, heights), StripIIR(b, a)))
+    assert [len(strip) for strip in streamed] == heights
+    assert np.array_equal(np.concatenate(streamed), iir_filter_2d(image, b, a))
+
+
+def test_reset_starts_a_new_image(image):
+    strip_filter = StripIIR(*FILTERS['butterworth'])
+    strip_filter.push(image[:30])
+    strip_filter.reset()
+    assert np.array_equal(strip_filter.push(image[:30]), iir_filter_2d(image[:30], *FILTERS['butterworth']))
+
+
+def test_strips_must_continue_the_same_rows(image):
+    strip_filter = StripIIR(*FILTERS['low-pass'])
+    strip_filter.push(image[:10])
+    with pytest.raises(ValueError, match='does not continue'):
+        strip_filter.push(image[10:20, :45])
@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'Digital Filters test'))
+from uploadStore import UploadStore, content_key
+
+
+def png(seed, shape=(32, 32)):
+    image = np.random.default_rng(seed).integers(0, 256, shape, dtype=np.uint8)
+    return cv2.imencode('.png', image)[1].tobytes()
+
+
+def age(store, key, seconds):
+    path = os.path.join(store.folder, store.filename(key))
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_identical_uploads_share_one_file(tmp_path):
+    store = UploadStore(str(tmp_path))
+    data = png(0)
+    assert store.put(data, '.PNG') == store.put(data, '.png') == content_key(data)
+    assert os.listdir(tmp_path) == [content_key(data) + '.png']
+    assert store.put(b'not an image') is None
+
+
+def test_decoded_cache_evicts_the_least_recently_used(tmp_path):
+    # Room for two 32x32 8-bit images
+    store = UploadStore(str(tmp_path), max_bytes=2 * 32 * 32)
+    first, second = store.put(png(0)), store.put(png(1))
+    store.get(first)
+    third = store.put(png(2))
+    assert list(store._entries) == [first, third]
+    assert store.nbytes == 2 * 32 * 32
+    # Evicted from memory only: the next get() decodes the stored file again
+    assert store.get(second).shape == (32, 32)
+
+
+def test_files_are_evicted_by_last_access_not_upload_time(tmp_path):
+    store = UploadStore(str(tmp_path), max_age=100)
+    used, unused = store.put(png(0)), store.put(png(1))
+    for key in (used, unused):
+        age(store, key, 110)
+    # get() refreshes a file at most once per max_age/8 and put() just did, so forget that
+    store._touched.clear()
+    assert store.get(used) is not None
+
+    store.evict()
+    assert store.filename(used) is not None
+    assert store.filename(unused) is None
+    # The decoded copy goes with the file
+    assert store.get(unused) is None
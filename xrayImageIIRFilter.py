@@ -1,12 +1,28 @@
+import os
+import sys
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import cv2
-import numpy as np
-from scipy.signal import lfilter, freqz
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from PIL import Image, ImageTk
 
+from renderScheduler import RenderScheduler, Superseded
+from stageCache import StageCache
+from responsePlot import FrequencyResponsePlot
+from xraydsp.imageDepth import file_bit_depth, full_scale, load_grayscale, to_float32, to_uint8
+from xraydsp.metrics import recording, stage
+from xraydsp.parallelBands import configure
+from xraydsp.enhancement import apply_iir_filter, build_proxy, combine_branches, gaussian_denoise, \
+    slider_coefficients
+
+DISPLAY_SIZE = 400
+# Milliseconds without slider movement before the full-resolution pass runs
+IDLE_DELAY_MS = 300
+# XRAY_STAGE_TIMINGS=overlay shows each render's stage timings under the
+# images at startup; =log prints them to stderr
+STAGE_TIMINGS = os.environ.get('XRAY_STAGE_TIMINGS', '').lower()
+
+
 class XRayImageProcessor:
     def __init__(self, master):
         # Configure root window
@@ -50,6 +66,13 @@ class XRayImageProcessor:
         # Create UI components
         self.create_ui_components()
 
+        # Intermediate stages keyed by their inputs, reused across slider moves
+        self.stage_cache = StageCache()
+
+        # Slider updates are rendered off the Tk thread, newest state only
+        self.scheduler = RenderScheduler(master, self.render_images, self.display_images)
+        master.protocol("WM_DELETE_WINDOW", self.close)
+
     def create_ui_components(self):
         # Header
         header_frame = ttk.Frame(self.scrollable_frame)
@@ -91,6 +114,19 @@ class XRayImageProcessor:
         self.enhanced_label = ttk.Label(enhanced_frame)
         self.enhanced_label.pack(fill=tk.BOTH, expand=True)
 
+        # Optional per-stage timing overlay for the last render
+        timings_frame = ttk.Frame(self.scrollable_frame)
+        timings_frame.pack(fill=tk.X, padx=10)
+        self.show_timings = tk.BooleanVar(value=STAGE_TIMINGS == 'overlay')
+        ttk.Checkbutton(
+            timings_frame,
+            text="Show stage timings",
+            variable=self.show_timings,
+            command=lambda: self.timings_label.config(text='')
+        ).pack(side=tk.LEFT)
+        self.timings_label = ttk.Label(timings_frame, font=('Courier', 9))
+        self.timings_label.pack(side=tk.LEFT, padx=10)
+
         # Filter Controls Section
         filter_controls_frame = ttk.LabelFrame(
             self.scrollable_frame, 
@@ -156,11 +192,17 @@ class XRayImageProcessor:
         # Embed matplotlib in Tkinter
         self.canvas_widget = FigureCanvasTkAgg(self.fig, master=freq_response_frame)
         self.canvas_widget.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.response_plot = FrequencyResponsePlot(self.fig, self.ax1, self.ax2, self.canvas_widget)
 
         # Initialize image variables
         self.image_original = None
-        self.image = None
+        self.bits = None
         self.enhanced_image = None
+        self.image_proxy = None
+        self.proxy_factor = 1.0
+        self.idle_job = None
+        self.upload_id = 0
+        self.original_photo_key = None
 
     def create_parameter_slider(self, parent, name, variable, range_val, tooltip):
         """Create a slider with label and info button"""
@@ -187,9 +229,10 @@ class XRayImageProcessor:
             to=range_val[1], 
             orient=tk.HORIZONTAL, 
             variable=variable, 
-            command=self.update_filters
+            command=self.preview_filters
         )
         slider.pack(side=tk.LEFT, expand=True, fill=tk.X)
+        slider.bind("<ButtonRelease-1>", self.update_filters)
 
         # Current Value Label
         value_label = ttk.Label(frame, textvariable=variable, width=5)
@@ -209,15 +252,23 @@ class XRayImageProcessor:
             return
 
         try:
-            # Read image in grayscale
-            self.image_original = cv2.imread(file_path, cv2.IMREAD_GRAYSCALE)
+            # Read image in grayscale, keeping 12-16 bit images at full depth
+            self.image_original = load_grayscale(file_path)
             
             if self.image_original is None:
                 messagebox.showerror("Error", "Could not read the image file")
                 return
 
-            # Normalize image
-            self.image = self.image_original / 255.0
+            # Normalize by the depth the file records (e.g. 12 bits in a 16-bit
+            # PNG), else by the full depth of its type, never by its content
+            self.bits = file_bit_depth(file_path)
+
+            # Display-sized proxy used while a slider is being dragged
+            self.image_proxy, self.proxy_factor = build_proxy(self.image_original, DISPLAY_SIZE)
+
+            # Stages cached for the previous image can never be hit again
+            self.upload_id += 1
+            self.stage_cache.clear()
 
             # Update filters and display images
             self.update_filters()
@@ -227,111 +278,187 @@ class XRayImageProcessor:
 
     def apply_iir_filter(self, image, b, a):
         """Apply IIR filter along rows and columns"""
-        # Apply IIR filter along rows
-        filtered_rows = np.apply_along_axis(lambda row: lfilter(b, a, row), axis=1, arr=image)
-        # Apply IIR filter along columns
-        filtered_image = np.apply_along_axis(lambda col: lfilter(b, a, col), axis=0, arr=filtered_rows)
-        return filtered_image
+        return apply_iir_filter(image, b, a)
 
     def plot_frequency_response(self):
         """Plot frequency response of low-pass and high-pass filters"""
-        if not hasattr(self, 'fig'):
+        if not hasattr(self, 'response_plot'):
             return
 
-        # Clear previous plots
-        self.ax1.clear()
-        self.ax2.clear()
-
         # Get current filter coefficients
         low_b1 = self.filter_parameters[1]['var'].get() / 100.0
         low_a1 = self.filter_parameters[2]['var'].get() / 100.0
         high_b1 = self.filter_parameters[3]['var'].get() / 100.0
         high_a1 = self.filter_parameters[4]['var'].get() / 100.0
 
-        # Low-pass filter coefficients
-        b_low = [low_b1, low_b1]
-        a_low = [1.0, -low_a1]
-
-        # High-pass filter coefficients
-        b_high = [1.0, -high_b1]
-        a_high = [1.0, -high_a1]
-
-        # Compute frequency response
-        w_low, h_low = freqz(b_low, a_low)
-        w_high, h_high = freqz(b_high, a_high)
-
-        # Plot magnitude response for Low-pass filter
-        self.ax1.set_title('Low-pass Filter Frequency Response')
-        self.ax1.plot(w_low, 20 * np.log10(np.abs(h_low)), 'b')
-        self.ax1.set_ylabel('Magnitude [dB]')
-        self.ax1.set_xlabel('Frequency [rad/sample]')
-        self.ax1.grid(True)
-
-        # Plot magnitude response for High-pass filter
-        self.ax2.set_title('High-pass Filter Frequency Response')
-        self.ax2.plot(w_high, 20 * np.log10(np.abs(h_high)), 'r')
-        self.ax2.set_ylabel('Magnitude [dB]')
-        self.ax2.set_xlabel('Frequency [rad/sample]')
-        self.ax2.grid(True)
+        # Low-pass and high-pass filter coefficients
+        b_low, a_low, b_high, a_high = slider_coefficients(low_b1, low_a1, high_b1, high_a1)
 
-        # Adjust layout and redraw
-        plt.tight_layout()
-        self.canvas_widget.draw()
-
-    def update_filters(self, val=None):
-        """Update image filters based on slider values"""
-        if self.image is None:
-            return
+        # Update the existing lines instead of rebuilding the axes
+        self.response_plot.update(b_low, a_low, b_high, a_high)
 
+    def current_parameters(self, preview=False):
+        """Snapshot the image and slider values for a background render"""
         # Get noise reduction level (ensure odd)
         noise_level = self.filter_parameters[0]['var'].get()
         if noise_level % 2 == 0:
             noise_level += 1
 
-        # Apply noise reduction
-        denoised_image = cv2.GaussianBlur(self.image_original, (noise_level, noise_level), 0)
-
         # Get current slider values for filters
         low_b1 = self.filter_parameters[1]['var'].get() / 100.0
         low_a1 = self.filter_parameters[2]['var'].get() / 100.0
         high_b1 = self.filter_parameters[3]['var'].get() / 100.0
         high_a1 = self.filter_parameters[4]['var'].get() / 100.0
 
-        # Update filter coefficients
-        b_low = [low_b1, low_b1]
-        a_low = [1.0, -low_a1]
-        b_high = [1.0, -high_b1]
-        a_high = [1.0, -high_a1]
+        if preview:
+            image, factor = self.image_proxy, self.proxy_factor
+        else:
+            image, factor = self.image_original, 1.0
+        return (image, self.upload_id, factor, self.bits,
+                noise_level, low_b1, low_a1, high_b1, high_a1)
 
-        # Apply filters
-        low_passed = self.apply_iir_filter(denoised_image / 255.0, b_low, a_low)
-        high_passed = self.apply_iir_filter(denoised_image / 255.0, b_high, a_high)
-
-        # Combine results
-        enhanced_image = low_passed + high_passed
-
-        # Rescale for visualization
-        enhanced_image = np.clip(enhanced_image, 0, 1) * 255.0
-        enhanced_image = enhanced_image.astype(np.uint8)
+    def preview_filters(self, val=None):
+        """Render the proxy while dragging, then the full image once idle"""
+        if self.image_original is None:
+            return
+        self.scheduler.submit(self.current_parameters(preview=True))
 
-        # Display original image
-        original_pil = Image.fromarray(self.image_original)
-        original_pil = original_pil.resize((400, 400), Image.LANCZOS)
-        original_photo = ImageTk.PhotoImage(original_pil)
-        self.original_label.config(image=original_photo)
-        self.original_label.image = original_photo
+        if self.idle_job is not None:
+            self.master.after_cancel(self.idle_job)
+        self.idle_job = self.master.after(IDLE_DELAY_MS, self.update_filters)
 
-        # Display enhanced image
-        enhanced_pil = Image.fromarray(enhanced_image)
-        enhanced_pil = enhanced_pil.resize((400, 400), Image.LANCZOS)
-        enhanced_photo = ImageTk.PhotoImage(enhanced_pil)
-        self.enhanced_label.config(image=enhanced_photo)
-        self.enhanced_label.image = enhanced_photo
+    def update_filters(self, val=None):
+        """Queue a full-resolution render of the current slider values"""
+        if self.idle_job is not None:
+            self.master.after_cancel(self.idle_job)
+            self.idle_job = None
+        if self.image_original is None:
+            return
+        self.scheduler.submit(self.current_parameters())
+
+    def close(self):
+        """Stop the render worker and its poll loop, then close the window"""
+        if self.idle_job is not None:
+            self.master.after_cancel(self.idle_job)
+            self.idle_job = None
+        self.scheduler.close()
+        self.master.destroy()
+
+    def render_images(self, params, generation=None):
+        """Compute the display images for params (runs on the render worker)"""
+        with recording() as timings:
+            upload_id, original_pil, enhanced_pil = self.render_stages(params, generation)
+        return upload_id, original_pil, enhanced_pil, timings
+
+    def render_stages(self, params, generation=None):
+        """The cached render stages, each timed by metrics.stage.
+
+        With a generation, the render stops between stages once the scheduler
+        has a newer request; stages already finished stay cached for it.
+        """
+        image, upload_id, factor, bits, noise_level, low_b1, low_a1, high_b1, high_a1 = params
+        scale = full_scale(image, bits)
+        cache = self.stage_cache
+        source = (upload_id, factor)
+        display_size = (DISPLAY_SIZE, DISPLAY_SIZE)
+
+        def check_stale():
+            if generation is not None and self.scheduler.is_stale(generation):
+                raise Superseded()
+
+        # Apply noise reduction, shrinking the blur to match the proxy scale
+        def denoise():
+            with stage('denoise'):
+                return gaussian_denoise(image, noise_level, factor)
+
+        def normalize():
+            denoised = cache.get(denoised_key, denoise)
+            check_stale()
+            with stage('normalize'):
+                return to_float32(denoised, scale)
+
+        denoised_key = ('denoise',) + source + (noise_level,)
+        normalized_image = cache.get(('normalized',) + denoised_key, normalize)
+
+        # Update filter coefficients, resampled to the proxy's scale
+        b_low, a_low, b_high, a_high = slider_coefficients(low_b1, low_a1, high_b1, high_a1, factor)
+
+        def iir(name, b, a):
+            check_stale()
+            with stage(name):
+                # Row and column bands on every core the render may use
+                return apply_iir_filter(normalized_image, b, a, workers=None)
+
+        # Apply filters; each branch is cached on its own so moving one
+        # branch's sliders leaves the other branch's result reusable
+        low_passed = cache.get(
+            ('low',) + denoised_key + (tuple(b_low), tuple(a_low)),
+            lambda: iir('iir_low', b_low, a_low)
+        )
+        high_passed = cache.get(
+            ('high',) + denoised_key + (tuple(b_high), tuple(a_high)),
+            lambda: iir('iir_high', b_high, a_high)
+        )
 
-        # Update frequency response plot
-        self.plot_frequency_response()
+        def enhance():
+            check_stale()
+            # Combine results
+            with stage('combine'):
+                # Sum the branches and rescale for visualization
+                enhanced_image = combine_branches(low_passed, high_passed)
+            with stage('resize'):
+                return Image.fromarray(enhanced_image).resize(display_size, Image.LANCZOS)
+
+        def resize_original():
+            with stage('resize_original'):
+                return Image.fromarray(to_uint8(image, bits)).resize(display_size, Image.LANCZOS)
+
+        # Resize for display; PhotoImage itself must be built on the Tk thread
+        enhanced_pil = cache.get(('display', params[1:]), enhance)
+        original_pil = cache.get(('display_original', upload_id), resize_original)
+        return upload_id, original_pil, enhanced_pil
+
+    def display_images(self, params, frame):
+        """Show a finished render (runs on the Tk thread)"""
+        if isinstance(frame, Exception):
+            messagebox.showerror("Error", f"An error occurred: {str(frame)}")
+            return
+        upload_id, original_pil, enhanced_pil, render_timings = frame
+
+        with recording() as display_timings:
+            with stage('photo'):
+                # Display original image, which only changes on upload
+                if self.original_photo_key != upload_id:
+                    original_photo = ImageTk.PhotoImage(original_pil)
+                    self.original_label.config(image=original_photo)
+                    self.original_label.image = original_photo
+                    self.original_photo_key = upload_id
+
+                # Display enhanced image
+                enhanced_photo = ImageTk.PhotoImage(enhanced_pil)
+                self.enhanced_label.config(image=enhanced_photo)
+                self.enhanced_label.image = enhanced_photo
+
+            # Update frequency response plot
+            with stage('plot'):
+                self.plot_frequency_response()
+
+        self.report_timings('preview' if params[2] != 1 else 'full', render_timings + display_timings)
+
+    def report_timings(self, kind, timings):
+        """Show or log the stages of the last render; cached stages do not appear"""
+        if not self.show_timings.get() and STAGE_TIMINGS != 'log':
+            return
+        total = sum(seconds for _, seconds in timings)
+        text = f"{kind:<7} {total * 1e3:7.1f} ms | " + "  ".join(
+            f"{name} {seconds * 1e3:.1f}" for name, seconds in timings)
+        if self.show_timings.get():
+            self.timings_label.config(text=text)
+        if STAGE_TIMINGS == 'log':
+            print(text, file=sys.stderr)
 
 def main():
+    configure()
     root = tk.Tk()
     app = XRayImageProcessor(root)
     root.mainloop()
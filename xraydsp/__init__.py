@@ -0,0 +1,80 @@
+"""Headless X-ray DSP: IIR enhancement, Gaussian denoising, FFT compression,
+edge, median and other spatial filters, without any GUI dependency.
+
+Importing the package loads nothing but the standard library. Every name
+below is resolved on first access (PEP 562), so a server worker that only
+compresses never imports scipy.signal, and numpy and OpenCV load with the
+first filter rather than with the package. The command-line tools run
+as modules, e.g. python -m xraydsp.tiledFilter.
+"""
+import importlib
+
+# Public name -> submodule that defines it
+_EXPORTS = {
+    # Image loading and depth handling
+    'load_grayscale': 'imageDepth',
+    'decode_grayscale': 'imageDepth',
+    'bit_depth': 'imageDepth',
+    'file_bit_depth': 'imageDepth',
+    'full_scale': 'imageDepth',
+    'to_float32': 'imageDepth',
+    'from_float32': 'imageDepth',
+    'to_uint8': 'imageDepth',
+    # The Tk app's enhancement pipeline, stage by stage and in one call
+    'gaussian_sigma': 'enhancement',
+    'build_proxy': 'enhancement',
+    'gaussian_denoise': 'enhancement',
+    'slider_coefficients': 'enhancement',
+    'apply_iir_filter': 'enhancement',
+    'combine_branches': 'enhancement',
+    'enhance': 'enhancement',
+    # IIR filtering
+    'iir_filter_2d': 'iirFilter',
+    'iir_filter_pair': 'iirFilter',
+    'resample_first_order': 'iirFilter',
+    'frequency_response': 'iirFilter',
+    'StripIIR': 'iirFilter',
+    'StripIIRPair': 'iirFilter',
+    'filter_strips': 'iirFilter',
+    'TemporalIIR': 'fluoroStream',
+    'FluoroStream': 'fluoroStream',
+    # Spatial filters
+    'denoise': 'noisereduction',
+    'median_filter': 'medianFilter',
+    'bilateral_filter': 'bilateralFIlter',
+    'fir_filter': 'firFilter',
+    'sobel_filter': 'sobelFilter',
+    'laplacian_filter': 'laplacianFilter',
+    'EdgePyramid': 'edgePyramid',
+    'multiscale_edges': 'edgePyramid',
+    # FFT compression
+    'compress': 'spectrumCache',
+    'compute_spectrum': 'spectrumCache',
+    'reconstruct': 'spectrumCache',
+    'preview_image': 'spectrumCache',
+    'SpectrumCache': 'spectrumCache',
+    # Registry, tiling and parallel execution
+    'FILTERS': 'filterRegistry',
+    'apply_filter': 'filterRegistry',
+    'apply_chain': 'filterRegistry',
+    'filter_tiled': 'tiledFilter',
+    'configure': 'parallelBands',
+    'run_bands': 'parallelBands',
+    'filter_bands': 'parallelBands',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module('.' + module, __name__), name)
+    # Later lookups find the name directly and skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,169 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import cv2
+
+from .filterRegistry import FILTERS, apply_chain, parse_chain, pin_bits
+from .imageDepth import file_bit_depth, load_grayscale
+from .parallelBands import configure
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+PROGRESS_FILE = '.batch_progress.jsonl'
+
+
+def collect_inputs(sources):
+    """Expand directories (recursively) and glob patterns into a sorted list of image paths"""
+    paths = set()
+    for source in sources:
+        if os.path.isdir(source):
+            for root, _, files in os.walk(source):
+                for name in files:
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        paths.add(os.path.join(root, name))
+        else:
+            for path in glob.glob(source, recursive=True):
+                if os.path.isfile(path) and path.lower().endswith(IMAGE_EXTENSIONS):
+                    paths.add(path)
+    return sorted(os.path.abspath(path) for path in paths)
+
+
+def output_path(source, input_root, output_dir, extension):
+    """Mirror source's location under input_root into output_dir"""
+    relative = os.path.relpath(source, input_root)
+    return os.path.join(output_dir, os.path.splitext(relative)[0] + extension)
+
+
+def process_image(source, destination, chain):
+    """Read, filter and write one image (runs in a worker process)"""
+    image = load_grayscale(source)
+    if image is None:
+        raise ValueError(f"Could not load image from {source}")
+    result = apply_chain(image, pin_bits(chain, file_bit_depth(source)))
+
+    # Write under a temporary name so an interrupted run never leaves a partial output
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    root, extension = os.path.splitext(destination)
+    temporary = f"{root}.partial{extension}"
+    if not cv2.imwrite(temporary, result):
+        raise ValueError(f"Could not write {destination}")
+    os.replace(temporary, destination)
+    return image.size
+
+
+def load_progress(progress_path):
+    """Return the set of sources a previous run finished"""
+    done = set()
+    if os.path.exists(progress_path):
+        with open(progress_path) as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)['source'])
+                except (ValueError, KeyError):
+                    continue  # a line cut short by an interrupted run
+    return done
+
+
+def run_batch(sources, output_dir, chain, workers=None, prefetch=2, resume=False,
+              extension='.png', report_every=5.0):
+    """Filter every input image on a process pool, returning a summary dict"""
+    inputs = collect_inputs(sources)
+    if not inputs:
+        return {'processed': 0, 'skipped': 0, 'failed': 0, 'seconds': 0.0}
+    input_root = os.path.commonpath([os.path.dirname(path) for path in inputs])
+
+    os.makedirs(output_dir, exist_ok=True)
+    progress_path = os.path.join(output_dir, PROGRESS_FILE)
+    done = load_progress(progress_path) if resume else set()
+    pending = [path for path in inputs
+               if not (path in done and os.path.exists(output_path(path, input_root, output_dir, extension)))]
+    skipped = len(inputs) - len(pending)
+
+    workers = workers or os.cpu_count() or 1
+    # Bound the tasks in flight so reads and writes never run far ahead of the pool
+    max_in_flight = max(1, workers * prefetch)
+
+    processed = failed = pixels = 0
+    start = last_report = time.perf_counter()
+    # One image per process already fills the cores, so each process keeps
+    # OpenCV and its band pool single-threaded rather than fanning out again
+    with open(progress_path, 'a' if resume else 'w') as progress, \
+            ProcessPoolExecutor(max_workers=workers, initializer=configure, initargs=(1, 1)) as executor:
+        queue = iter(pending)
+        in_flight = {}
+        while True:
+            while len(in_flight) < max_in_flight:
+                source = next(queue, None)
+                if source is None:
+                    break
+                destination = output_path(source, input_root, output_dir, extension)
+                in_flight[executor.submit(process_image, source, destination, chain)] = source
+            if not in_flight:
+                break
+
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                source = in_flight.pop(future)
+                try:
+                    pixels += future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"error: {source}: {e}", file=sys.stderr)
+                    continue
+                processed += 1
+                progress.write(json.dumps({'source': source}) + '\n')
+            progress.flush()
+
+            now = time.perf_counter()
+            if report_every and now - last_report >= report_every:
+                last_report = now
+                elapsed = now - start
+                print(f"{processed + failed}/{len(pending)} images, "
+                      f"{processed / elapsed:.1f} images/s", file=sys.stderr)
+
+    seconds = time.perf_counter() - start
+    return {
+        'processed': processed,
+        'skipped': skipped,
+        'failed': failed,
+        'seconds': seconds,
+        'images_per_second': processed / seconds if seconds else 0.0,
+        'megapixels_per_second': pixels / 1e6 / seconds if seconds else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Apply a filter or a chain of filters to many images in parallel.",
+        epilog="Filters: " + ", ".join(f"{name} ({spec.description}; defaults {spec.defaults})"
+                                       for name, spec in FILTERS.items()),
+    )
+    parser.add_argument('inputs', nargs='+', help="image directories or glob patterns")
+    parser.add_argument('-o', '--output', required=True, help="output directory")
+    parser.add_argument('-f', '--filter', dest='chain', nargs='+', required=True,
+                        help="filter steps applied in order, e.g. median:filter_strength=5 sobel")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--prefetch', type=int, default=2, help="tasks queued per worker")
+    parser.add_argument('--resume', action='store_true', help="skip images finished by a previous run")
+    parser.add_argument('--ext', default='.png', help="output file extension")
+    args = parser.parse_args(argv)
+
+    try:
+        chain = parse_chain(args.chain)
+    except ValueError as e:
+        parser.error(str(e))
+
+    summary = run_batch(args.inputs, args.output, chain, workers=args.workers,
+                        prefetch=args.prefetch, resume=args.resume, extension=args.ext)
+    print(f"Processed {summary['processed']} images ({summary['skipped']} skipped, "
+          f"{summary['failed']} failed) in {summary['seconds']:.2f}s: "
+          f"{summary.get('images_per_second', 0):.1f} images/s, "
+          f"{summary.get('megapixels_per_second', 0):.1f} MP/s")
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
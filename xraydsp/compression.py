@@ -0,0 +1,38 @@
+from .imageDepth import load_grayscale
+from .spectrumCache import compress
+
+
+def compress_image(image_path, cutoff_ratio):
+    # Load the image in grayscale
+    image = load_grayscale(image_path)
+    
+    if image is None:
+        raise FileNotFoundError(f"Could not load image from {image_path}")
+
+    return image, compress(image, cutoff_ratio)
+
+if __name__ == "__main__":
+    # Only the demo needs a display
+    import matplotlib.pyplot as plt
+
+    # Parameters
+    image_path = "uploads/image_upload.png"  # Updated image path
+    cutoff_ratio = 0.6  # Ratio of frequencies to retain (0.2 = 20%)
+
+    # Compress the image
+    original_image, compressed_image = compress_image(image_path, cutoff_ratio)
+
+    # Display the images
+    plt.figure(figsize=(10, 5))
+    plt.subplot(1, 2, 1)
+    plt.title("Original Image")
+    plt.imshow(original_image, cmap="gray")
+    plt.axis("off")
+
+    plt.subplot(1, 2, 2)
+    plt.title(f"Compressed Image\n(Cutoff Ratio: {cutoff_ratio})")
+    plt.imshow(compressed_image, cmap="gray")
+    plt.axis("off")
+
+    plt.tight_layout()
+    plt.show()
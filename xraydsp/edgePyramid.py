@@ -0,0 +1,138 @@
+from collections import namedtuple
+import cv2
+import numpy as np
+
+# Views of one pyramid level's buffers; maps that were not requested are None
+EdgeMaps = namedtuple('EdgeMaps', ['image', 'grad_x', 'grad_y', 'magnitude', 'orientation', 'laplacian'])
+
+OUTPUTS = ('magnitude', 'orientation', 'laplacian')
+
+
+class EdgePyramid:
+    """Gradients, magnitude, orientation and Laplacian of one image at several scales.
+
+    The image is reduced once into a Gaussian pyramid (cv2.pyrDown) and the
+    same small Sobel and Laplacian kernels run on every level, so level L
+    sees edges about 2**L times coarser than level 0 for a quarter of the
+    work per level, where a large-kernel call at full resolution would cost
+    more at every scale. Everything is float32 in the image's own units, and
+    values at level L are per level-L pixel, so levels compare directly.
+
+    Buffers are allocated for the first image and reused by every later
+    update() of the same shape, e.g. for each frame of a sequence.
+    """
+
+    def __init__(self, levels=4, ksize=3, laplacian_ksize=None, outputs=OUTPUTS):
+        unknown = set(outputs) - set(OUTPUTS)
+        if unknown:
+            raise ValueError(f"Unknown edge outputs {sorted(unknown)}. Available: {', '.join(OUTPUTS)}")
+        self.levels = levels
+        self.ksize = ksize
+        self.laplacian_ksize = ksize if laplacian_ksize is None else laplacian_ksize
+        self.outputs = tuple(outputs)
+        self.shape = None
+        self._maps = []
+        self._scratch = []
+
+    def update(self, image):
+        """Rebuild the pyramid and every requested map for a new image"""
+        if image.shape != self.shape:
+            self._allocate(image.shape)
+        gradients = 'magnitude' in self.outputs or 'orientation' in self.outputs
+
+        np.copyto(self._maps[0].image, image, casting='unsafe')
+        for level, maps in enumerate(self._maps):
+            if level:
+                cv2.pyrDown(self._maps[level - 1].image, dst=maps.image)
+            if gradients:
+                cv2.Sobel(maps.image, cv2.CV_32F, 1, 0, dst=maps.grad_x, ksize=self.ksize)
+                cv2.Sobel(maps.image, cv2.CV_32F, 0, 1, dst=maps.grad_y, ksize=self.ksize)
+            if 'orientation' in self.outputs:
+                cv2.phase(maps.grad_x, maps.grad_y, maps.orientation)
+            if 'magnitude' in self.outputs:
+                # In place as in sobelFilter.sobel_filter, without touching the gradients
+                squared = self._scratch[level]
+                np.multiply(maps.grad_x, maps.grad_x, out=maps.magnitude)
+                np.multiply(maps.grad_y, maps.grad_y, out=squared)
+                np.add(maps.magnitude, squared, out=maps.magnitude)
+                np.sqrt(maps.magnitude, out=maps.magnitude)
+            if 'laplacian' in self.outputs:
+                cv2.Laplacian(maps.image, cv2.CV_32F, dst=maps.laplacian, ksize=self.laplacian_ksize)
+        return self
+
+    def level(self, index):
+        """The maps of one level; they are overwritten by the next update()"""
+        return self._maps[index]
+
+    def upsample(self, array, level, out=None):
+        """Bilinearly map one level's array back onto the full-resolution grid.
+
+        Sample i of level L sits on full-resolution pixel i * 2**L, as
+        pyrDown places it, rather than at cv2.resize's pixel-area centres.
+        """
+        if level == 0:
+            if out is None:
+                return array
+            np.copyto(out, array)
+            return out
+        height, width = self.shape
+        scale = 1.0 / 2 ** level
+        transform = np.array([[scale, 0, 0], [0, scale, 0]], dtype=np.float64)
+        return cv2.warpAffine(array, transform, (width, height), dst=out,
+                              flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP, borderMode=cv2.BORDER_REPLICATE)
+
+    def full_resolution(self, name, level, out=None):
+        """One named map of one level at full resolution"""
+        return self.upsample(getattr(self._maps[level], name), level, out)
+
+    def combined(self, name='magnitude', levels=None, out=None):
+        """Per-pixel maximum of a map over levels, at full resolution.
+
+        For the Laplacian the strongest response of either sign is kept.
+        """
+        levels = range(self.levels) if levels is None else levels
+        result = None
+        upsampled = np.empty(self.shape, np.float32)
+        for level in levels:
+            values = self.full_resolution(name, level, upsampled)
+            if name == 'laplacian':
+                values = np.absolute(values, out=upsampled)
+            if result is None:
+                result = np.empty(self.shape, np.float32) if out is None else out
+                np.copyto(result, values)
+            else:
+                np.maximum(result, values, out=result)
+        return result
+
+    def _allocate(self, shape):
+        self.shape = shape
+        self._maps = []
+        self._scratch = []
+        height, width = shape
+        for level in range(self.levels):
+            if level:
+                # pyrDown's output size
+                height, width = (height + 1) // 2, (width + 1) // 2
+            buffers = {'image': np.empty((height, width), np.float32)}
+            gradients = 'magnitude' in self.outputs or 'orientation' in self.outputs
+            for name in ('grad_x', 'grad_y'):
+                buffers[name] = np.empty((height, width), np.float32) if gradients else None
+            for name in OUTPUTS:
+                buffers[name] = np.empty((height, width), np.float32) if name in self.outputs else None
+            self._maps.append(EdgeMaps(**buffers))
+            self._scratch.append(np.empty((height, width), np.float32) if 'magnitude' in self.outputs else None)
+
+
+def edge_map(image, name, scale, ksize):
+    """One full-resolution map of image at pyramid level scale, in image.dtype"""
+    pyramid = EdgePyramid(levels=scale + 1, ksize=ksize, outputs=(name,)).update(image)
+    result = pyramid.full_resolution(name, scale)
+    if name == 'laplacian':
+        np.absolute(result, out=result)
+    return result.astype(image.dtype, copy=False)
+
+
+def multiscale_edges(image, levels, ksize):
+    """Strongest Sobel magnitude over levels pyramid scales, in image.dtype"""
+    pyramid = EdgePyramid(levels=levels, ksize=ksize, outputs=('magnitude',)).update(image)
+    return pyramid.combined('magnitude').astype(image.dtype, copy=False)
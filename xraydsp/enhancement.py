@@ -0,0 +1,73 @@
+import cv2
+import numpy as np
+
+from .imageDepth import from_float32, full_scale, to_float32
+from .iirFilter import iir_filter_2d, resample_first_order
+from .noisereduction import denoise
+
+# Longer side of the proxy filtered while a slider is being dragged
+PROXY_SIZE = 400
+
+
+def gaussian_sigma(kernel_size):
+    """Sigma OpenCV derives for a Gaussian kernel size when sigma is 0"""
+    return 0.3 * ((kernel_size - 1) * 0.5 - 1) + 0.8
+
+
+def build_proxy(image, size=PROXY_SIZE):
+    """Downscale image so its longer side is size, returning the proxy and scale factor"""
+    rows, cols = image.shape[:2]
+    factor = max(rows, cols) / size
+    if factor <= 1:
+        return image, 1.0
+    proxy_shape = (max(1, round(cols / factor)), max(1, round(rows / factor)))
+    return cv2.resize(image, proxy_shape, interpolation=cv2.INTER_AREA), factor
+
+
+def gaussian_denoise(image, noise_level, factor=1.0):
+    """Gaussian blur with an odd kernel of about noise_level, shrunk to match a proxy's scale"""
+    if noise_level % 2 == 0:
+        noise_level += 1
+    if factor == 1:
+        return denoise(image, noise_level)
+    return cv2.GaussianBlur(image, (0, 0), gaussian_sigma(noise_level) / factor)
+
+
+def slider_coefficients(low_b1, low_a1, high_b1, high_a1, factor=1.0):
+    """(b_low, a_low, b_high, a_high) of the first-order branches for the given slider values.
+
+    On a proxy downscaled by factor the sections are resampled so their
+    impulse responses cover the same physical distance as at full size.
+    """
+    b_low, a_low = [low_b1, low_b1], [1.0, -low_a1]
+    b_high, a_high = [1.0, -high_b1], [1.0, -high_a1]
+    if factor != 1:
+        b_low, a_low = resample_first_order(b_low, a_low, factor)
+        b_high, a_high = resample_first_order(b_high, a_high, factor)
+    return b_low, a_low, b_high, a_high
+
+
+def apply_iir_filter(image, b, a, workers=None):
+    """Apply IIR filter along rows and columns"""
+    return iir_filter_2d(image, b, a, workers=workers)
+
+
+def combine_branches(low_passed, high_passed):
+    """Sum of the two branches as an 8-bit image for display"""
+    enhanced_image = low_passed + high_passed
+    return from_float32(enhanced_image, np.uint8, 255.0)
+
+
+def enhance(image, noise_level=3, low_b1=0.2, low_a1=0.8, high_b1=1.0, high_a1=0.5,
+            bits=None, factor=1.0, workers=None):
+    """The Tk app's whole enhancement of one image, without a display.
+
+    Denoise, normalize by bits (by default the full depth of the image's
+    type), run the low- and high-pass IIR branches and return their 8-bit sum.
+    """
+    scale = full_scale(image, bits)
+    normalized_image = to_float32(gaussian_denoise(image, noise_level, factor), scale)
+    b_low, a_low, b_high, a_high = slider_coefficients(low_b1, low_a1, high_b1, high_a1, factor)
+    low_passed = apply_iir_filter(normalized_image, b_low, a_low, workers)
+    high_passed = apply_iir_filter(normalized_image, b_high, a_high, workers)
+    return combine_branches(low_passed, high_passed)
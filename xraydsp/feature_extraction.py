@@ -0,0 +1,67 @@
+import cv2
+import numpy as np
+
+from .edgePyramid import edge_map
+from .imageDepth import load_grayscale
+
+def feature_map(image, kernel_size, scale=0):
+    """Compute the Sobel gradient magnitude of a blurred image array
+
+    pyrDown blurs with the same 5x5 kernel before decimating, so scale > 0
+    takes the gradients from that level of a Gaussian pyramid instead.
+    """
+    if scale:
+        return edge_map(image, 'magnitude', scale, kernel_size)
+
+    # Apply Gaussian blur to reduce noise
+    blurred_image = cv2.GaussianBlur(image, (5, 5), 0)
+    
+    # Apply Sobel operator to detect edges (can be used as a feature extraction filter)
+    grad_x = cv2.Sobel(blurred_image, cv2.CV_32F, 1, 0, ksize=kernel_size)
+    grad_y = cv2.Sobel(blurred_image, cv2.CV_32F, 0, 1, ksize=kernel_size)
+    
+    # Calculate gradient magnitude in place (see sobelFilter.sobel_filter)
+    grad_x *= grad_x
+    grad_y *= grad_y
+    grad_x += grad_y
+    gradient_magnitude = np.sqrt(grad_x, out=grad_x)
+    
+    # Back to the input's sample type
+    feature_image = gradient_magnitude.astype(image.dtype, copy=False)
+    
+    return feature_image
+
+def extract_features(image_path, kernel_size):
+    # Load the image in grayscale
+    image = load_grayscale(image_path)
+    
+    if image is None:
+        raise FileNotFoundError(f"Could not load image from {image_path}")
+
+    return image, feature_map(image, kernel_size)
+
+if __name__ == "__main__":
+    # Only the demo needs a display
+    import matplotlib.pyplot as plt
+
+    # Parameters
+    image_path = "uploads/image_upload.png"  # Replace with your image path
+    kernel_size = 1  # You can vary this value to control the extraction strength
+
+    # Feature extraction
+    original_image, feature_image = extract_features(image_path, kernel_size)
+
+    # Display the images
+    plt.figure(figsize=(10, 5))
+    plt.subplot(1, 2, 1)
+    plt.title("Original Image")
+    plt.imshow(original_image, cmap="gray")
+    plt.axis("off")
+
+    plt.subplot(1, 2, 2)
+    plt.title(f"Feature Extracted Image\n(Kernel Size: {kernel_size})")
+    plt.imshow(feature_image, cmap="gray")
+    plt.axis("off")
+
+    plt.tight_layout()
+    plt.show()
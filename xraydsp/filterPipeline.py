@@ -0,0 +1,190 @@
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import cv2
+import numpy as np
+
+from .filterRegistry import apply_filter, get_spec
+from .imageDepth import from_float32, to_float32
+from .iirFilter import iir_filter_pair
+
+SOURCE = 'input'
+
+Node = namedtuple('Node', ['name', 'function', 'inputs', 'params', 'inplace'])
+
+
+def freeze(value):
+    """Hashable form of a parameter value, used to spot identical steps"""
+    if isinstance(value, np.ndarray):
+        return ('ndarray', value.dtype.str, value.shape, value.tobytes())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+    return value
+
+
+class Pipeline:
+    """A DAG of image steps that runs shared work once.
+
+    Steps are declared with add(); a step whose function, parameters and
+    inputs match an existing step becomes an alias of it, so common
+    subgraphs (e.g. the Gaussian blur every edge filter starts from) are
+    computed once. run() executes independent branches concurrently on a
+    thread pool (OpenCV and NumPy release the GIL), lets steps marked
+    inplace overwrite their first input when nothing else still needs it,
+    releases intermediates as soon as their last consumer has run, and
+    reports the wall time of every step.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.aliases = {}
+        self._signatures = {}
+
+    def resolve(self, name):
+        """Follow aliases to the step that actually computes name"""
+        while name in self.aliases:
+            name = self.aliases[name]
+        return name
+
+    def add(self, name, function, *inputs, inplace=False, **params):
+        """Declare a step computing function(*inputs, **params); returns its name"""
+        if name == SOURCE or name in self.nodes or name in self.aliases:
+            raise ValueError(f"Step '{name}' is already defined")
+        inputs = tuple(self.resolve(step) for step in inputs)
+        for step in inputs:
+            if step != SOURCE and step not in self.nodes:
+                raise ValueError(f"Step '{name}' depends on unknown step '{step}'")
+
+        signature = (function, inputs, freeze(params), inplace)
+        existing = self._signatures.get(signature)
+        if existing is not None:
+            self.aliases[name] = existing
+            return name
+
+        self.nodes[name] = Node(name, function, inputs, params, inplace)
+        self._signatures[signature] = name
+        return name
+
+    def add_filter(self, name, filter_name, input_step=SOURCE, **params):
+        """Declare a step running a filter from the registry"""
+        # Unknown names fail when the step is declared, not when the pipeline runs
+        get_spec(filter_name)
+        return self.add(name, run_filter, input_step, filter_name=filter_name, **params)
+
+    def required(self, outputs):
+        """Every step needed to produce outputs"""
+        needed = set()
+        stack = [self.resolve(name) for name in outputs]
+        while stack:
+            name = stack.pop()
+            if name == SOURCE or name in needed:
+                continue
+            needed.add(name)
+            stack.extend(self.nodes[name].inputs)
+        return needed
+
+    def run(self, image, outputs=None, workers=4):
+        """Execute the steps needed for outputs and return (results, timings)"""
+        if outputs is None:
+            # Default to the sinks: steps no other step reads
+            consumed = {step for node in self.nodes.values() for step in node.inputs}
+            outputs = [name for name in list(self.nodes) + list(self.aliases)
+                       if self.resolve(name) not in consumed]
+        targets = {self.resolve(name) for name in outputs}
+        needed = self.required(outputs)
+
+        # How many pending steps still read each buffer
+        consumers = {SOURCE: 0}
+        for name in needed:
+            consumers.setdefault(name, 0)
+            for step in self.nodes[name].inputs:
+                consumers[step] = consumers.get(step, 0) + 1
+
+        buffers = {SOURCE: image}
+        timings = {}
+        remaining = set(needed)
+        running = {}
+
+        def ready(name):
+            return all(step in buffers for step in self.nodes[name].inputs)
+
+        def execute(node, arguments):
+            start = time.perf_counter()
+            result = node.function(*arguments, **node.params)
+            return result, time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while remaining or running:
+                for name in [name for name in remaining if ready(name)]:
+                    remaining.discard(name)
+                    node = self.nodes[name]
+                    arguments = [buffers[step] for step in node.inputs]
+                    if node.inplace and arguments:
+                        first = node.inputs[0]
+                        # Hand over the buffer only if this step is its last reader
+                        # and nobody asked for it as an output
+                        if first == SOURCE or first in targets or consumers[first] > 1:
+                            arguments[0] = arguments[0].copy()
+                    running[executor.submit(execute, node, arguments)] = name
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    result, seconds = future.result()
+                    buffers[name] = result
+                    timings[name] = seconds
+                    for step in self.nodes[name].inputs:
+                        consumers[step] -= 1
+                        if consumers[step] == 0 and step != SOURCE and step not in targets:
+                            del buffers[step]
+
+        results = {name: buffers[self.resolve(name)] for name in outputs}
+        timings.update({alias: timings[self.resolve(alias)] for alias in outputs
+                        if alias in self.aliases and self.resolve(alias) in timings})
+        return results, timings
+
+
+def run_filter(image, filter_name, **params):
+    """apply_filter with the image first, as every pipeline step takes it"""
+    return apply_filter(filter_name, image, **params)
+
+
+def subtract(image, blurred):
+    """Image minus its low-pass version, saturating at zero like cv2.subtract"""
+    return cv2.subtract(image, blurred)
+
+
+def normalize(image):
+    """Image scaled to float32 in [0, 1] by the full depth of its type"""
+    return to_float32(image)
+
+
+def iir_enhance(image, b_low, a_low, b_high, a_high):
+    """Sum of the low-pass and high-pass IIR branches"""
+    return iir_filter_pair(image, b_low, a_low, b_high, a_high)
+
+
+def to_uint8(image):
+    """Clip a [0, 1] float image and rescale it to uint8, reusing its buffer"""
+    return from_float32(image, np.uint8, 255.0)
+
+
+def edge_pipeline(kernel_size=5, sobel_size=3, laplacian_size=3,
+                  b_low=(0.2, 0.2), a_low=(1.0, -0.8), b_high=(1.0, -1.0), a_high=(1.0, -0.5)):
+    """denoise -> {sobel, laplacian, high-pass, IIR enhancement}, sharing one blur"""
+    pipeline = Pipeline()
+    pipeline.add_filter('denoise', 'noise_reduction', kernel_size=kernel_size)
+    pipeline.add_filter('sobel', 'sobel', 'denoise', filter_strength=sobel_size)
+    pipeline.add_filter('laplacian', 'laplacian', 'denoise', filter_strength=laplacian_size)
+    pipeline.add('high_pass', subtract, SOURCE, 'denoise')
+    pipeline.add('normalized', normalize, 'denoise')
+    pipeline.add('iir', iir_enhance, 'normalized', b_low=b_low, a_low=a_low, b_high=b_high, a_high=a_high)
+    pipeline.add('enhanced', to_uint8, 'iir', inplace=True)
+
+    # feature_extraction blurs with a 5x5 kernel before its Sobel; with the
+    # default kernel_size this is the same step as 'denoise' and is shared
+    pipeline.add_filter('features_blur', 'noise_reduction', kernel_size=5)
+    pipeline.add_filter('features', 'sobel', 'features_blur', filter_strength=sobel_size)
+    return pipeline
@@ -0,0 +1,164 @@
+import ast
+import importlib
+from collections import namedtuple
+import numpy as np
+
+# module is a module of this package; function takes (image, **params) and returns an image;
+# halo maps the parameters to how many pixels around an output pixel the filter reads,
+# or is None when every output pixel depends on the whole image
+FilterSpec = namedtuple('FilterSpec', ['module', 'function', 'defaults', 'description', 'halo'])
+
+
+# cv2.filter2D switches to a DFT for kernels this large (130 elements with SSE3,
+# 50 elsewhere), and DFT rounding depends on the size of the whole image; so
+# does overlap-add FFT rounding, which firFilter may pick above the same size
+FIR_DFT_AREA = 50
+
+
+def fir_radius(kernel, method):
+    # Separable passes filter in the spatial domain at any kernel size
+    if np.size(kernel) < FIR_DFT_AREA or method == 'separable':
+        return max(np.shape(kernel)) // 2
+    return None
+
+
+def bilateral_radius(filter_strength, bits, quality):
+    # The approximation's grid depends on where the image starts and on its intensity range
+    if quality is not None:
+        return None
+    # d <= 0 makes OpenCV derive the radius from sigmaSpace=75
+    return filter_strength // 2 if filter_strength > 0 else round(75 * 1.5)
+
+
+def derivative_radius(ksize):
+    # ksize 1 and -1 (Scharr) still use a 3x3 neighbourhood
+    return max(ksize // 2, 1)
+
+
+def pyramid_radius(radius, scale):
+    # Each pyrDown reads 2 pixels either side and the bilinear way back one
+    # more, all measured in pixels of the level they happen on
+    return (radius + 3) * 2 ** scale
+
+
+FILTERS = {
+    'median': FilterSpec('medianFilter', 'median_filter', {'filter_strength': 7, 'workers': 1},
+                         "Median filter (salt-and-pepper noise)",
+                         lambda filter_strength, workers: filter_strength // 2),
+    'bilateral': FilterSpec('bilateralFIlter', 'bilateral_filter',
+                            {'filter_strength': 7, 'bits': None, 'quality': None},
+                            "Edge-preserving bilateral smoothing (quality=1-4 for the fast approximation)",
+                            bilateral_radius),
+    'sobel': FilterSpec('sobelFilter', 'sobel_filter', {'filter_strength': 5, 'scale': 0},
+                        "Sobel gradient magnitude (scale=n on Gaussian pyramid level n)",
+                        lambda filter_strength, scale: pyramid_radius(derivative_radius(filter_strength), scale)
+                        if scale else derivative_radius(filter_strength)),
+    'laplacian': FilterSpec('laplacianFilter', 'laplacian_filter', {'filter_strength': 7, 'scale': 0},
+                            "Absolute Laplacian (scale=n on Gaussian pyramid level n)",
+                            lambda filter_strength, scale: pyramid_radius(derivative_radius(filter_strength), scale)
+                            if scale else derivative_radius(filter_strength)),
+    'fir': FilterSpec('firFilter', 'fir_filter',
+                      {'kernel': [[1, 2, 1], [2, 4, 2], [1, 2, 1]], 'method': 'auto'},
+                      "Normalized 2-D FIR convolution (direct, separable or FFT)",
+                      fir_radius),
+    'noise_reduction': FilterSpec('noisereduction', 'denoise', {'kernel_size': 7},
+                                  "Gaussian blur noise reduction",
+                                  lambda kernel_size: kernel_size // 2),
+    'high_pass': FilterSpec('highPassFilter', 'high_pass_filter', {'filter_strength': 11},
+                            "Image minus its Gaussian blur",
+                            lambda filter_strength: int(filter_strength)),
+    'features': FilterSpec('feature_extraction', 'feature_map', {'kernel_size': 1, 'scale': 0},
+                           "Sobel gradient magnitude of a 5x5-blurred image",
+                           lambda kernel_size, scale: pyramid_radius(derivative_radius(kernel_size), scale)
+                           if scale else 2 + derivative_radius(kernel_size)),
+    'multiscale_edges': FilterSpec('edgePyramid', 'multiscale_edges', {'levels': 4, 'ksize': 3},
+                                   "Strongest Sobel magnitude over a Gaussian pyramid",
+                                   lambda levels, ksize: pyramid_radius(derivative_radius(ksize), levels - 1)),
+    'compression': FilterSpec('spectrumCache', 'compress', {'cutoff_ratio': 0.1},
+                              "Circular FFT low-pass, normalized to the input's full scale",
+                              None),
+}
+
+
+def get_spec(name):
+    """Return the FilterSpec registered under name"""
+    if name not in FILTERS:
+        raise KeyError(f"Unknown filter '{name}'. Available: {', '.join(sorted(FILTERS))}")
+    return FILTERS[name]
+
+
+def get_filter(name):
+    """Return the array function registered under name"""
+    spec = get_spec(name)
+    # Filter modules are imported on first use, so the registry itself stays cheap
+    return getattr(importlib.import_module('.' + spec.module, __package__), spec.function)
+
+
+def apply_filter(name, image, **params):
+    """Run one registered filter on an image array, filling in default parameters"""
+    spec = get_spec(name)
+    arguments = dict(spec.defaults, **params)
+    if name == 'fir':
+        arguments['kernel'] = np.asarray(arguments['kernel'], dtype=np.float32)
+
+    return get_filter(name)(image, **arguments)
+
+
+def filter_halo(name, **params):
+    """Pixels of context the filter needs on each side, or None if it is global"""
+    spec = get_spec(name)
+    if spec.halo is None:
+        return None
+    return spec.halo(**dict(spec.defaults, **params))
+
+
+def parse_step(text):
+    """Parse 'name' or 'name:param=value,param=value' into (name, params)"""
+    name, _, arguments = text.partition(':')
+    name = name.strip()
+    if name not in FILTERS:
+        raise ValueError(f"Unknown filter '{name}'. Available: {', '.join(sorted(FILTERS))}")
+
+    params = {}
+    if arguments:
+        # Split on commas that are not inside brackets, so FIR kernels can be lists
+        depth, start = 0, 0
+        parts = []
+        for i, char in enumerate(arguments):
+            depth += char in '[('
+            depth -= char in '])'
+            if char == ',' and depth == 0:
+                parts.append(arguments[start:i])
+                start = i + 1
+        parts.append(arguments[start:])
+
+        for part in parts:
+            key, _, value = part.partition('=')
+            key = key.strip()
+            if key not in FILTERS[name].defaults:
+                raise ValueError(f"Filter '{name}' has no parameter '{key}'")
+            try:
+                params[key] = ast.literal_eval(value.strip())
+            except (ValueError, SyntaxError):
+                raise ValueError(f"Invalid value for {name}.{key}: {value!r}")
+    return name, params
+
+
+def parse_chain(steps):
+    """Parse a list of step strings into [(name, params), ...]"""
+    return [parse_step(step) for step in steps]
+
+
+def pin_bits(chain, bits):
+    """Give every depth-dependent step of chain that has no bits of its own the source's bits"""
+    if bits is None:
+        return chain
+    return [(name, dict(params, bits=bits)) if 'bits' in get_spec(name).defaults and params.get('bits') is None
+            else (name, params) for name, params in chain]
+
+
+def apply_chain(image, chain):
+    """Run a parsed chain of filters, each on the previous filter's output"""
+    for name, params in chain:
+        image = apply_filter(name, image, **params)
+    return image
@@ -0,0 +1,187 @@
+import time
+from collections import namedtuple
+import cv2
+import numpy as np
+
+from .imageDepth import load_grayscale
+from .metrics import stage
+
+# method is 'direct' (cv2.filter2D), 'separable' (one cv2.sepFilter2D pass pair per
+# rank-1 term) or 'fft' (overlap-add convolution); reason says why it was picked
+FirPlan = namedtuple('FirPlan', ['method', 'reason', 'terms'])
+
+METHODS = ('direct', 'separable', 'fft')
+
+# Singular values below this fraction of the largest are float rounding, not structure
+SEPARABLE_TOLERANCE = 1e-5
+
+# Below this many taps the DFT never pays off (OpenCV's own switch-over point)
+FFT_MIN_AREA = 50
+
+# Calibration image side, and how much faster than direct another method must
+# measure before it is used, so near-ties do not flip between runs
+CALIBRATION_SIZE = 512
+SPEEDUP_MARGIN = 0.85
+
+_calibration = {}
+
+
+def separable_terms(kernel, tolerance=SEPARABLE_TOLERANCE):
+    """Split a kernel into (column, row) 1-D kernel pairs whose outer products sum to it"""
+    u, s, vt = np.linalg.svd(np.asarray(kernel, dtype=np.float64))
+    if s[0] == 0:
+        return []
+    rank = int(np.sum(s > s[0] * tolerance))
+    return [(u[:, i] * np.sqrt(s[i]), vt[i] * np.sqrt(s[i])) for i in range(rank)]
+
+
+def _separable(image, terms):
+    if len(terms) == 1:
+        column, row = terms[0]
+        return cv2.sepFilter2D(image, -1, row, column)
+    # Sum the passes at full precision and round once, like filter2D does
+    total = None
+    for column, row in terms:
+        part = cv2.sepFilter2D(image, cv2.CV_32F, row, column)
+        total = part if total is None else cv2.add(total, part, dst=total)
+    return _to_dtype(total, image.dtype)
+
+
+def _fft(image, kernel):
+    # scipy.signal is slow to import and only the FFT method needs it
+    from scipy.signal import oaconvolve
+    # filter2D correlates with the anchor at the centre and reflects the border
+    rows, cols = kernel.shape
+    top, left = rows // 2, cols // 2
+    padded = cv2.copyMakeBorder(image.astype(np.float32, copy=False), top, rows - 1 - top, left, cols - 1 - left,
+                                cv2.BORDER_REFLECT_101)
+    result = oaconvolve(padded, kernel[::-1, ::-1].astype(np.float32), mode='valid')
+    return _to_dtype(result.astype(np.float32, copy=False), image.dtype)
+
+
+def _to_dtype(result, dtype):
+    if dtype == np.float32:
+        return result
+    info = np.iinfo(dtype)
+    np.rint(result, out=result)
+    np.clip(result, info.min, info.max, out=result)
+    return result.astype(dtype)
+
+
+def run_plan(image, kernel, plan):
+    """Filter image with an already normalized kernel the way plan says"""
+    with stage('fir_' + plan.method):
+        if plan.method == 'separable':
+            return _separable(image, plan.terms)
+        if plan.method == 'fft':
+            return _fft(image, kernel)
+        return cv2.filter2D(image, -1, kernel)
+
+
+def _seconds_per_pixel(kernel, terms, dtype):
+    """Measured cost of each usable method for a kernel of this shape and rank.
+
+    Every method costs about the same per pixel at any image size, so it is
+    timed once on a CALIBRATION_SIZE square image and cached per kernel
+    shape, rank and dtype.
+    """
+    key = (kernel.shape, len(terms), np.dtype(dtype).str)
+    costs = _calibration.get(key)
+    if costs is None:
+        rng = np.random.default_rng(0)
+        sample = rng.integers(0, 256, (CALIBRATION_SIZE, CALIBRATION_SIZE)).astype(dtype)
+        candidates = ['direct']
+        if terms and len(terms) * sum(kernel.shape) < kernel.size:
+            candidates.append('separable')
+        if kernel.size >= FFT_MIN_AREA:
+            candidates.append('fft')
+        costs = {}
+        for method in candidates:
+            plan = FirPlan(method, 'calibration', terms)
+            best = float('inf')
+            for _ in range(3):
+                start = time.perf_counter()
+                run_plan(sample, kernel, plan)
+                best = min(best, time.perf_counter() - start)
+            costs[method] = best / sample.size
+        _calibration[key] = costs
+    return costs
+
+
+def plan_fir(kernel, dtype=np.uint8, method='auto'):
+    """Choose how to apply a normalized kernel and say why.
+
+    Rank is found with an SVD; a rank-r kernel costs r * (rows + cols) taps
+    as 1-D passes instead of rows * cols. Otherwise the measured per-pixel
+    cost of direct filtering is weighed against overlap-add FFT convolution.
+    """
+    kernel = np.asarray(kernel, dtype=np.float32)
+    rows, cols = kernel.shape
+    terms = separable_terms(kernel)
+    if method != 'auto':
+        if method not in METHODS:
+            raise ValueError(f"Unknown FIR method '{method}'. Available: auto, {', '.join(METHODS)}")
+        if method == 'separable' and not terms:
+            raise ValueError("An all-zero kernel has no separable form")
+        return FirPlan(method, 'requested', terms)
+
+    costs = _seconds_per_pixel(kernel, terms, dtype)
+    best = min(costs, key=costs.get)
+    if best != 'direct' and costs[best] > costs['direct'] * SPEEDUP_MARGIN:
+        best = 'direct'
+    measured = ', '.join(f"{name} {seconds * 1e9:.1f} ns/px" for name, seconds in sorted(costs.items()))
+    if best == 'separable':
+        reason = (f"rank {len(terms)} {rows}x{cols} kernel: {len(terms) * (rows + cols)} taps in 1-D passes "
+                  f"instead of {rows * cols} ({measured})")
+    elif best == 'fft':
+        reason = f"{rows}x{cols} kernel is cheaper by overlap-add FFT ({measured})"
+    else:
+        reason = f"rank {len(terms)} {rows}x{cols} kernel is fastest filtered directly ({measured})"
+    return FirPlan(best, reason, terms)
+
+
+def fir_filter(image, kernel, method='auto'):
+    """Apply a normalized 2-D FIR kernel to an image array"""
+    # Normalize the kernel
+    kernel = kernel / np.sum(kernel)
+
+    # Apply FIR filter (2D correlation) as planned for this kernel
+    return run_plan(image, kernel, plan_fir(kernel, image.dtype, method))
+
+def apply_fir_filter(image_path, kernel):
+    image = load_grayscale(image_path)
+    if image is None:
+        raise FileNotFoundError(f"Could not load image from {image_path}")
+
+    return image, fir_filter(image, kernel)
+
+if __name__ == "__main__":
+    # Only the demo needs a display
+    import matplotlib.pyplot as plt
+
+    # Define FIR filter kernel (example: 3x3 Gaussian kernel)
+    kernel = np.array([[1, 2, 1],
+                       [2, 4, 2],
+                       [1, 2, 1]], dtype=np.float32)
+
+    # Parameters
+    image_path = "uploads/image_upload.png"  # Replace with your image path
+
+    # Apply the FIR filter
+    original_image, filtered_image = apply_fir_filter(image_path, kernel)
+    print(plan_fir(kernel / np.sum(kernel), original_image.dtype).reason)
+
+    # Display the images
+    plt.figure(figsize=(10, 5))
+    plt.subplot(1, 2, 1)
+    plt.title("Original Image")
+    plt.imshow(original_image, cmap="gray")
+    plt.axis("off")
+
+    plt.subplot(1, 2, 2)
+    plt.title("FIR Filtered Image")
+    plt.imshow(filtered_image, cmap="gray")
+    plt.axis("off")
+
+    plt.tight_layout()
+    plt.show()
@@ -0,0 +1,445 @@
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+import cv2
+import numpy as np
+from scipy.signal import lfilter_zi
+
+from .batchFilter import IMAGE_EXTENSIONS
+from .iirFilter import iir_filter_pair, normalize_coefficients
+from .imageDepth import file_bit_depth, from_float32, full_scale, load_grayscale, to_float32, to_grayscale
+
+DEFAULT_FPS = 15.0
+# Frames that may wait between two pipeline stages before the reader starts dropping
+QUEUE_SIZE = 4
+# Weight of the newest frame in the recursive average; 0.25 averages about 7 frames
+TEMPORAL_WEIGHT = 0.25
+VIDEO_EXTENSIONS = ('.avi', '.mp4', '.mkv', '.mov')
+# Spatial branches at the Tk app's default slider positions
+NOISE_LEVEL = 3
+B_LOW, A_LOW = [0.2, 0.2], [1.0, -0.8]
+B_HIGH, A_HIGH = [1.0, -1.0], [1.0, -0.5]
+
+# Passed down the queues after the last frame, or when a stage fails
+END = object()
+
+
+def recursive_average(weight):
+    """First-order temporal low-pass y[t] = w*x[t] + (1 - w)*y[t-1] as (b, a)"""
+    if not 0 < weight <= 1:
+        raise ValueError(f"Temporal weight must be in (0, 1], got {weight}")
+    return [weight], [1.0, weight - 1.0]
+
+
+class TemporalIIR:
+    """Per-pixel IIR filter along the time axis of a frame sequence.
+
+    Every pixel runs the same recursion (transposed direct form II, as in
+    scipy.signal.lfilter) and its state is carried from one frame to the
+    next, so a whole sequence costs one frame of state per filter order. The
+    state starts at the steady state of the first frame rather than at zero,
+    so the output does not fade in from black; the result matches
+    lfilter(b, a, frames, axis=0, zi=lfilter_zi(b, a) * first_frame).
+    """
+
+    def __init__(self, b, a):
+        b, a = normalize_coefficients(b, a)
+        order = max(len(b), len(a))
+        self.b = np.pad(b, (0, order - len(b))).astype(np.float32)
+        self.a = np.pad(a, (0, order - len(a))).astype(np.float32)
+        # A plain gain (order 0) has no state to carry
+        self.zi = lfilter_zi(self.b, self.a).astype(np.float32) if order > 1 else np.zeros(0, np.float32)
+        self.state = None
+        self._term = None
+
+    def reset(self):
+        """Forget the carried state; the next frame restarts the recursion"""
+        self.state = None
+
+    def step(self, frame):
+        """Filter one float32 frame and return the output frame"""
+        b, a = self.b, self.a
+        if self.state is None or self.state.shape[1:] != frame.shape:
+            self.state = self.zi[:, None, None] * frame
+            self._term = np.empty_like(frame)
+        state, term = self.state, self._term
+
+        output = frame * b[0]
+        if len(state):
+            output += state[0]
+        for k in range(len(state)):
+            # z[k] = b[k+1]*x - a[k+1]*y + z[k+1], updated in place front to back
+            np.multiply(frame, b[k + 1], out=state[k])
+            np.multiply(output, a[k + 1], out=term)
+            state[k] -= term
+            if k + 1 < len(state):
+                state[k] += state[k + 1]
+        return output
+
+
+class FrameFilter:
+    """Denoise, temporal recursion and the spatial low/high IIR branches for one frame"""
+
+    def __init__(self, temporal=None, noise_level=NOISE_LEVEL,
+                 b_low=B_LOW, a_low=A_LOW, b_high=B_HIGH, a_high=A_HIGH, bits=None):
+        self.temporal = TemporalIIR(*(temporal or recursive_average(TEMPORAL_WEIGHT)))
+        self.noise_level = noise_level
+        self.branches = (b_low, a_low, b_high, a_high)
+        # The sequence's sample depth, e.g. 12 in 16-bit frames; the scale is
+        # pinned once from it, or from the first frame's type, for every frame
+        self.bits = bits
+        self.scale = None
+
+    def __call__(self, frame):
+        if self.scale is None:
+            self.scale = full_scale(frame, self.bits)
+        if self.noise_level > 1:
+            frame = cv2.GaussianBlur(frame, (self.noise_level, self.noise_level), 0)
+        averaged = self.temporal.step(to_float32(frame, self.scale))
+        enhanced = iir_filter_pair(averaged, *self.branches)
+        return from_float32(enhanced, frame.dtype, self.scale)
+
+
+def frame_paths(directory):
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def source_bit_depth(source):
+    """Sample depth recorded in the first frame of a frame directory, or None"""
+    if not os.path.isdir(source):
+        return None
+    paths = frame_paths(source)
+    return file_bit_depth(paths[0]) if paths else None
+
+
+def source_fps(source):
+    """Frame rate stored in a video file, or None for frame directories and unknown rates"""
+    if os.path.isdir(source):
+        return None
+    capture = cv2.VideoCapture(source)
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS)
+    finally:
+        capture.release()
+    return fps if fps and fps > 0 else None
+
+
+def read_frames(source):
+    """Yield the grayscale frames of a video file or of a directory of images, in order"""
+    if os.path.isdir(source):
+        for path in frame_paths(source):
+            frame = load_grayscale(path)
+            if frame is None:
+                raise ValueError(f"Could not load frame from {path}")
+            yield frame
+        return
+
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise FileNotFoundError(f"Could not open video {source}")
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                return
+            yield to_grayscale(frame)
+    finally:
+        capture.release()
+
+
+class FrameSink:
+    """Write frames to a video file (8-bit) or to numbered images in a directory"""
+
+    def __init__(self, destination, fps, fourcc='MJPG', bits=None):
+        self.destination = destination
+        self.fps = fps
+        self.fourcc = fourcc
+        self.bits = bits
+        self.video = destination.lower().endswith(VIDEO_EXTENSIONS)
+        self.writer = None
+        self.scale = None
+        self.count = 0
+        if not self.video:
+            os.makedirs(destination, exist_ok=True)
+
+    def write(self, frame):
+        if self.video:
+            if self.writer is None:
+                height, width = frame.shape[:2]
+                self.writer = cv2.VideoWriter(self.destination, cv2.VideoWriter_fourcc(*self.fourcc),
+                                              self.fps, (width, height), isColor=False)
+                if not self.writer.isOpened():
+                    raise ValueError(f"Could not open {self.destination} for writing")
+                # One stretch for the whole video, so frames do not flicker
+                self.scale = full_scale(frame, self.bits)
+            if frame.dtype != np.uint8:
+                frame = cv2.convertScaleAbs(frame, alpha=255.0 / self.scale)
+            self.writer.write(frame)
+        else:
+            path = os.path.join(self.destination, f"frame_{self.count:06d}.png")
+            if not cv2.imwrite(path, frame):
+                raise ValueError(f"Could not write {path}")
+        self.count += 1
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
+
+
+class FluoroStream:
+    """Pipelined read -> filter -> write of a frame sequence at a fixed output rate.
+
+    Reading, filtering and encoding each run on their own thread, joined by
+    bounded queues, so a slow encoder never stalls the filter and memory
+    stays at a few frames however long the sequence is.
+
+    In real-time mode the reader delivers frames at the input rate, as a
+    detector would, and drops a frame when the filter is too far behind to
+    accept it. The writer emits exactly one frame per output period: the
+    newest filtered frame, or the previous one again when nothing new is
+    ready by the deadline, which is counted as late. The output therefore
+    runs at the requested rate whatever the filter's speed.
+
+    Offline (realtime=False) nothing is dropped or repeated: every frame is
+    filtered and written as fast as possible, and frames finished after the
+    deadline a real-time run would have given them are still counted late.
+    """
+
+    def __init__(self, source, destination, fps=None, frame_filter=None,
+                 realtime=True, queue_size=QUEUE_SIZE, fourcc='MJPG', bits=None):
+        self.source = source
+        self.input_fps = source_fps(source) or fps or DEFAULT_FPS
+        self.fps = fps or self.input_fps
+        self.bits = source_bit_depth(source) if bits is None else bits
+        self.frame_filter = frame_filter or FrameFilter(bits=self.bits)
+        self.realtime = realtime
+        self.sink = FrameSink(destination, self.fps, fourcc, self.bits)
+        self._filter_queue = queue.Queue(maxsize=queue_size)
+        self._write_queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._errors = []
+        self._lock = threading.Lock()
+        self.counts = {'read': 0, 'dropped': 0, 'filtered': 0, 'superseded': 0,
+                       'written': 0, 'repeated': 0, 'late': 0}
+        self.filter_seconds = []
+        self.latencies = []
+
+    def run(self):
+        """Stream the whole source and return a summary dict"""
+        threads = [threading.Thread(target=self._guard, args=(target,), name=f"fluoro-{name}", daemon=True)
+                   for name, target in (('reader', self._read), ('filter', self._filter), ('writer', self._write))]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.1)
+        except KeyboardInterrupt:
+            self.stop()
+            for thread in threads:
+                thread.join()
+        finally:
+            self.sink.close()
+        if self._errors:
+            raise self._errors[0]
+        return self.summary(time.perf_counter() - start)
+
+    def stop(self):
+        """Ask every stage to finish after its current frame"""
+        self._stop.set()
+
+    def summary(self, seconds):
+        counts = dict(self.counts)
+        filter_seconds = np.array(self.filter_seconds or [0.0])
+        latencies = np.array(self.latencies or [0.0])
+        return dict(
+            counts,
+            seconds=seconds,
+            fps=self.fps,
+            output_fps=counts['written'] / seconds if seconds else 0.0,
+            filter_ms_mean=float(filter_seconds.mean() * 1e3),
+            filter_ms_max=float(filter_seconds.max() * 1e3),
+            latency_ms_mean=float(latencies.mean() * 1e3),
+            latency_ms_max=float(latencies.max() * 1e3),
+        )
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counts[name] += amount
+
+    def _guard(self, target):
+        try:
+            target()
+        except Exception as e:
+            self._errors.append(e)
+            self.stop()
+
+    def _put(self, target, item):
+        """Blocking put that still gives up once the stream is stopped"""
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, source):
+        """Blocking get that returns END once the stream is stopped"""
+        while not self._stop.is_set():
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return END
+
+    def _read(self):
+        period = 1.0 / self.input_fps
+        start = time.perf_counter()
+        try:
+            for index, frame in enumerate(read_frames(self.source)):
+                if self._stop.is_set():
+                    return
+                if self.realtime:
+                    # A detector delivers frames on its own clock, not when we are ready
+                    delay = start + index * period - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                self._count('read')
+                item = (index, time.perf_counter(), frame)
+                if not self.realtime:
+                    if not self._put(self._filter_queue, item):
+                        return
+                    continue
+                try:
+                    self._filter_queue.put_nowait(item)
+                except queue.Full:
+                    self._count('dropped')
+        finally:
+            self._put(self._filter_queue, END)
+
+    def _filter(self):
+        try:
+            while True:
+                item = self._get(self._filter_queue)
+                if item is END:
+                    return
+                index, arrived, frame = item
+                started = time.perf_counter()
+                result = self.frame_filter(frame)
+                self.filter_seconds.append(time.perf_counter() - started)
+                self._count('filtered')
+                if not self._put(self._write_queue, (index, arrived, result)):
+                    return
+        finally:
+            self._put(self._write_queue, END)
+
+    def _write(self):
+        period = 1.0 / self.fps
+        item = self._get(self._write_queue)
+        if item is END:
+            return
+        # The output clock starts with the first finished frame; its
+        # latency is the pipeline's startup delay and shows up in the report
+        start = time.perf_counter()
+        if not self.realtime:
+            while item is not END:
+                index, arrived, frame = item
+                if time.perf_counter() > start + (index + 1) * period:
+                    self._count('late')
+                self._emit(arrived, frame)
+                item = self._get(self._write_queue)
+            return
+
+        latest = item
+        self._emit(latest[1], latest[2])
+        tick = 1
+        while not self._stop.is_set():
+            deadline = start + tick * period
+            fresh = None
+            finished = False
+            # Take everything that finishes before this output period ends
+            while True:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._write_queue.get(timeout=remaining) if remaining > 0 \
+                        else self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is END:
+                    finished = True
+                    break
+                if fresh is not None:
+                    # Two frames finished within one output period; show the newer
+                    self._count('superseded')
+                fresh = item
+            if fresh is not None:
+                latest = fresh
+                self._emit(latest[1], latest[2])
+            elif not finished:
+                # Nothing new in time: hold the rate by showing the last frame again
+                self._count('late')
+                self._count('repeated')
+                self.sink.write(latest[2])
+                self._count('written')
+            if finished:
+                return
+            tick += 1
+
+    def _emit(self, arrived, frame):
+        self.sink.write(frame)
+        self.latencies.append(time.perf_counter() - arrived)
+        self._count('written')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Recursive temporal filtering of a fluoroscopy sequence at a fixed frame rate.",
+    )
+    parser.add_argument('input', help="video file or directory of frame images")
+    parser.add_argument('output', help=f"video file ({', '.join(VIDEO_EXTENSIONS)}) or output frame directory")
+    parser.add_argument('--fps', type=float, default=None,
+                        help=f"output frame rate (default: the video's own, else {DEFAULT_FPS:g})")
+    parser.add_argument('-w', '--weight', type=float, default=TEMPORAL_WEIGHT,
+                        help="weight of the newest frame in the recursive average (1 disables it)")
+    parser.add_argument('-n', '--noise', type=int, default=NOISE_LEVEL, help="Gaussian denoise kernel size")
+    parser.add_argument('--offline', action='store_true',
+                        help="filter every frame as fast as possible instead of pacing at the frame rate")
+    parser.add_argument('--queue', type=int, default=QUEUE_SIZE, help="frames buffered between pipeline stages")
+    parser.add_argument('--fourcc', default='MJPG', help="video codec for video outputs")
+    parser.add_argument('--bits', type=int, default=None,
+                        help="sample depth of 16-bit frames, e.g. 12 (default: from the first frame's file, else 16)")
+    args = parser.parse_args(argv)
+
+    try:
+        temporal = recursive_average(args.weight)
+    except ValueError as e:
+        parser.error(str(e))
+    noise = args.noise + 1 if args.noise > 1 and args.noise % 2 == 0 else args.noise
+    bits = source_bit_depth(args.input) if args.bits is None else args.bits
+
+    stream = FluoroStream(args.input, args.output, fps=args.fps,
+                          frame_filter=FrameFilter(temporal, noise_level=noise, bits=bits),
+                          realtime=not args.offline, queue_size=args.queue, fourcc=args.fourcc, bits=bits)
+    try:
+        summary = stream.run()
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    print(f"Read {summary['read']} frames, wrote {summary['written']} at {summary['fps']:g} fps "
+          f"in {summary['seconds']:.2f}s ({summary['output_fps']:.1f} fps achieved)")
+    print(f"Dropped {summary['dropped']} input frames, {summary['superseded']} superseded; "
+          f"{summary['late']} late ({summary['repeated']} repeated to hold the rate)")
+    print(f"Filter {summary['filter_ms_mean']:.1f} ms mean / {summary['filter_ms_max']:.1f} ms max per frame; "
+          f"latency {summary['latency_ms_mean']:.1f} ms mean / {summary['latency_ms_max']:.1f} ms max")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
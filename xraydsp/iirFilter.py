@@ -0,0 +1,311 @@
+import cv2
+import numpy as np
+
+from .parallelBands import run_bands
+
+# The fused pair divides by A1*A2, whose gain near DC grows as 1 / (1 - |pole|)**4;
+# with a pole this close to the unit circle the branches are run separately instead
+FUSED_MAX_POLE = 0.99
+
+
+def lfilter(b, a, x, axis=-1, zi=None):
+    """scipy.signal.lfilter, imported on first use.
+
+    scipy.signal alone takes over a second to import, which every process
+    that only needs this module's coefficient helpers would otherwise pay.
+    """
+    from scipy.signal import lfilter as scipy_lfilter
+    return scipy_lfilter(b, a, x, axis=axis, zi=zi)
+
+
+def normalize_coefficients(b, a):
+    """Scale b and a so that a[0] == 1"""
+    b = np.asarray(b, dtype=np.float64)
+    a = np.asarray(a, dtype=np.float64)
+    return b / a[0], a / a[0]
+
+
+def frequency_response(b, a, w):
+    """Evaluate H(e^jw) = B(e^-jw) / A(e^-jw) at the frequencies w in one vectorized step"""
+    z = np.exp(-1j * np.asarray(w))
+    # polyval wants the highest power first, b and a list z^0 first
+    return np.polyval(np.asarray(b)[::-1], z) / np.polyval(np.asarray(a)[::-1], z)
+
+
+def first_order_magnitude_db(b, a, cos_w):
+    """Closed-form |H| in dB of a first-order section on a precomputed cos(w) grid"""
+    b0, b1 = b
+    a0, a1 = a
+    numerator = b0 * b0 + b1 * b1 + 2 * b0 * b1 * cos_w
+    denominator = a0 * a0 + a1 * a1 + 2 * a0 * a1 * cos_w
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 10 * np.log10(numerator / denominator)
+
+
+def resample_first_order(b, a, factor, points=256):
+    """Map a first-order section to a grid downsampled by factor.
+
+    Poles and zeros move as p -> p**factor (matched-z), so impulse responses
+    decay over the same physical distance. The gain keeps the DC response,
+    which sets overall brightness; sections with a zero at DC instead get a
+    least-squares fit to the original response over the band the coarse grid
+    keeps.
+    """
+    b, a = normalize_coefficients(b, a)
+    if factor == 1 or len(b) != 2 or len(a) != 2 or b[0] == 0:
+        return b, a
+
+    def resample_root(root):
+        return np.sign(root) * np.abs(root) ** factor
+
+    zero = resample_root(-b[1] / b[0])
+    pole = resample_root(-a[1])
+    b_new = np.array([1.0, -zero])
+    a_new = np.array([1.0, -pole])
+
+    w = np.linspace(0, np.pi, points)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        target = np.abs(frequency_response(b, a, w / factor))
+        shape = np.abs(frequency_response(b_new, a_new, w))
+    if not np.all(np.isfinite(target)) or not np.any(shape):
+        return b, a
+    if target[0] > 1e-3 * target.max() and shape[0] > 0:
+        gain = target[0] / shape[0]
+    else:
+        gain = np.dot(shape, target) / np.dot(shape, shape)
+    return b_new * gain, a_new
+
+
+def lfilter_columns(b, a, image):
+    """Run lfilter down the columns, one vectorized step per row.
+
+    lfilter along axis 0 walks strided columns one at a time; stepping the
+    recurrence row by row keeps every operation on contiguous memory.
+    """
+    filtered = np.empty_like(image)
+    np.multiply(image, b[0], out=filtered)
+    for k in range(1, len(b)):
+        if b[k] != 0:
+            filtered[k:] += b[k] * image[:-k]
+
+    term = np.empty(image.shape[1:], dtype=image.dtype)
+    for i in range(1, image.shape[0]):
+        for k in range(1, min(len(a), i + 1)):
+            np.multiply(filtered[i - k], -a[k], out=term)
+            filtered[i] += term
+    return filtered
+
+
+def filter_rows(image, b, a):
+    return lfilter(b, a, image, axis=1)
+
+
+def filter_columns(image, b, a):
+    return lfilter_columns(b, a, image)
+
+
+def iir_filter_2d(image, b, a, dtype=np.float32, workers=1):
+    """Apply a separable IIR filter along rows and columns of the whole array.
+
+    Every row, then every column, is filtered on its own, so with workers > 1
+    (None for every free core) the row pass runs on row bands and the column
+    pass on column bands of the shared band pool, with the same result.
+    """
+    b, a = normalize_coefficients(b, a)
+    b = b.astype(dtype)
+    a = a.astype(dtype)
+    image = np.asarray(image, dtype=dtype)
+
+    # One vectorized pass per axis instead of one lfilter call per row/column
+    filtered_rows = run_bands(filter_rows, image, axis=0, workers=workers, b=b, a=a)
+    return run_bands(filter_columns, filtered_rows, axis=1, workers=workers, b=b, a=a)
+
+
+def combine_parallel(b1, a1, b2, a2):
+    """Combine two separable IIR branches into one filter for their sum.
+
+    The sum of two separable branches is not separable itself, but over the
+    shared denominator A1*A2 it is: the numerator becomes a small causal 2-D
+    FIR kernel and the denominator stays a 1-D all-pole filter per axis.
+    """
+    b1, a1 = normalize_coefficients(b1, a1)
+    b2, a2 = normalize_coefficients(b2, a2)
+
+    u1 = np.convolve(b1, a2)
+    u2 = np.convolve(b2, a1)
+    size = max(len(u1), len(u2))
+    u1 = np.pad(u1, (0, size - len(u1)))
+    u2 = np.pad(u2, (0, size - len(u2)))
+
+    numerator = np.outer(u1, u1) + np.outer(u2, u2)
+    denominator = np.convolve(a1, a2)
+    return numerator, denominator
+
+
+def pole_radius(a):
+    """Largest pole magnitude of the all-pole part 1 / A(z)"""
+    _, a = normalize_coefficients([1.0], a)
+    a = np.trim_zeros(a, 'b')
+    return float(np.abs(np.roots(a)).max()) if len(a) > 1 else 0.0
+
+
+def can_fuse(a1, a2):
+    """Whether iir_filter_pair's fused form stays accurate for these denominators"""
+    return max(pole_radius(a1), pole_radius(a2)) < FUSED_MAX_POLE
+
+
+def causal_fir_2d(image, kernel):
+    """Apply a causal 2-D FIR kernel with zero initial conditions"""
+    kh, kw = kernel.shape
+    # filter2D correlates, so flip the kernel and anchor it at the bottom-right tap
+    flipped = np.ascontiguousarray(kernel[::-1, ::-1])
+    return cv2.filter2D(image, -1, flipped, anchor=(kw - 1, kh - 1), borderType=cv2.BORDER_CONSTANT)
+
+
+def iir_filter_pair(image, b1, a1, b2, a2, fuse=True, dtype=np.float32, workers=1):
+    """Return the sum of two separable IIR branches applied to the same image.
+
+    The fused form filters once through combine_parallel's shared
+    denominator. Its numerator nearly cancels the large gain of A1*A2, so it
+    always runs in float64, whatever dtype the result is returned in, and
+    falls back to the two separate branches when a pole reaches
+    FUSED_MAX_POLE, where even float64 would lose the difference.
+    """
+    image = np.asarray(image, dtype=dtype)
+
+    if not fuse or not can_fuse(a1, a2):
+        result = iir_filter_2d(image, b1, a1, dtype=dtype, workers=workers)
+        result += iir_filter_2d(image, b2, a2, dtype=dtype, workers=workers)
+        return result
+
+    numerator, denominator = combine_parallel(b1, a1, b2, a2)
+    one = np.ones(1)
+
+    # Shared 2-D numerator, then the all-pole part along rows and columns
+    result = run_bands(causal_fir_2d, image.astype(np.float64), halo=numerator.shape[0] - 1,
+                       workers=workers, kernel=numerator)
+    result = run_bands(filter_rows, result, axis=0, workers=workers, b=one, a=denominator)
+    result = run_bands(filter_columns, result, axis=1, workers=workers, b=one, a=denominator)
+    return result.astype(dtype)
+
+
+class StripIIR:
+    """iir_filter_2d for an image that arrives as row strips, top to bottom.
+
+    Rows are filtered on their own, so each strip's row pass is complete as
+    soon as it arrives. The column pass is a recurrence down the image: the
+    last len(b) - 1 row-filtered inputs and len(a) - 1 outputs are carried
+    from strip to strip as the filter state, so every pushed strip comes back
+    finished and memory stays at one strip plus a few rows. The operations
+    are lfilter_columns' own, in the same order, so the assembled result is
+    bit-identical to iir_filter_2d on the whole image.
+    """
+
+    def __init__(self, b, a, dtype=np.float32):
+        b, a = normalize_coefficients(b, a)
+        self.b = b.astype(dtype)
+        self.a = a.astype(dtype)
+        self.dtype = dtype
+        self.reset()
+
+    def reset(self):
+        """Start a new image"""
+        self.rows = 0
+        self._inputs = None
+        self._outputs = None
+
+    def push(self, strip):
+        """Filter the next rows of the image and return them finished"""
+        strip = np.asarray(strip, dtype=self.dtype)
+        filtered_rows = lfilter(self.b, self.a, strip, axis=1)
+        return self._columns(filtered_rows)
+
+    def _columns(self, image):
+        b, a = self.b, self.a
+        if self._inputs is None:
+            self._inputs = image[:0].copy()
+            self._outputs = image[:0].copy()
+        elif image.shape[1:] != self._inputs.shape[1:]:
+            raise ValueError(f"Strip of shape {image.shape} does not continue rows of shape {self._inputs.shape[1:]}")
+
+        count = image.shape[0]
+        inputs = np.concatenate([self._inputs, image])
+        carried = len(self._outputs)
+        outputs = np.concatenate([self._outputs, np.empty_like(image)])
+        filtered = outputs[carried:]
+
+        # Input taps; a tap that would reach above the first image row is
+        # skipped, as lfilter_columns skips it
+        np.multiply(image, b[0], out=filtered)
+        offset = len(self._inputs)
+        for k in range(1, len(b)):
+            first = max(0, k - self.rows)
+            if b[k] != 0 and first < count:
+                filtered[first:] += b[k] * inputs[offset + first - k:offset + count - k]
+
+        term = np.empty(image.shape[1:], dtype=image.dtype)
+        for i in range(count):
+            row = self.rows + i
+            for k in range(1, min(len(a), row + 1)):
+                np.multiply(outputs[carried + i - k], -a[k], out=term)
+                filtered[i] += term
+
+        self.rows += count
+        self._inputs = inputs[max(0, len(inputs) - (len(b) - 1)):].copy()
+        self._outputs = outputs[max(0, len(outputs) - (len(a) - 1)):].copy()
+        return filtered
+
+
+class StripIIRPair:
+    """iir_filter_pair for an image that arrives as row strips, top to bottom.
+
+    The fused form carries the last rows of input that its causal 2-D
+    numerator reaches back to, then runs the shared all-pole part as a
+    float64 StripIIR; the unfused form, also used where iir_filter_pair
+    falls back to it, runs one StripIIR per branch. Either way the assembled
+    result is bit-identical to iir_filter_pair on the whole image.
+    """
+
+    def __init__(self, b1, a1, b2, a2, fuse=True, dtype=np.float32):
+        self.fuse = fuse and can_fuse(a1, a2)
+        self.dtype = dtype
+        if self.fuse:
+            self.numerator, denominator = combine_parallel(b1, a1, b2, a2)
+            self.branches = (StripIIR(np.ones(1), denominator, dtype=np.float64),)
+        else:
+            self.numerator = None
+            self.branches = (StripIIR(b1, a1, dtype=dtype), StripIIR(b2, a2, dtype=dtype))
+        self.reset()
+
+    def reset(self):
+        """Start a new image"""
+        for branch in self.branches:
+            branch.reset()
+        self._history = None
+
+    def push(self, strip):
+        """Filter the next rows of the image and return them finished"""
+        strip = np.asarray(strip, dtype=self.dtype)
+        if not self.fuse:
+            result = self.branches[0].push(strip)
+            result += self.branches[1].push(strip)
+            return result
+
+        # Rows above the strip stand in for the zero border the whole image
+        # has only above its first row
+        reach = self.numerator.shape[0] - 1
+        strip = strip.astype(np.float64)
+        history = strip[:0] if self._history is None else self._history
+        window = np.concatenate([history, strip]) if len(history) else strip
+        fir = causal_fir_2d(window, self.numerator)[len(history):]
+        self._history = window[max(0, len(window) - reach):].copy() if reach else strip[:0]
+
+        # The all-pole part; StripIIR's own row pass is the same lfilter call
+        return self.branches[0].push(fir).astype(self.dtype)
+
+
+def filter_strips(strips, strip_filter):
+    """Yield each strip of an image filtered by strip_filter (StripIIR or StripIIRPair)"""
+    strip_filter.reset()
+    for strip in strips:
+        yield strip_filter.push(strip)
@@ -0,0 +1,124 @@
+import io
+import struct
+import cv2
+import numpy as np
+
+# Integer images are kept at their native depth; anything else is computed in float32
+NATIVE_DTYPES = (np.uint8, np.uint16, np.float32)
+# Full depth of each integer sample type
+DTYPE_BITS = {np.dtype(np.uint8): 8, np.dtype(np.uint16): 16}
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def to_grayscale(image):
+    """Drop colour channels without changing the image's depth"""
+    if image.ndim == 3:
+        code = cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+        image = cv2.cvtColor(image, code)
+    if image.dtype.type not in NATIVE_DTYPES:
+        image = image.astype(np.float32)
+    return image
+
+
+def load_grayscale(path):
+    """Read an image as single-channel uint8, uint16 or float32, or None if unreadable"""
+    # IMREAD_GRAYSCALE would truncate 12-16 bit detector images to 8 bits
+    image = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+    return None if image is None else to_grayscale(image)
+
+
+def decode_grayscale(data):
+    """Decode encoded image bytes like load_grayscale"""
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+    return None if image is None else to_grayscale(image)
+
+
+def png_significant_bits(stream):
+    """Depth recorded in a PNG's sBIT chunk, or None if it has none.
+
+    12- and 14-bit detectors store their samples in 16-bit containers and
+    write the real depth there. Only the chunk headers before the image data
+    are read.
+    """
+    if stream.read(len(PNG_SIGNATURE)) != PNG_SIGNATURE:
+        return None
+    colour_type = None
+    while True:
+        header = stream.read(8)
+        if len(header) < 8:
+            return None
+        length, kind = struct.unpack('>I4s', header)
+        if kind in (b'IDAT', b'IEND'):
+            return None
+        if kind not in (b'IHDR', b'sBIT'):
+            stream.seek(length + 4, io.SEEK_CUR)
+            continue
+        body = stream.read(length)
+        stream.seek(4, io.SEEK_CUR)
+        if kind == b'IHDR':
+            colour_type = body[9]
+        elif body:
+            # Grey (and alpha) images list the grey depth first; colour ones R, G, B
+            return body[0] if colour_type in (0, 4) else max(body[:3])
+
+
+def file_bit_depth(path):
+    """Sample depth stored in an image file's metadata, or None if it records none"""
+    try:
+        with open(path, 'rb') as f:
+            return png_significant_bits(f)
+    except OSError:
+        return None
+
+
+def encoded_bit_depth(data):
+    """file_bit_depth for encoded image bytes"""
+    return png_significant_bits(io.BytesIO(data))
+
+
+def bit_depth(image, bits=None):
+    """Sample depth of image: bits when known, else the full depth of its type.
+
+    The depth is never measured from the pixels, which would make a dim
+    frame, or one tile of an image, normalize differently from the rest.
+    Callers pin bits once per source, from file_bit_depth or the user.
+    Float images have no depth and give None.
+    """
+    if bits is not None:
+        return int(bits)
+    return DTYPE_BITS.get(np.dtype(image.dtype))
+
+
+def full_scale(image, bits=None):
+    """Value that maps to 1.0 when the image is normalized"""
+    bits = bit_depth(image, bits)
+    return 1.0 if bits is None else float(2 ** bits - 1)
+
+
+def to_float32(image, scale=None):
+    """Normalize image to float32 in [0, 1] by scale, by default its type's full scale.
+
+    The only copy is the type conversion; the scaling happens in place.
+    """
+    scale = full_scale(image) if scale is None else scale
+    normalized = image.astype(np.float32)
+    if scale != 1.0:
+        normalized *= np.float32(1.0 / scale)
+    return normalized
+
+
+def from_float32(image, dtype, scale):
+    """Clip a [0, 1] float32 image in place and convert it back to dtype at scale"""
+    np.clip(image, 0, 1, out=image)
+    if np.dtype(dtype) == np.float32:
+        return image
+    image *= np.float32(scale)
+    return image.astype(dtype)
+
+
+def to_uint8(image, bits=None):
+    """8-bit copy of image for display, stretching its bit depth to 0-255"""
+    if image.dtype == np.uint8:
+        return image
+    scale = full_scale(image, bits)
+    return cv2.convertScaleAbs(image, alpha=255.0 / scale)
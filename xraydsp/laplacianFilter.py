@@ -0,0 +1,55 @@
+import cv2
+import numpy as np
+
+from .edgePyramid import edge_map
+from .imageDepth import load_grayscale
+
+def laplacian_filter(image, filter_strength, scale=0):
+    """Apply a Laplacian filter to an image array
+
+    scale > 0 works on that level of a Gaussian pyramid, as in sobel_filter.
+    """
+    if scale:
+        return edge_map(image, 'laplacian', scale, filter_strength)
+
+    # Apply Laplacian filter (filter_strength controls the kernel size)
+    laplacian = cv2.Laplacian(image, cv2.CV_32F, ksize=filter_strength)
+    
+    # Back to the input's sample type
+    np.absolute(laplacian, out=laplacian)
+    filtered_image = laplacian.astype(image.dtype, copy=False)
+    
+    return filtered_image
+
+def apply_laplacian_filter(image_path, filter_strength):
+    image = load_grayscale(image_path)
+    if image is None:
+        raise FileNotFoundError(f"Could not load image from {image_path}")
+
+    return image, laplacian_filter(image, filter_strength)
+
+if __name__ == "__main__":
+    # Only the demo needs a display
+    import matplotlib.pyplot as plt
+
+    # Parameters
+    image_path = "uploads/image_upload.png"  # Replace with your image path
+    filter_strength = 7  # Control the strength of the filter (higher = stronger)
+
+    # Apply the filter
+    original_image, filtered_image = apply_laplacian_filter(image_path, filter_strength)
+
+    # Display the images
+    plt.figure(figsize=(10, 5))
+    plt.subplot(1, 2, 1)
+    plt.title("Original Image")
+    plt.imshow(original_image, cmap="gray")
+    plt.axis("off")
+
+    plt.subplot(1, 2, 2)
+    plt.title(f"Filtered Image\n(Filter Strength: {filter_strength})")
+    plt.imshow(filtered_image, cmap="gray")
+    plt.axis("off")
+
+    plt.tight_layout()
+    plt.show()
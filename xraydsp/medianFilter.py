@@ -0,0 +1,104 @@
+import cv2
+import numpy as np
+
+from .imageDepth import load_grayscale
+from .parallelBands import run_bands
+
+
+# Side of the blocks the 16-bit low-byte passes run on: small enough that each
+# block's median spans few high bytes, large enough to amortise the window overlap
+SPLIT_BLOCK = 64
+
+
+def median_8bit_split(image, filter_strength, split_block=SPLIT_BLOCK):
+    """Exact median of a uint16 image from 8-bit medians.
+
+    A median commutes with any non-decreasing map, so the median of the high
+    bytes is the high byte c of the median. Where the median's high byte is
+    c, the low byte is the median of clip(v - 256c, 0, 255), which is
+    non-decreasing too. Both are 8-bit medians, which OpenCV computes with
+    per-column histograms at a cost independent of the window. The low-byte
+    passes run block by block, one per high byte present in the block, so
+    the cost follows how much the image varies locally, not the window.
+    """
+    radius = filter_strength // 2
+    coarse = cv2.medianBlur((image >> 8).astype(np.uint8), filter_strength)
+    result = coarse.astype(np.uint16) << 8
+    height, width = image.shape
+    block = max(split_block, 2 * filter_strength)
+    for y0 in range(0, height, block):
+        for x0 in range(0, width, block):
+            y1, x1 = min(height, y0 + block), min(width, x0 + block)
+            # The window reaches radius pixels past the block; at the image edge
+            # medianBlur replicates the border just as it does for the whole image
+            top, bottom = max(0, y0 - radius), min(height, y1 + radius)
+            left, right = max(0, x0 - radius), min(width, x1 + radius)
+            window = image[top:bottom, left:right]
+            region = (slice(y0, y1), slice(x0, x1))
+            levels = coarse[region]
+            for c in np.unique(levels):
+                # Saturating uint16 subtract, then saturating conversion to uint8
+                shifted = cv2.convertScaleAbs(cv2.subtract(window, int(c) << 8))
+                fine = cv2.medianBlur(shifted, filter_strength)[y0 - top:y1 - top, x0 - left:x1 - left]
+                np.bitwise_or(result[region], fine, out=result[region], where=levels == c)
+    return result
+
+
+def median_band(image, filter_strength):
+    # OpenCV only supports 16-bit and float medians up to 5x5
+    if image.dtype == np.uint8 or filter_strength <= 5:
+        return cv2.medianBlur(image, filter_strength)
+    if image.dtype == np.uint16:
+        return median_8bit_split(image, filter_strength)
+    # Only float windows above 5x5 get here; scipy.ndimage is slow to import
+    from scipy.ndimage import median_filter as ndimage_median
+    # mode='nearest' replicates the border the same way medianBlur does
+    return ndimage_median(image, size=filter_strength, mode='nearest')
+
+
+def median_filter(image, filter_strength, workers=1):
+    """Apply a Median filter to an image array.
+
+    uint8 and uint16 images cost the same per pixel at any window size.
+    With workers > 1 (None for every free core) the image is split into row
+    bands, each filtered with the rows its windows reach, on the shared band
+    pool (OpenCV releases the GIL).
+    """
+    # Apply Median filter (filter_strength controls the kernel size)
+    return run_bands(median_band, image, halo=filter_strength // 2, workers=workers,
+                     filter_strength=filter_strength)
+
+def apply_median_filter(image_path, filter_strength):
+    image = load_grayscale(image_path)
+    if image is None:
+        raise FileNotFoundError(f"Could not load image from {image_path}")
+
+    filtered_image = median_filter(image, filter_strength)
+    
+    return image, filtered_image
+
+if __name__ == "__main__":
+    # Only the demo needs a display
+    import matplotlib.pyplot as plt
+
+    # Parameters
+    image_path = "uploads/image_upload.png"  # Replace with your image path
+    filter_strength = 7  # Control the strength of the filter (higher = stronger)
+
+    # Apply the filter
+    original_image, filtered_image = apply_median_filter(image_path, filter_strength)
+
+    # Display the images
+    plt.figure(figsize=(10, 5))
+    plt.subplot(1, 2, 1)
+    plt.title("Original Image")
+    plt.imshow(original_image, cmap="gray")
+    plt.axis("off")
+
+    plt.subplot(1, 2, 2)
+    plt.title(f"Filtered Image\n(Filter Strength: {filter_strength})")
+    plt.imshow(filtered_image, cmap="gray")
+    plt.axis("off")
+
+    plt.tight_layout()
+    plt.show()
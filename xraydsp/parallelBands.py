@@ -0,0 +1,274 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from multiprocessing import shared_memory
+import cv2
+import numpy as np
+
+# XRAY_WORKERS caps the cores the whole process uses for band pools and FFTs
+WORKERS_ENV = 'XRAY_WORKERS'
+# Bands shorter than this cost more in scheduling and halo than they save
+MIN_BAND = 64
+
+
+class CoreBudget:
+    """Cores shared by every concurrent caller in the process.
+
+    reserve() grants up to the cores still free, and always at least one, so
+    two requests arriving together split the machine instead of each
+    starting a full set of threads. The grant is returned when the block
+    ends.
+    """
+
+    def __init__(self, cores):
+        self.cores = max(1, int(cores))
+        self._in_use = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def reserve(self, wanted=None):
+        """Grant up to wanted cores; None, 0 or -1 (scipy.fft's 'all') asks for every free core"""
+        if wanted is None or wanted <= 0:
+            wanted = self.cores
+        with self._lock:
+            granted = max(1, min(wanted, self.cores - self._in_use))
+            self._in_use += granted
+        try:
+            yield granted
+        finally:
+            with self._lock:
+                self._in_use -= granted
+
+    @property
+    def in_use(self):
+        with self._lock:
+            return self._in_use
+
+
+_settings = {'budget': None, 'threads': None, 'processes': None}
+_settings_lock = threading.Lock()
+_local = threading.local()
+# Band sections currently running on threads, and OpenCV's thread count before the first
+_opencv = {'sections': 0, 'threads': None}
+_opencv_lock = threading.Lock()
+
+
+def default_workers():
+    return int(os.environ.get(WORKERS_ENV, 0)) or os.cpu_count() or 1
+
+
+def configure(workers=None, opencv_threads=None):
+    """Set the process-wide core budget, and OpenCV's own thread count if given.
+
+    Call this once at startup. OpenCV keeps its default thread pool, so
+    calls made outside bands still use every core; run_bands lowers it only
+    while bands run. Pool processes, where every process already has its
+    share of the cores, pass their share as opencv_threads too, e.g.
+    configure(1, 1) as a pool initializer.
+    """
+    workers = workers or default_workers()
+    with _settings_lock:
+        for key in ('threads', 'processes'):
+            if _settings[key] is not None:
+                _settings[key].shutdown(wait=False)
+                _settings[key] = None
+        _settings['budget'] = CoreBudget(workers)
+    if opencv_threads is not None:
+        cv2.setNumThreads(opencv_threads)
+    return workers
+
+
+def budget():
+    """The process's CoreBudget, created from XRAY_WORKERS or the core count on first use"""
+    with _settings_lock:
+        if _settings['budget'] is None:
+            _settings['budget'] = CoreBudget(default_workers())
+        return _settings['budget']
+
+
+def worker_count():
+    return budget().cores
+
+
+def reserve(wanted=None):
+    """Reserve cores from the shared budget, e.g. for scipy.fft's workers argument"""
+    return budget().reserve(wanted)
+
+
+def _pool(kind):
+    with _settings_lock:
+        pool = _settings[kind]
+        if pool is None:
+            cores = (_settings['budget'] or CoreBudget(default_workers())).cores
+            if kind == 'threads':
+                pool = ThreadPoolExecutor(max_workers=cores, thread_name_prefix='band',
+                                          initializer=_mark_band_thread)
+            else:
+                pool = ProcessPoolExecutor(max_workers=cores, mp_context=multiprocessing.get_context('spawn'),
+                                           initializer=configure, initargs=(1, 1))
+            _settings[kind] = pool
+        return pool
+
+
+def _mark_band_thread():
+    _local.in_band = True
+
+
+@contextmanager
+def _single_threaded_opencv():
+    """Keep OpenCV single-threaded while bands run on threads, then restore its count.
+
+    An OpenCV call that fanned out on its own inside each of several bands
+    would put cores**2 threads on the machine. setNumThreads is
+    process-wide, so overlapping band sections share one lowering and the
+    last to finish restores the count.
+    """
+    with _opencv_lock:
+        if _opencv['sections'] == 0:
+            _opencv['threads'] = cv2.getNumThreads()
+            cv2.setNumThreads(1)
+        _opencv['sections'] += 1
+    try:
+        yield
+    finally:
+        with _opencv_lock:
+            _opencv['sections'] -= 1
+            if _opencv['sections'] == 0:
+                cv2.setNumThreads(_opencv['threads'])
+
+
+def band_bounds(length, count):
+    """[start, stop) of count nearly equal bands covering length"""
+    edges = np.linspace(0, length, count + 1).astype(int)
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def band_window(start, stop, length, halo, align):
+    """The slice a band reads: its rows plus halo, widened outwards to multiples of align"""
+    low = max(0, start - halo) // align * align
+    high = min(length, -(-(stop + halo) // align) * align)
+    return low, high
+
+
+def _take(image, low, high, axis):
+    if axis == 0:
+        return image[low:high]
+    return np.ascontiguousarray(image[:, low:high])
+
+
+def _place(out, start, stop, axis, band_result, offset):
+    if axis == 0:
+        out[start:stop] = band_result[start - offset:stop - offset]
+    else:
+        out[:, start:stop] = band_result[:, start - offset:stop - offset]
+
+
+def _process_band(function, params, image_spec, output_spec, axis, start, stop, halo, align):
+    """Filter one band between shared-memory buffers; runs in a pool process"""
+    (image_name, shape, dtype), (output_name, output_dtype) = image_spec, output_spec
+    image_memory = shared_memory.SharedMemory(name=image_name)
+    output_memory = shared_memory.SharedMemory(name=output_name)
+    try:
+        image = np.ndarray(shape, dtype=dtype, buffer=image_memory.buf)
+        out = np.ndarray(shape[:2], dtype=output_dtype, buffer=output_memory.buf)
+        low, high = band_window(start, stop, shape[axis], halo, align)
+        _place(out, start, stop, axis, function(_take(image, low, high, axis), **params), low)
+        del image, out
+    finally:
+        image_memory.close()
+        output_memory.close()
+
+
+def _run_processes(function, image, bounds, axis, halo, align, dtype, params):
+    image = np.ascontiguousarray(image)
+    dtype = np.dtype(image.dtype if dtype is None else dtype)
+    image_memory = shared_memory.SharedMemory(create=True, size=max(1, image.nbytes))
+    output_bytes = image.shape[0] * image.shape[1] * dtype.itemsize
+    output_memory = shared_memory.SharedMemory(create=True, size=max(1, output_bytes))
+    try:
+        np.ndarray(image.shape, dtype=image.dtype, buffer=image_memory.buf)[...] = image
+        image_spec = (image_memory.name, image.shape, image.dtype.str)
+        output_spec = (output_memory.name, dtype.str)
+        futures = [_pool('processes').submit(_process_band, function, params, image_spec, output_spec,
+                                             axis, start, stop, halo, align)
+                   for start, stop in bounds]
+        for future in futures:
+            future.result()
+        return np.ndarray(image.shape[:2], dtype=dtype, buffer=output_memory.buf).copy()
+    finally:
+        image_memory.close()
+        image_memory.unlink()
+        output_memory.close()
+        output_memory.unlink()
+
+
+def _run_threads(function, image, bounds, axis, halo, align, params):
+    length = image.shape[axis]
+    result = {}
+    lock = threading.Lock()
+
+    def run(start, stop):
+        low, high = band_window(start, stop, length, halo, align)
+        band_result = function(_take(image, low, high, axis), **params)
+        with lock:
+            if 'out' not in result:
+                result['out'] = np.empty(image.shape[:2] + band_result.shape[2:], dtype=band_result.dtype)
+        _place(result['out'], start, stop, axis, band_result, low)
+
+    with _single_threaded_opencv():
+        futures = [_pool('threads').submit(run, start, stop) for start, stop in bounds]
+        for future in futures:
+            future.result()
+    return result['out']
+
+
+def run_bands(function, image, halo=0, axis=0, workers=None, processes=False, dtype=None, align=1, **params):
+    """Apply function(band, **params) to row (axis=0) or column (axis=1) bands of image in parallel.
+
+    Each band is filtered together with halo pixels on either side, widened
+    to multiples of align, and only its own rows or columns are kept, so the
+    result matches function(image, **params) for any filter that reads at
+    most halo pixels around each output pixel along that axis.
+
+    Bands run on a thread pool shared by every caller, for kernels that
+    release the GIL (OpenCV, NumPy, scipy.fft), or with processes=True on a
+    process pool that reads the image from and writes the result into shared
+    memory; function and params must then be picklable and dtype gives the
+    result's type when it differs from the image's. workers is capped by
+    the free cores of the shared budget; None asks for all of them. The
+    result must have the image's shape.
+    """
+    length = image.shape[axis]
+    if getattr(_local, 'in_band', False):
+        # Already inside a band: waiting on the same pool could deadlock it
+        return function(image, **params)
+    with reserve(workers) as granted:
+        count = min(granted, max(1, length // max(MIN_BAND, 2 * halo)))
+        if count <= 1:
+            return function(image, **params)
+        bounds = band_bounds(length, count)
+        if processes:
+            return _run_processes(function, image, bounds, axis, halo, align, dtype, params)
+        return _run_threads(function, image, bounds, axis, halo, align, params)
+
+
+def filter_bands(name, image, workers=None, processes=False, **params):
+    """Run a registered filter on row bands with its registry halo.
+
+    Bands are cut exactly as tiledFilter cuts tiles, so the result is
+    bit-identical to apply_filter(name, image, **params); filters that need
+    the whole image run on it in one piece.
+    """
+    # Imported here so the filters that use run_bands do not load the registry
+    from .filterRegistry import apply_filter
+    from .tiledFilter import TILE_ALIGN, chain_halo
+
+    try:
+        halo = chain_halo([(name, params)])
+    except ValueError:
+        return apply_filter(name, image, **params)
+    return run_bands(partial(apply_filter, name), image, halo=halo, workers=workers,
+                     processes=processes, align=TILE_ALIGN, **params)
@@ -0,0 +1,64 @@
+import cv2
+import numpy as np
+
+from .edgePyramid import edge_map
+from .imageDepth import load_grayscale
+
+def sobel_filter(image, filter_strength, scale=0):
+    """Apply a Sobel gradient-magnitude filter to an image array
+
+    scale > 0 measures coarser edges on that level of a Gaussian pyramid
+    and maps them back to full resolution, instead of raising the ksize.
+    """
+    if scale:
+        return edge_map(image, 'magnitude', scale, filter_strength)
+
+    # Apply Sobel filter (filter_strength controls the kernel size)
+    grad_x = cv2.Sobel(image, cv2.CV_32F, 1, 0, ksize=filter_strength)
+    grad_y = cv2.Sobel(image, cv2.CV_32F, 0, 1, ksize=filter_strength)
+    
+    # Compute the magnitude of gradients in place. NumPy rounds every element
+    # the same way, where cv2.magnitude's SIMD and scalar paths can differ by
+    # an ulp, which would make tiled results depend on the tile layout
+    grad_x *= grad_x
+    grad_y *= grad_y
+    grad_x += grad_y
+    gradient_magnitude = np.sqrt(grad_x, out=grad_x)
+    
+    # Back to the input's sample type
+    filtered_image = gradient_magnitude.astype(image.dtype, copy=False)
+    
+    return filtered_image
+
+def apply_sobel_filter(image_path, filter_strength):
+    image = load_grayscale(image_path)
+    if image is None:
+        raise FileNotFoundError(f"Could not load image from {image_path}")
+
+    return image, sobel_filter(image, filter_strength)
+
+if __name__ == "__main__":
+    # Only the demo needs a display
+    import matplotlib.pyplot as plt
+
+    # Parameters
+    image_path = "uploads/image_upload.png"  # Replace with your image path
+    filter_strength = 5  # Control the strength of the filter (higher = stronger)
+
+    # Apply the filter
+    original_image, filtered_image = apply_sobel_filter(image_path, filter_strength)
+
+    # Display the images
+    plt.figure(figsize=(10, 5))
+    plt.subplot(1, 2, 1)
+    plt.title("Original Image")
+    plt.imshow(original_image, cmap="gray")
+    plt.axis("off")
+
+    plt.subplot(1, 2, 2)
+    plt.title(f"Filtered Image\n(Filter Strength: {filter_strength})")
+    plt.imshow(filtered_image, cmap="gray")
+    plt.axis("off")
+
+    plt.tight_layout()
+    plt.show()
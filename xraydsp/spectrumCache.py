@@ -0,0 +1,207 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import lru_cache
+import cv2
+import numpy as np
+
+from .metrics import stage
+from .parallelBands import reserve
+
+
+@lru_cache(maxsize=None)
+def load_scipy_fft():
+    """scipy.fft, or None without scipy, imported on the first transform.
+
+    It takes longer to import than numpy and OpenCV together, and a worker
+    process may never transform anything.
+    """
+    try:
+        import scipy.fft
+    except ImportError:
+        return None
+    return scipy.fft
+
+
+def compute_spectrum(image, workers=None):
+    """Real-input 2-D FFT of an image, stored as complex64"""
+    data = np.asarray(image, dtype=np.float32)
+    scipy_fft = load_scipy_fft()
+    with stage('forward_fft'):
+        if scipy_fft is not None:
+            # workers is capped by the cores other requests leave free
+            with reserve(workers) as granted:
+                spectrum = scipy_fft.rfft2(data, workers=granted)
+        else:
+            spectrum = np.fft.rfft2(data)
+    return spectrum.astype(np.complex64, copy=False)
+
+
+@lru_cache(maxsize=16)
+def radial_distance_squared(shape):
+    """Squared distance of every rfft2 bin from DC, as in the fftshift-centred layout"""
+    rows, cols = shape
+    dy = (np.arange(rows) + rows // 2) % rows - rows // 2
+    dx = (np.arange(cols // 2 + 1) + cols // 2) % cols - cols // 2
+    distance = dy[:, None] ** 2 + dx[None, :] ** 2
+    distance.setflags(write=False)
+    return distance
+
+
+def reconstruct(spectrum, shape, cutoff_ratio, workers=None, dtype=np.uint8):
+    """Keep frequencies within cutoff_ratio * min(shape) of DC and transform back to dtype"""
+    rows, cols = shape
+    cutoff = int(cutoff_ratio * min(rows, cols))  # Determine cutoff frequency
+    return reconstruct_within(spectrum, shape, cutoff, workers, dtype)
+
+
+def reconstruct_within(spectrum, shape, cutoff, workers=None, dtype=np.uint8):
+    """Keep frequencies within cutoff bins of DC and transform back to dtype at its full scale"""
+    # Apply the circular mask directly to the unshifted half spectrum
+    with stage('mask'):
+        filtered = spectrum * (radial_distance_squared(shape) <= cutoff * cutoff)
+
+    # Perform the inverse Fourier Transform
+    scipy_fft = load_scipy_fft()
+    with stage('inverse_fft'):
+        if scipy_fft is not None:
+            with reserve(workers) as granted:
+                compressed_image = scipy_fft.irfft2(filtered, s=shape, workers=granted)
+        else:
+            compressed_image = np.fft.irfft2(filtered, s=shape)
+        np.abs(compressed_image, out=compressed_image)
+
+    # Normalize for visualization
+    top = 1.0 if np.dtype(dtype).kind == 'f' else np.iinfo(dtype).max
+    with stage('normalize'):
+        return cv2.normalize(compressed_image, None, 0, top, cv2.NORM_MINMAX).astype(dtype)
+
+
+def compress(image, cutoff_ratio, workers=None):
+    """Circular low-pass of an image in the frequency domain, at the full scale of its type.
+
+    The Flask service runs the same two steps apart, so that the forward
+    spectrum can be cached across slider moves.
+    """
+    image = np.asarray(image)
+    return reconstruct(compute_spectrum(image, workers), image.shape, cutoff_ratio, workers, image.dtype)
+
+
+def preview_shape(shape, max_side):
+    """Shape of a preview no larger than max_side along either axis"""
+    rows, cols = shape
+    scale = min(1.0, max_side / max(rows, cols))
+    return max(1, round(rows * scale)), max(1, round(cols * scale))
+
+
+def crop_spectrum(spectrum, shape):
+    """The bins of an rfft2 spectrum that an image of shape can hold.
+
+    Bin k means k cycles across the image at any size, so keeping the
+    lowest frequencies and transforming back at the smaller shape gives a
+    downsampled image without touching the full-size data.
+    """
+    rows, cols = shape
+    positive = rows - rows // 2
+    kept = spectrum[:, :cols // 2 + 1]
+    if rows // 2:
+        return np.concatenate([kept[:positive], kept[-(rows // 2):]])
+    return kept[:positive]
+
+
+def reconstruct_preview(spectrum, shape, cutoff_ratio, max_side=256, workers=None):
+    """Low-resolution reconstruct(): the same cutoff applied to a cropped spectrum.
+
+    Costs one inverse FFT of at most max_side x max_side, whatever the image size.
+    """
+    rows, cols = shape
+    small = preview_shape(shape, max_side)
+    if small == (rows, cols):
+        return reconstruct(spectrum, shape, cutoff_ratio, workers)
+    cutoff = int(cutoff_ratio * min(rows, cols))
+    with stage('preview'):
+        cropped = crop_spectrum(spectrum, small)
+    return reconstruct_within(cropped, small, cutoff, workers)
+
+
+def preview_image(image, cutoff_ratio, max_side=256, workers=None):
+    """reconstruct_preview() for an image whose spectrum has not been computed yet.
+
+    The image is area-downsampled first, so only a small forward transform
+    is needed; its bins keep their meaning, so the cutoff is unchanged.
+    """
+    rows, cols = image.shape
+    small = preview_shape(image.shape, max_side)
+    if small == (rows, cols):
+        return reconstruct(compute_spectrum(image, workers), image.shape, cutoff_ratio, workers)
+    with stage('preview'):
+        downsampled = cv2.resize(np.asarray(image, dtype=np.float32), small[::-1], interpolation=cv2.INTER_AREA)
+    cutoff = int(cutoff_ratio * min(rows, cols))
+    return reconstruct_within(compute_spectrum(downsampled, workers), small, cutoff, workers)
+
+
+class SpectrumCache:
+    """LRU of forward spectra for uploaded images.
+
+    The forward transform only depends on the image, so every slider
+    position after the first costs a threshold mask and one inverse FFT.
+    fetch() is single-flight: threads that miss on the same key while it is
+    being transformed wait for that one transform instead of each running
+    their own.
+    """
+
+    def __init__(self, max_entries=8, workers=None):
+        self.max_entries = max_entries
+        self.workers = workers
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (spectrum, shape) for key, or None if it is not cached"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def fetch(self, key, load):
+        """Return (spectrum, shape) for key, transforming load() once on a miss.
+
+        load returns the image, or None when key is unknown, in which case
+        fetch returns None too.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = Future()
+        if not owner:
+            return pending.result()
+
+        try:
+            image = load()
+            entry = None if image is None else self.put(key, image)
+        except BaseException as error:
+            pending.set_exception(error)
+            raise
+        else:
+            pending.set_result(entry)
+        finally:
+            with self._lock:
+                del self._pending[key]
+        return entry
+
+    def put(self, key, image):
+        """Transform image, cache its spectrum under key and return the entry"""
+        entry = (compute_spectrum(image, workers=self.workers), image.shape)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
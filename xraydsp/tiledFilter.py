@@ -0,0 +1,214 @@
+import argparse
+import sys
+import time
+import cv2
+import numpy as np
+
+from .filterRegistry import FILTERS, apply_chain, filter_halo, parse_chain, pin_bits
+from .imageDepth import DTYPE_BITS, file_bit_depth, load_grayscale
+
+DEFAULT_TILE_SIZE = 1024
+# OpenCV computes the columns next to a buffer's edge, and the tail of each row
+# left over by its SIMD loop, on scalar paths whose rounding can differ at exact
+# .5 ties. Tiles therefore read a little past their halo, and start and end on
+# column multiples of TILE_ALIGN so every row tail falls on the same image columns
+# (separable passes keep a wider tail than filter2D does). Rows are aligned too,
+# so pyramid levels keep the same samples as the whole image's.
+TILE_MARGIN = 8
+TILE_ALIGN = 64
+
+
+def chain_halo(chain):
+    """Context a chain of filters needs: the sum of every step's halo, plus a margin"""
+    total = TILE_MARGIN
+    for name, params in chain:
+        halo = filter_halo(name, **params)
+        if halo is None:
+            raise ValueError(f"Filter '{name}' needs the whole image with these parameters and cannot be tiled")
+        total += halo
+    return total
+
+
+def tile_ranges(length, tile_size):
+    return [(start, min(start + tile_size, length)) for start in range(0, length, tile_size)]
+
+
+def npy_layout(path):
+    """Return (shape, dtype, data offset) of a C-ordered .npy file without reading its data"""
+    with open(path, 'rb') as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        if fortran_order:
+            raise ValueError(f"{path} is Fortran-ordered; tiles are read as row bands")
+        return shape, dtype, f.tell()
+
+
+def map_rows(path, layout, start, stop, mode='r'):
+    """Memory-map rows [start, stop) of a .npy file.
+
+    Each band gets its own short-lived mapping, so pages of finished bands are
+    unmapped (and, for the output, written back) instead of accumulating in RSS.
+    """
+    shape, dtype, offset = layout
+    row_bytes = dtype.itemsize * int(np.prod(shape[1:], dtype=np.int64))
+    return np.memmap(path, dtype=dtype, mode=mode, offset=offset + start * row_bytes,
+                     shape=(stop - start,) + tuple(shape[1:]))
+
+
+class RowSource:
+    """Row-band access to an in-memory array or a .npy file on disk"""
+
+    def __init__(self, source, bits=None):
+        self.bits = bits
+        if isinstance(source, np.ndarray):
+            self.path, self.layout = None, None
+            self.array = source
+            self.shape = source.shape
+        elif source.lower().endswith('.npy'):
+            self.path, self.layout = source, npy_layout(source)
+            self.array = None
+            self.shape = self.layout[0]
+        else:
+            # Compressed formats have to be decoded in one go; only the decoded
+            # image is held, the float temporaries stay tile-sized
+            image = load_grayscale(source)
+            if image is None:
+                raise FileNotFoundError(f"Could not load image from {source}")
+            self.path, self.layout = None, None
+            self.array = image
+            self.shape = image.shape
+            if bits is None:
+                self.bits = file_bit_depth(source)
+
+    def rows(self, start, stop):
+        if self.array is not None:
+            return self.array[start:stop]
+        return map_rows(self.path, self.layout, start, stop)
+
+    @property
+    def dtype(self):
+        return self.array.dtype if self.array is not None else self.layout[1]
+
+    def bit_depth(self):
+        """Depth of the whole source: the given bits, else the file's, else its type's full depth"""
+        return self.bits if self.bits is not None else DTYPE_BITS.get(np.dtype(self.dtype))
+
+
+class RowSink:
+    """Row-band writes into an array, or into a .npy file created on the first write"""
+
+    def __init__(self, path, shape):
+        self.path = path
+        self.shape = shape
+        self.array = None
+        self.layout = None
+
+    def write(self, start, band):
+        if self.array is None and self.layout is None:
+            shape = tuple(self.shape[:2]) + band.shape[2:]
+            if self.path is None:
+                self.array = np.empty(shape, dtype=band.dtype)
+            else:
+                # Create the file with its header, then write it band by band
+                created = np.lib.format.open_memmap(self.path, mode='w+', dtype=band.dtype, shape=shape)
+                del created
+                self.layout = npy_layout(self.path)
+
+        stop = start + band.shape[0]
+        if self.array is not None:
+            self.array[start:stop] = band
+        else:
+            target = map_rows(self.path, self.layout, start, stop, mode='r+')
+            target[:] = band
+            target.flush()
+            del target
+
+    def result(self):
+        if self.array is not None:
+            return self.array
+        return np.load(self.path, mmap_mode='r')
+
+
+def filter_tiled(source, chain, output_path=None, tile_size=DEFAULT_TILE_SIZE, bits=None):
+    """Run a filter chain tile by tile and return the stitched result.
+
+    source is an image array, a .npy file (memory-mapped one row band at a
+    time) or an image file. Each tile is filtered together with a halo wide
+    enough for every step of the chain, and only its centre is kept; at the
+    image border the crop ends where the image does, so the filters apply
+    their own border handling exactly as they would to the whole image and
+    the stitched result is bit-identical to apply_chain(image, chain).
+
+    With output_path set the result is written into a .npy file and returned
+    memory-mapped; peak memory is then a few tile-sized buffers plus one band
+    of input rows, whatever the image size.
+
+    bits is the sample depth of the source, e.g. 12 for a detector's
+    16-bit containers; by default it is read from the file's metadata.
+    """
+    halo = chain_halo(chain)
+    reader = RowSource(source, bits)
+    # Depth-dependent filters get the depth of the whole source
+    chain = pin_bits(chain, reader.bit_depth())
+    height, width = reader.shape[:2]
+    writer = RowSink(output_path, reader.shape)
+
+    for y0, y1 in tile_ranges(height, tile_size):
+        top = max(0, y0 - halo) // TILE_ALIGN * TILE_ALIGN
+        bottom = min(height, -(-(y1 + halo) // TILE_ALIGN) * TILE_ALIGN)
+        band = reader.rows(top, bottom)
+        output_band = None
+        for x0, x1 in tile_ranges(width, tile_size):
+            left = max(0, x0 - halo) // TILE_ALIGN * TILE_ALIGN
+            right = min(width, -(-(x1 + halo) // TILE_ALIGN) * TILE_ALIGN)
+            tile = np.ascontiguousarray(band[:, left:right])
+            result = apply_chain(tile, chain)[y0 - top:y1 - top, x0 - left:x1 - left]
+            if output_band is None:
+                output_band = np.empty((y1 - y0, width) + result.shape[2:], dtype=result.dtype)
+            output_band[:, x0:x1] = result
+        del band
+        writer.write(y0, output_band)
+
+    return writer.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Filter an image too large for memory, tile by tile.",
+        epilog="Tileable filters: " + ", ".join(name for name, spec in FILTERS.items() if spec.halo is not None),
+    )
+    parser.add_argument('input', help=".npy file (memory-mapped) or image file")
+    parser.add_argument('output', help=".npy file (written band by band) or image file")
+    parser.add_argument('-f', '--filter', dest='chain', nargs='+', required=True,
+                        help="filter steps applied in order, e.g. median:filter_strength=5 sobel")
+    parser.add_argument('-t', '--tile', type=int, default=DEFAULT_TILE_SIZE, help="tile edge in pixels")
+    parser.add_argument('--bits', type=int, default=None,
+                        help="sample depth of 16-bit input, e.g. 12 (default: from the file, else 16)")
+    args = parser.parse_args(argv)
+
+    try:
+        chain = parse_chain(args.chain)
+        chain_halo(chain)
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    if args.output.lower().endswith('.npy'):
+        result = filter_tiled(args.input, chain, output_path=args.output, tile_size=args.tile, bits=args.bits)
+    else:
+        # Image encoders need the whole result in memory
+        result = filter_tiled(args.input, chain, tile_size=args.tile, bits=args.bits)
+        if not cv2.imwrite(args.output, result):
+            print(f"error: could not write {args.output}", file=sys.stderr)
+            return 1
+    seconds = time.perf_counter() - start
+    print(f"Filtered {result.shape[1]}x{result.shape[0]} in {seconds:.2f}s "
+          f"({result.size / 1e6 / seconds:.1f} MP/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())